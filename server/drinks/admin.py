@@ -1,7 +1,23 @@
 from django.contrib import admin
 
-from .models import Drink, DrinkFavorite, DrinkImage
+from .models import (
+    Brand,
+    Drink,
+    DrinkFavorite,
+    DrinkImage,
+    DrinkSimilarity,
+    DrinkStats,
+    ProfileRecommendations,
+    RecommenderModel,
+    TrendingEpoch,
+)
 
 admin.site.register(Drink)
+admin.site.register(Brand)
 admin.site.register(DrinkFavorite)
 admin.site.register(DrinkImage)
+admin.site.register(DrinkStats)
+admin.site.register(DrinkSimilarity)
+admin.site.register(TrendingEpoch)
+admin.site.register(RecommenderModel)
+admin.site.register(ProfileRecommendations)
@@ -0,0 +1,331 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from django.utils import timezone
+from profiles.models import Profile
+from reviews.models import Review
+from .models import DrinkFavorite, ProfileRecommendations, RecommenderModel
+from .recommendations import DRINK_ID_DTYPE, pack
+from .similarity import read_columns
+
+# a favorite without a review counts as a 5 star rating
+FAVORITE_RATING = 5.0
+MIN_RATING = 1.0
+MAX_RATING = 5.0
+
+FACTORS = 32
+REGULARIZATION = 0.1
+ITERATIONS = 10
+
+# drinks stored per profile
+TOP_N = 100
+
+FACTOR_DTYPE = np.dtype("<f4")
+
+
+def read_ratings(profile_ids=None):
+    """
+    (profiles, drinks, ratings) arrays from review ratings and favorites, optionally only
+    for profile_ids, a review's rating wins over a favorite of the same drink
+    """
+    reviews = Review.objects.order_by()
+    favorites = DrinkFavorite.objects.order_by()
+
+    if profile_ids is not None:
+        reviews = reviews.filter(profile_id__in=profile_ids)
+        favorites = favorites.filter(profile_id__in=profile_ids)
+
+    review_profiles, review_drinks, ratings = read_columns(
+        reviews.values_list("profile_id", "drink_id", "rating"),
+        [np.int64, np.int64, np.float32],
+    )
+    favorite_profiles, favorite_drinks = read_columns(
+        favorites.values_list("profile_id", "drink_id"), [np.int64, np.int64]
+    )
+
+    # drop favorites of reviewed drinks, pairs keyed as profile << 32 | drink
+    reviewed = np.isin(
+        (favorite_profiles << 32) | favorite_drinks,
+        (review_profiles << 32) | review_drinks,
+    )
+    favorite_profiles = favorite_profiles[~reviewed]
+    favorite_drinks = favorite_drinks[~reviewed]
+
+    return (
+        np.concatenate([review_profiles, favorite_profiles]),
+        np.concatenate([review_drinks, favorite_drinks]),
+        np.concatenate(
+            [
+                ratings,
+                np.full(len(favorite_drinks), FAVORITE_RATING, dtype=np.float32),
+            ]
+        ),
+    )
+
+
+def load_ratings():
+    """
+    Profile x drink rating matrix from review ratings and favorites
+    Returns (matrix, profile_ids, drink_ids) with matrix as csr float32 and the id arrays
+    mapping rows and columns
+    """
+    profiles, drinks, ratings = read_ratings()
+
+    # compact ids to row and column indexes
+    profile_ids, rows = np.unique(profiles, return_inverse=True)
+    drink_ids, columns = np.unique(drinks, return_inverse=True)
+
+    matrix = sparse.csr_matrix(
+        (ratings, (rows, columns)), shape=(len(profile_ids), len(drink_ids))
+    )
+    matrix.sum_duplicates()
+
+    return matrix, profile_ids, drink_ids
+
+
+def solve_chunk(ratings, fixed, fixed_outer, regularization):
+    """
+    Least squares factors for the rows of a csr chunk of mean centered ratings, with the
+    other side's factors fixed, all rows solved in one batched call
+    fixed_outer is fixed's per row outer products flattened to (len(fixed), f * f)
+    """
+    factors = fixed.shape[1]
+
+    indicator = ratings.copy()
+    indicator.data[:] = 1
+    counts = np.diff(ratings.indptr).astype(np.float32)
+
+    # sum of v v^T over each row's rated items, as one sparse x dense product
+    gram = (indicator @ fixed_outer).reshape(-1, factors, factors)
+
+    # weighted regularization, heavier for rows with more ratings (ALS-WR)
+    gram += (
+        regularization * np.maximum(counts, 1)[:, None, None] * np.eye(factors)
+    ).astype(np.float32)
+
+    rhs = ratings @ fixed
+
+    return np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+
+
+def solve_factors(ratings, fixed, regularization, executor, chunk_size):
+    """
+    Factors for every row of ratings, chunks solved in parallel on executor
+    numpy and scipy release the GIL in the products and solves, so threads use every core
+    """
+    fixed_outer = np.einsum("if,ig->ifg", fixed, fixed).reshape(len(fixed), -1)
+    chunks = range(0, ratings.shape[0], chunk_size)
+
+    solved = executor.map(
+        lambda start: solve_chunk(
+            ratings[start : start + chunk_size], fixed, fixed_outer, regularization
+        ),
+        chunks,
+    )
+
+    return np.concatenate(list(solved)) if len(chunks) else fixed[:0]
+
+
+def top_n(profile_factors, item_factors, mean_rating, seen, n, executor, chunk_size):
+    """
+    Best n unseen items per profile, yields (rows, items, ratings) per chunk with items
+    and ratings as (len(rows), n) arrays padded with -1 / 0 where fewer items are unseen
+    """
+    n = min(n, len(item_factors))
+
+    def chunk_top(start):
+        stop = min(start + chunk_size, len(profile_factors))
+        predicted = profile_factors[start:stop] @ item_factors.T + mean_rating
+
+        # never recommend reviewed or favorited drinks
+        chunk_seen = seen[start:stop].tocoo()
+        predicted[chunk_seen.row, chunk_seen.col] = -np.inf
+
+        items = np.argpartition(predicted, -n, axis=1)[:, -n:]
+        ratings = np.take_along_axis(predicted, items, axis=1)
+
+        order = np.argsort(-ratings, axis=1)
+        items = np.take_along_axis(items, order, axis=1)
+        ratings = np.take_along_axis(ratings, order, axis=1)
+
+        items[np.isneginf(ratings)] = -1
+        ratings = np.clip(ratings, MIN_RATING, MAX_RATING)
+        ratings[items < 0] = 0
+
+        return np.arange(start, stop), items, ratings
+
+    if n < 1:
+        return
+
+    yield from executor.map(chunk_top, range(0, len(profile_factors), chunk_size))
+
+
+def save_recommendations(profile_ids, drink_ids, chunks, write_batch_size=2000):
+    """
+    Upsert ProfileRecommendations from top_n() chunks, returns the number of profiles
+    written
+    """
+    written = 0
+    rows = []
+
+    def flush():
+        nonlocal written
+
+        # skip profiles deleted since their ratings were read
+        existing = set(
+            Profile.objects.filter(pk__in=[row.profile_id for row in rows]).values_list(
+                "pk", flat=True
+            )
+        )
+
+        ProfileRecommendations.objects.bulk_create(
+            [row for row in rows if row.profile_id in existing],
+            update_conflicts=True,
+            unique_fields=["profile"],
+            update_fields=["drink_ids", "ratings", "date_updated"],
+        )
+        written += len(existing)
+        rows.clear()
+
+    for chunk_rows, items, ratings in chunks:
+        for row, row_items, row_ratings in zip(chunk_rows, items, ratings):
+            count = np.count_nonzero(row_items >= 0)
+            packed_ids, packed_ratings = pack(
+                drink_ids[row_items[:count]], row_ratings[:count]
+            )
+
+            rows.append(
+                ProfileRecommendations(
+                    profile_id=int(profile_ids[row]),
+                    drink_ids=packed_ids,
+                    ratings=packed_ratings,
+                )
+            )
+
+        if len(rows) >= write_batch_size:
+            flush()
+
+    if rows:
+        flush()
+
+    return written
+
+
+def train(
+    factors=FACTORS,
+    regularization=REGULARIZATION,
+    iterations=ITERATIONS,
+    n=TOP_N,
+    workers=None,
+    chunk_size=1024,
+    seed=0,
+):
+    """
+    Train ALS on mean centered ratings, store the item factors as the latest
+    RecommenderModel and replace every profile's recommendations
+    Returns the number of profiles written
+    """
+    matrix, profile_ids, drink_ids = load_ratings()
+    started = timezone.now()
+
+    mean_rating = float(matrix.data.mean()) if matrix.nnz else 0.0
+    centered = matrix.copy()
+    centered.data -= mean_rating
+    centered_t = centered.T.tocsr()
+
+    rng = np.random.default_rng(seed)
+    profile_factors = rng.normal(0, 0.1, (len(profile_ids), factors)).astype(np.float32)
+    item_factors = rng.normal(0, 0.1, (len(drink_ids), factors)).astype(np.float32)
+
+    with ThreadPoolExecutor(workers or os.cpu_count()) as executor:
+        for _ in range(iterations):
+            profile_factors = solve_factors(
+                centered, item_factors, regularization, executor, chunk_size
+            )
+            item_factors = solve_factors(
+                centered_t, profile_factors, regularization, executor, chunk_size
+            )
+
+        with transaction.atomic():
+            RecommenderModel.objects.all().delete()
+            RecommenderModel.objects.create(
+                mean_rating=mean_rating,
+                drink_ids=np.asarray(drink_ids, dtype=DRINK_ID_DTYPE).tobytes(),
+                item_factors=np.asarray(item_factors, dtype=FACTOR_DTYPE).tobytes(),
+            )
+
+            written = save_recommendations(
+                profile_ids,
+                drink_ids,
+                top_n(
+                    profile_factors,
+                    item_factors,
+                    mean_rating,
+                    matrix,
+                    n,
+                    executor,
+                    chunk_size,
+                ),
+            )
+
+            # profiles with no ratings left keep nothing stale
+            ProfileRecommendations.objects.filter(date_updated__lt=started).delete()
+
+    return written
+
+
+def fold_in(profile_ids, regularization=REGULARIZATION, n=TOP_N, chunk_size=1024):
+    """
+    Recommendations for profile_ids from the latest model's item factors without
+    retraining, for profiles created (or active) since it was trained
+    Returns the number of profiles written
+    """
+    model = RecommenderModel.objects.order_by("-date_created").first()
+
+    if model is None:
+        return 0
+
+    drink_ids = np.frombuffer(model.drink_ids, dtype=DRINK_ID_DTYPE)
+    item_factors = np.frombuffer(model.item_factors, dtype=FACTOR_DTYPE).reshape(
+        len(drink_ids), -1
+    )
+
+    profiles, drinks, ratings = read_ratings(profile_ids)
+
+    # drinks newer than the model have no factors and are skipped
+    columns = np.searchsorted(drink_ids, drinks)
+    columns[columns >= len(drink_ids)] = 0
+    known = drink_ids[columns] == drinks if len(drink_ids) else columns < 0
+
+    fold_profile_ids, rows = np.unique(profiles[known], return_inverse=True)
+
+    matrix = sparse.csr_matrix(
+        (ratings[known], (rows, columns[known])),
+        shape=(len(fold_profile_ids), len(drink_ids)),
+    )
+    matrix.sum_duplicates()
+
+    centered = matrix.copy()
+    centered.data -= model.mean_rating
+
+    with ThreadPoolExecutor(1) as executor:
+        profile_factors = solve_factors(
+            centered, item_factors, regularization, executor, chunk_size
+        )
+
+        with transaction.atomic():
+            return save_recommendations(
+                fold_profile_ids,
+                drink_ids,
+                top_n(
+                    profile_factors,
+                    item_factors,
+                    model.mean_rating,
+                    matrix,
+                    n,
+                    executor,
+                    chunk_size,
+                ),
+            )
@@ -0,0 +1,56 @@
+from collections import Counter
+from django.db.models import Count, F, Min
+from .models import Brand, Drink
+
+# sort query param for brand lists
+BRAND_ORDERINGS = {
+    "name": ["key"],
+    "count": ["-drink_count", "key"],
+}
+
+
+def count_drinks(drinks, change=1):
+    """
+    Add (change=1) or remove (change=-1) drinks from their brands' drink counts, one
+    update per brand
+    """
+    counts = Counter()
+    names = {}
+
+    for drink in drinks:
+        counts[drink.brand_key] += change
+        names.setdefault(drink.brand_key, drink.brand_name)
+
+    for key, amount in counts.items():
+        if amount > 0:
+            Brand.objects.get_or_create(key=key, defaults={"name": names[key]})
+
+        Brand.objects.filter(key=key).update(drink_count=F("drink_count") + amount)
+
+
+def rebuild_brands():
+    """
+    Recompute every brand's drink count from drinks (backfill and repair)
+    Returns the number of brands with drinks
+    """
+    rows = (
+        Drink.objects.values("brand_key")
+        .annotate(count=Count("id"), first=Min("id"))
+        .order_by()
+    )
+    counts = {row["brand_key"]: (row["count"], row["first"]) for row in rows}
+    names = Drink.objects.in_bulk([first for _, first in counts.values()])
+
+    Brand.objects.update(drink_count=0)
+    Brand.objects.bulk_create(
+        [
+            Brand(key=key, name=names[first].brand_name, drink_count=count)
+            for key, (count, first) in counts.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["key"],
+        update_fields=["drink_count"],
+        batch_size=1000,
+    )
+
+    return len(counts)
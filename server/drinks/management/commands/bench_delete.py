@@ -0,0 +1,135 @@
+import time
+import tracemalloc
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from drinks.models import Drink, DrinkFavorite, DrinkStats
+from fizzgrid.deletion import fast_delete
+from profiles.models import Profile
+from reviews.models import Comment, CommentLike, Review, ReviewLike
+
+BRAND = "Bench Delete"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark deleting a popular drink and a prolific account with the deletion "
+        "Collector and with fast_delete. Writes to the configured database, every delete "
+        "is rolled back and the synthetic data is removed afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reviews", type=int, default=5000)
+        parser.add_argument("--profiles", type=int, default=50)
+
+    def handle(self, *args, **options):
+        drink, user = self.create_data(options["reviews"], options["profiles"])
+
+        try:
+            for name, queryset in (
+                ("drink", Drink.objects.filter(pk=drink.pk)),
+                ("account", User.objects.filter(pk=user.pk)),
+            ):
+                for method, delete in (
+                    ("collector", lambda: queryset.delete()),
+                    ("fast_delete", lambda: fast_delete(queryset)),
+                ):
+                    deleted, seconds, queries, peak = self.measure(delete)
+
+                    self.stdout.write(
+                        f"{name} {method}: {deleted} rows in {seconds * 1000:.0f} ms, "
+                        f"{queries} queries, {peak / 1024 / 1024:.1f} MiB peak"
+                    )
+        finally:
+            fast_delete(Drink.objects.filter(brand_name=BRAND))
+            fast_delete(User.objects.filter(username__startswith="bench-delete-"))
+
+    def measure(self, delete):
+        # timed and traced separately, tracing slows everything down
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                deleted, _ = delete()
+                seconds = time.perf_counter() - start
+
+            transaction.set_rollback(True)
+
+        with transaction.atomic():
+            tracemalloc.start()
+            delete()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            transaction.set_rollback(True)
+
+        return deleted, seconds, len(queries), peak
+
+    def create_data(self, review_count, profile_count):
+        """
+        Half the reviews are of the first drink, the other half by the first profile,
+        every review is liked and commented on (and the comment liked) by others
+        """
+        now = timezone.now()
+
+        drinks = [
+            Drink.objects.create(product_name=f"Drink {i}", brand_name=BRAND)
+            for i in range(review_count // profile_count)
+        ]
+        DrinkStats.objects.bulk_create([DrinkStats(drink=drink) for drink in drinks])
+
+        profiles = []
+
+        for i in range(profile_count):
+            user = User.objects.create(username=f"bench-delete-{i}")
+            profiles.append(Profile.objects.create(user=user))
+
+        reviews = Review.objects.bulk_create(
+            [
+                Review(
+                    profile=profiles[i % profile_count] if i % 2 else profiles[0],
+                    drink=drinks[0] if i % 2 else drinks[i % len(drinks)],
+                    review_text="Review text",
+                    rating=i % 5 + 1,
+                    date_created=now,
+                )
+                for i in range(review_count)
+            ],
+            batch_size=1000,
+        )
+
+        ReviewLike.objects.bulk_create(
+            [
+                ReviewLike(review=review, profile=profiles[(i + 1) % profile_count])
+                for i, review in enumerate(reviews)
+            ],
+            batch_size=1000,
+        )
+        comments = Comment.objects.bulk_create(
+            [
+                Comment(
+                    review=review,
+                    profile=profiles[(i + 2) % profile_count],
+                    comment_text="Comment text",
+                    date_created=now,
+                )
+                for i, review in enumerate(reviews)
+            ],
+            batch_size=1000,
+        )
+        CommentLike.objects.bulk_create(
+            [
+                CommentLike(comment=comment, profile=profiles[(i + 3) % profile_count])
+                for i, comment in enumerate(comments)
+            ],
+            batch_size=1000,
+        )
+        DrinkFavorite.objects.bulk_create(
+            [
+                DrinkFavorite(drink=drinks[0], profile=profile, date_created=now)
+                for profile in profiles
+            ]
+        )
+
+        return drinks[0], profiles[0].user
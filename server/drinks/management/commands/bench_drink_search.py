@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from drinks.models import Drink
+from drinks.search import search_drinks
+
+FLAVORS = ["cherry", "lime", "vanilla", "orange", "grape", "root", "ginger", "cream"]
+STYLES = ["cola", "soda", "beer", "ale", "fizz", "pop", "tonic", "spritz"]
+BRANDS = ["coca-cola", "pepsi", "dr pepper", "fanta", "jarritos", "olipop", "sprite"]
+
+# searches as typed on the explore page, including typos
+QUERIES = ["coka cola", "cola", "cherry", "pepsi", "ginger al", "jaritos", "vanila"]
+
+SYNTHETIC_SUFFIX = " (bench)"
+
+
+class Command(BaseCommand):
+    help = "Benchmark drink search against the icontains scan on synthetic drinks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--keep", action="store_true", help="keep synthetic drinks after the run"
+        )
+        parser.add_argument(
+            "--explain",
+            action="store_true",
+            help="print the query plan of each search, postgres should combine index "
+            "scans on the trigram indexes (BitmapOr) rather than scan drinks_drink",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stderr.write(
+                "Not running on postgres, the search path is the python fallback"
+            )
+
+        self.create_drinks(options["rows"])
+
+        try:
+            if options["explain"]:
+                self.explain()
+
+            for name, run in [("icontains", self.icontains), ("trigram", self.trigram)]:
+                timings = []
+
+                for _ in range(options["repeat"]):
+                    for query in QUERIES:
+                        start = time.perf_counter()
+                        run(query)
+                        timings.append((time.perf_counter() - start) * 1000)
+
+                timings.sort()
+                p95 = timings[int(len(timings) * 0.95) - 1]
+
+                self.stdout.write(
+                    f"{name}: median {statistics.median(timings):.1f} ms, "
+                    f"p95 {p95:.1f} ms over {len(timings)} searches"
+                )
+        finally:
+            if not options["keep"]:
+                Drink.objects.filter(brand_name__endswith=SYNTHETIC_SUFFIX).delete()
+
+    def create_drinks(self, rows):
+        existing = Drink.objects.filter(brand_name__endswith=SYNTHETIC_SUFFIX).count()
+        rng = random.Random(0)
+        batch = []
+
+        for i in range(existing, rows):
+            product_name = f"{rng.choice(FLAVORS)} {rng.choice(STYLES)} {i}"
+            brand_name = f"{rng.choice(BRANDS)}{SYNTHETIC_SUFFIX}"
+            batch.append(Drink(product_name=product_name, brand_name=brand_name))
+
+            if len(batch) == 10_000:
+                Drink.objects.bulk_create(batch)
+                batch = []
+
+        Drink.objects.bulk_create(batch)
+
+    def explain(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE drinks_drink")
+
+        for query in QUERIES:
+            plan = search_drinks(Drink.objects.all(), query).explain()
+
+            self.stdout.write(f"{query}:\n{plan}\n")
+
+            if "Seq Scan on drinks_drink" in plan:
+                self.stderr.write(f"{query}: drinks_drink is scanned sequentially")
+
+    def icontains(self, query):
+        # DrinkList before ranked search
+        drinks = Drink.objects.filter(
+            Q(product_name__icontains=query) | Q(brand_name__icontains=query)
+        ).order_by("id")
+
+        page_obj = Paginator(drinks, 10, 4).get_page(1)
+        return list(page_obj.object_list)
+
+    def trigram(self, query):
+        drinks = search_drinks(Drink.objects.all(), query).order_by("-rank", "id")
+
+        page_obj = Paginator(drinks, 10, 4).get_page(1)
+        return list(page_obj.object_list)
@@ -0,0 +1,91 @@
+import statistics
+import time
+import uuid
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from drinks.models import Drink, DrinkImage
+from drinks.serializers import DrinkImageSerializer
+from fizzgrid.images import RENDITION_FORMATS, RENDITION_WIDTHS, rendition_name
+from fizzgrid.media_urls import public_url
+
+
+class Command(BaseCommand):
+    help = "Benchmark image url generation and serialization on in-memory drink images"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Storage: {type(default_storage._wrapped).__name__}")
+
+        images = self.create_images(options["images"])
+
+        # every stored key a list response turns into a url
+        names = [image.image.name for image in images]
+
+        for image in images:
+            for files in image.renditions.values():
+                names.extend(files[extension] for extension in RENDITION_FORMATS)
+
+        runs = [
+            (
+                "storage.url",
+                f"{len(names)} urls",
+                lambda: list(map(self.storage_url, names)),
+            ),
+            ("public_url", f"{len(names)} urls", lambda: list(map(public_url, names))),
+            (
+                "serializer",
+                f"{len(images)} images",
+                lambda: DrinkImageSerializer(images, many=True).data,
+            ),
+        ]
+
+        for name, size, run in runs:
+            timings = []
+
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+
+            self.stdout.write(
+                f"{name}: median {statistics.median(timings):.1f} ms for {size}"
+            )
+
+    def storage_url(self, name):
+        # serializers before public_url
+        return default_storage.url(name).split("?")[0]
+
+    def create_images(self, count):
+        # unsaved, url generation never touches the database
+        drink = Drink(pk=1, product_name="Product", brand_name="Brand")
+        images = []
+
+        for i in range(count):
+            name = f"drink_imgs/{uuid.uuid4()}.jpg"
+            renditions = {
+                rendition: {
+                    "width": width,
+                    "height": width,
+                    **{
+                        extension: rendition_name(name, rendition, extension)
+                        for extension in RENDITION_FORMATS
+                    },
+                }
+                for rendition, width in RENDITION_WIDTHS.items()
+            }
+
+            images.append(
+                DrinkImage(
+                    pk=i + 1,
+                    drink=drink,
+                    label="Product - Brand",
+                    image=name,
+                    renditions=renditions,
+                    status=DrinkImage.Status.READY,
+                )
+            )
+
+        return images
@@ -0,0 +1,61 @@
+import resource
+import time
+import numpy as np
+from scipy import sparse
+from django.core.management.base import BaseCommand
+from drinks.similarity import top_k_similar
+
+
+class Command(BaseCommand):
+    help = "Benchmark the similarity build on a synthetic profile x drink matrix"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", type=int, default=100_000)
+        parser.add_argument("--drinks", type=int, default=50_000)
+        parser.add_argument(
+            "--interactions",
+            type=int,
+            default=20,
+            help="reviews and favorites per profile",
+        )
+        parser.add_argument("--top-k", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=512)
+
+    def handle(self, *args, **options):
+        matrix = self.create_matrix(
+            options["profiles"], options["drinks"], options["interactions"]
+        )
+
+        self.stdout.write(
+            f"{matrix.shape[0]} profiles x {matrix.shape[1]} drinks, "
+            f"{matrix.nnz} interactions"
+        )
+
+        start = time.perf_counter()
+        pairs = 0
+
+        for _, neighbors, _ in top_k_similar(
+            matrix, options["top_k"], options["batch_size"]
+        ):
+            pairs += int((neighbors >= 0).sum())
+
+        # kilobytes on linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        self.stdout.write(
+            f"top {options['top_k']}: {pairs} pairs in "
+            f"{time.perf_counter() - start:.2f}s, peak memory {peak:.0f} MB"
+        )
+
+    def create_matrix(self, profiles, drinks, interactions):
+        rng = np.random.default_rng(0)
+        count = profiles * interactions
+
+        # popular drinks get most of the interactions
+        rows = np.repeat(np.arange(profiles), interactions)
+        columns = np.minimum(rng.zipf(1.3, count) - 1, drinks - 1)
+        values = rng.integers(1, 6, count).astype(np.float32) / 5
+
+        return sparse.coo_matrix(
+            (values, (rows, columns)), shape=(profiles, drinks)
+        ).tocsr()
@@ -0,0 +1,35 @@
+import resource
+import time
+from django.core.management.base import BaseCommand
+from drinks.similarity import build_similarity
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute similar drinks from review ratings and favorites, run periodically "
+        "(e.g. nightly)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k", type=int, default=20, help="neighbors stored per drink"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=512,
+            help="drinks per similarity batch, memory grows with batch size x drinks",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        written = build_similarity(options["top_k"], options["batch_size"])
+
+        # kilobytes on linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        self.stdout.write(
+            f"Stored {written} similar drink pairs in "
+            f"{time.perf_counter() - start:.2f}s, peak memory {peak:.0f} MB"
+        )
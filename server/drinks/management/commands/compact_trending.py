@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from drinks.trending import compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the trending epoch to now and rescale trending scores, run periodically "
+        "(e.g. daily) so scores stay small"
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        factor = compact()
+
+        self.stdout.write(
+            f"Rescaled trending scores by {factor:.6g} in "
+            f"{time.perf_counter() - start:.2f}s"
+        )
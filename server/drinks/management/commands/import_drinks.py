@@ -0,0 +1,302 @@
+import csv
+import itertools
+import json
+import os
+import time
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from drinks.brands import count_drinks
+from drinks.models import Drink, DrinkStats
+from drinks.uploads import queue_images
+from fizzgrid import storage_writer
+from fizzgrid.text import name_key
+from PIL import Image
+from search.index import record_drinks
+
+# longer names would fail the whole batch's insert
+PRODUCT_NAME_LENGTH = Drink._meta.get_field("product_name").max_length
+BRAND_NAME_LENGTH = Drink._meta.get_field("brand_name").max_length
+
+
+class InvalidRow:
+    """
+    Row that could not be read, counted as invalid instead of aborting the import
+    """
+
+    def __init__(self, reason):
+        self.reason = reason
+
+
+class Command(BaseCommand):
+    help = (
+        "Import drinks from a CSV or NDJSON file with product_name, brand_name and "
+        "optional images (paths separated by | in CSV, a list in NDJSON)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"])
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--image-root", help="directory image paths are relative to"
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="file recording progress, defaults to <path>.checkpoint",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="ignore an existing checkpoint and import from the first row",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or self.detect_format(path)
+        batch_size = options["batch_size"]
+        self.verbosity = options["verbosity"]
+
+        self.image_root = options["image_root"] or os.path.dirname(
+            os.path.abspath(path)
+        )
+        self.checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+
+        # rows already imported by an earlier run
+        done = 0 if options["restart"] else self.read_checkpoint()
+
+        if done:
+            self.stdout.write(f"Resuming after row {done}")
+
+        # dedupe against the catalog and within the file
+        self.keys = set(
+            Drink.objects.values_list("product_name", "brand_name").iterator()
+        )
+        self.counts = {"drinks": 0, "duplicates": 0, "invalid": 0, "images": 0}
+
+        start = time.perf_counter()
+
+        with open(path, newline="", encoding="utf-8") as file:
+            rows = self.read_rows(file, file_format)
+            batch = []
+
+            for row_number, row in enumerate(itertools.islice(rows, done, None), done):
+                batch.append((row_number, row))
+
+                if len(batch) >= batch_size:
+                    done = self.import_batch(batch)
+                    batch = []
+
+                    self.report(done, start)
+
+            if batch:
+                done = self.import_batch(batch)
+
+        # finish storage writes before the process exits
+        storage_writer.wait()
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Imported {self.counts['drinks']} drinks and {self.counts['images']} "
+            f"images in {elapsed:.2f}s ({self.counts['drinks'] / elapsed:.0f} rows/s), "
+            f"skipped {self.counts['duplicates']} duplicates and "
+            f"{self.counts['invalid']} invalid rows"
+        )
+
+    def detect_format(self, path):
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension == ".csv":
+            return "csv"
+        elif extension in (".ndjson", ".jsonl"):
+            return "ndjson"
+
+        raise CommandError("Unknown file format, pass --format csv or --format ndjson")
+
+    def read_rows(self, file, file_format):
+        """
+        Stream rows as dicts, images as a list of paths, NDJSON lines that aren't a
+        valid row as InvalidRow
+        """
+        if file_format == "csv":
+            for row in csv.DictReader(file):
+                images = row.get("images") or ""
+                row["images"] = [image for image in images.split("|") if image]
+
+                yield row
+        else:
+            for line in file:
+                # blank lines still count so checkpoints match line numbers
+                if not line.strip():
+                    yield None
+                    continue
+
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield InvalidRow(f"invalid JSON: {e}")
+                    continue
+
+                if not isinstance(row, dict):
+                    yield InvalidRow("not a JSON object")
+                    continue
+
+                images = row.get("images") or []
+
+                if isinstance(images, str):
+                    images = [images]
+
+                if not isinstance(images, list) or not all(
+                    isinstance(image, str) for image in images
+                ):
+                    yield InvalidRow("images must be a path or a list of paths")
+                    continue
+
+                if not all(
+                    isinstance(row.get(key) or "", str)
+                    for key in ("product_name", "brand_name")
+                ):
+                    yield InvalidRow("product_name and brand_name must be strings")
+                    continue
+
+                row["images"] = images
+
+                yield row
+
+    def import_batch(self, batch):
+        """
+        Write one batch in its own transaction and checkpoint once it commits
+        Returns the number of rows done
+        """
+        drinks = []
+        images = []
+
+        for row_number, row in batch:
+            if row is None:
+                continue
+
+            if isinstance(row, InvalidRow):
+                self.counts["invalid"] += 1
+                self.stderr.write(f"Row {row_number + 1}: {row.reason}")
+                continue
+
+            product_name = (row.get("product_name") or "").strip()
+            brand_name = (row.get("brand_name") or "").strip()
+
+            if not product_name or not brand_name:
+                self.counts["invalid"] += 1
+                self.stderr.write(f"Row {row_number + 1}: missing product or brand")
+                continue
+
+            too_long = [
+                f"{field} longer than {max_length} characters"
+                for field, value, max_length in [
+                    ("product_name", product_name, PRODUCT_NAME_LENGTH),
+                    ("brand_name", brand_name, BRAND_NAME_LENGTH),
+                ]
+                if len(value) > max_length
+            ]
+
+            if too_long:
+                self.counts["invalid"] += 1
+                self.stderr.write(f"Row {row_number + 1}: {', '.join(too_long)}")
+                continue
+
+            key = (product_name, brand_name)
+
+            if key in self.keys:
+                self.counts["duplicates"] += 1
+                continue
+
+            self.keys.add(key)
+
+            # bulk_create skips Drink.save, which sets brand_key
+            drink = Drink(
+                product_name=product_name,
+                brand_name=brand_name,
+                brand_key=name_key(brand_name),
+            )
+            drinks.append(drink)
+
+            for image_path in row["images"]:
+                path = self.check_image(row_number, image_path)
+
+                if path:
+                    images.append((drink, path, f"{product_name} - {brand_name}"))
+
+        with transaction.atomic():
+            Drink.objects.bulk_create(drinks)
+            DrinkStats.objects.bulk_create(
+                [DrinkStats(drink=drink) for drink in drinks]
+            )
+
+            # bulk_create skips signals, count brands and log the names for search
+            # suggestions here
+            count_drinks(drinks)
+            record_drinks(drinks)
+
+            # spooled now, written to storage after commit
+            queue_images(self.open_images(images))
+
+        self.counts["drinks"] += len(drinks)
+        self.counts["images"] += len(images)
+
+        done = batch[-1][0] + 1
+        self.write_checkpoint(done)
+
+        return done
+
+    def check_image(self, row_number, image_path):
+        """
+        Path of image_path if it is a readable image, otherwise report it and return None
+        """
+        path = os.path.join(self.image_root, image_path)
+
+        try:
+            # reads the header only
+            with Image.open(path):
+                pass
+        except Exception as e:
+            self.stderr.write(f"Row {row_number + 1}: skipped image {image_path}: {e}")
+            return None
+
+        return path
+
+    def open_images(self, images):
+        """
+        Open image files one at a time as they are spooled
+        """
+        for drink, path, label in images:
+            with File(open(path, "rb"), name=os.path.basename(path)) as file:
+                yield drink, file, label
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as file:
+                return json.load(file)["rows"]
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, rows):
+        # replace atomically so an interrupted write never leaves a broken checkpoint
+        temporary_path = f"{self.checkpoint_path}.tmp"
+
+        with open(temporary_path, "w") as file:
+            json.dump({"rows": rows}, file)
+
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def report(self, done, start):
+        if self.verbosity < 2:
+            return
+
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{done} rows, {self.counts['drinks']} drinks imported, "
+            f"{self.counts['drinks'] / elapsed:.0f} rows/s"
+        )
@@ -0,0 +1,18 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from drinks.brands import rebuild_brands
+
+
+class Command(BaseCommand):
+    help = "Rebuild brand drink counts (backfill and repair)"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        with transaction.atomic():
+            written = rebuild_brands()
+
+        self.stdout.write(
+            f"Rebuilt counts for {written} brands in {time.perf_counter() - start:.2f}s"
+        )
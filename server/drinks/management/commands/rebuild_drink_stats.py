@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from drinks.stats import rebuild_drink_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild drink rating stats and trending scores (backfill and repair)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--drink",
+            type=int,
+            action="append",
+            dest="drink_ids",
+            help="only rebuild this drink, may be repeated",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        with transaction.atomic():
+            written = rebuild_drink_stats(
+                options["drink_ids"], batch_size=options["batch_size"]
+            )
+
+        self.stdout.write(
+            f"Rebuilt stats for {written} drinks in {time.perf_counter() - start:.2f}s"
+        )
@@ -0,0 +1,46 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from drinks.uploads import sweep_pending_images
+from fizzgrid import storage_writer
+
+
+class Command(BaseCommand):
+    help = (
+        "Retry drink images left pending by a dead storage worker, mark those that "
+        "can't be written failed and remove spooled files of rolled back uploads, run "
+        "periodically (e.g. every 10 minutes) or as a worker with --interval"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=None,
+            help="seconds an image may stay pending, defaults to IMAGE_PENDING_TIMEOUT",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="keep running, sweeping every interval seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued, failed, removed = sweep_pending_images(options["timeout"])
+
+            # finish the retried writes before reporting them
+            storage_writer.wait()
+
+            if requeued or failed or removed or options["interval"] is None:
+                self.stdout.write(
+                    f"Retried {requeued} images, marked {failed} failed, removed "
+                    f"{removed} spooled files"
+                )
+
+            if options["interval"] is None:
+                return
+
+            close_old_connections()
+            time.sleep(options["interval"])
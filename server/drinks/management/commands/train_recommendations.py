@@ -0,0 +1,80 @@
+import resource
+import time
+from django.core.management.base import BaseCommand
+from drinks import als
+from drinks.models import ProfileRecommendations
+from profiles.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Train drink recommendations from review ratings and favorites, run "
+        "periodically (e.g. nightly), --fold-in adds new profiles between trainings"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fold-in",
+            action="store_true",
+            help="only recommend for profiles without recommendations, using the "
+            "latest trained model",
+        )
+        parser.add_argument(
+            "--profile",
+            type=int,
+            action="append",
+            dest="profile_ids",
+            help="fold in this profile, may be repeated",
+        )
+        parser.add_argument("--factors", type=int, default=als.FACTORS)
+        parser.add_argument("--iterations", type=int, default=als.ITERATIONS)
+        parser.add_argument("--regularization", type=float, default=als.REGULARIZATION)
+        parser.add_argument(
+            "--top-n", type=int, default=als.TOP_N, help="drinks stored per profile"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None, help="threads, defaults to cpu count"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1024,
+            help="profiles or drinks per solve, memory grows with chunk size x drinks",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        if options["fold_in"] or options["profile_ids"]:
+            profile_ids = options["profile_ids"]
+
+            if not profile_ids:
+                profile_ids = list(
+                    Profile.objects.exclude(
+                        pk__in=ProfileRecommendations.objects.values("pk")
+                    ).values_list("pk", flat=True)
+                )
+
+            written = als.fold_in(
+                profile_ids,
+                regularization=options["regularization"],
+                n=options["top_n"],
+                chunk_size=options["chunk_size"],
+            )
+        else:
+            written = als.train(
+                factors=options["factors"],
+                regularization=options["regularization"],
+                iterations=options["iterations"],
+                n=options["top_n"],
+                workers=options["workers"],
+                chunk_size=options["chunk_size"],
+            )
+
+        # kilobytes on linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        self.stdout.write(
+            f"Stored recommendations for {written} profiles in "
+            f"{time.perf_counter() - start:.2f}s, peak memory {peak:.0f} MB"
+        )
@@ -0,0 +1,43 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+TRIGRAM_INDEXES = [
+    ("drink_product_name_trgm_idx", "product_name"),
+    ("drink_brand_name_trgm_idx", "brand_name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # gin_trgm_ops only exists on postgres, other databases use the python fallback search
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON drinks_drink USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    # concurrent index builds can not run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('drinks', '0003_alter_drinkfavorite_profile'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
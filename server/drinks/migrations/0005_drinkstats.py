@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-18 15:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drinks', '0004_drink_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DrinkStats',
+            fields=[
+                ('drink', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='drinks.drink')),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_avg', models.FloatField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('last_reviewed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
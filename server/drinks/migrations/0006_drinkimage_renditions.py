@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0005_drinkstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="drinkimage",
+            name="renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0006_drinkimage_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="drinkimage",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="ready",
+                max_length=10,
+            ),
+        ),
+    ]
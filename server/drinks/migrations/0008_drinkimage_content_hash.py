@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0007_drinkimage_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="drinkimage",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1 on 2026-10-18 15:36
+
+from django.db import migrations, models
+from fizzgrid.db import delete_duplicates
+
+
+def delete_duplicate_drink_favorites(apps, schema_editor):
+    DrinkFavorite = apps.get_model("drinks", "DrinkFavorite")
+    delete_duplicates(DrinkFavorite, ["profile", "drink"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0008_drinkimage_content_hash"),
+        ("profiles", "0004_unique_constraints"),
+    ]
+
+    operations = [
+        # keep the oldest of any duplicate rows so the constraints can be added
+        migrations.RunPython(
+            delete_duplicate_drink_favorites, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="drinkfavorite",
+            constraint=models.UniqueConstraint(
+                fields=("profile", "drink"), name="unique_drink_favorite"
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1 on 2026-10-18 15:38
+
+import time
+from django.db import migrations, models
+
+
+def create_epoch(apps, schema_editor):
+    TrendingEpoch = apps.get_model("drinks", "TrendingEpoch")
+    TrendingEpoch.objects.create(pk=1, epoch=time.time())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0009_unique_constraints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrendingEpoch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("epoch", models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="drinkstats",
+            name="trending_score",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="drinkstats",
+            index=models.Index(
+                fields=["-trending_score", "drink"], name="drinkstats_trending_idx"
+            ),
+        ),
+        # scores start at zero, backfill with manage.py rebuild_drink_stats
+        migrations.RunPython(create_epoch, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1 on 2026-10-18 15:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0011_drinksimilarity"),
+        ("profiles", "0004_unique_constraints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProfileRecommendations",
+            fields=[
+                (
+                    "profile",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="recommendations",
+                        serialize=False,
+                        to="profiles.profile",
+                    ),
+                ),
+                ("drink_ids", models.BinaryField()),
+                ("ratings", models.BinaryField()),
+                ("date_updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RecommenderModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date_created", models.DateTimeField(auto_now_add=True)),
+                ("mean_rating", models.FloatField()),
+                ("drink_ids", models.BinaryField()),
+                ("item_factors", models.BinaryField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.1 on 2026-10-18 15:52
+
+from collections import Counter
+from django.db import migrations, models
+from fizzgrid.text import normalize
+
+
+def fill_brands(apps, schema_editor):
+    Drink = apps.get_model("drinks", "Drink")
+    Brand = apps.get_model("drinks", "Brand")
+
+    counts = Counter()
+    names = {}
+    batch = []
+
+    for drink in Drink.objects.only("brand_name").order_by("id").iterator(2000):
+        drink.brand_key = normalize(drink.brand_name)
+        counts[drink.brand_key] += 1
+        names.setdefault(drink.brand_key, drink.brand_name)
+        batch.append(drink)
+
+        if len(batch) == 2000:
+            Drink.objects.bulk_update(batch, ["brand_key"])
+            batch = []
+
+    Drink.objects.bulk_update(batch, ["brand_key"])
+    Brand.objects.bulk_create(
+        [
+            Brand(key=key, name=names[key], drink_count=count)
+            for key, count in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0012_recommendations"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Brand",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=300, primary_key=True, serialize=False),
+                ),
+                ("name", models.CharField(max_length=300)),
+                ("drink_count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="drink",
+            name="brand_key",
+            field=models.CharField(default="", editable=False, max_length=300),
+        ),
+        migrations.AddIndex(
+            model_name="drink",
+            index=models.Index(fields=["brand_key", "id"], name="drink_brand_key_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="brand",
+            index=models.Index(fields=["-drink_count", "key"], name="brand_count_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="brand",
+            index=models.Index(
+                fields=["key"],
+                name="brand_key_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+        migrations.RunPython(fill_brands, migrations.RunPython.noop),
+    ]
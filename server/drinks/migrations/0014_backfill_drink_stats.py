@@ -0,0 +1,91 @@
+# Generated by Django 5.1 on 2026-10-18 18:05
+
+import time
+from django.db import migrations
+from django.db.models import Count, Max, Q, Sum
+
+# same as drinks.trending at the time of this migration
+WEIGHTS = {"review": 3.0, "favorite": 2.0, "like": 1.0}
+HALF_LIFE = 3 * 24 * 60 * 60
+
+
+def backfill_drink_stats(apps, schema_editor):
+    Drink = apps.get_model("drinks", "Drink")
+    DrinkFavorite = apps.get_model("drinks", "DrinkFavorite")
+    DrinkStats = apps.get_model("drinks", "DrinkStats")
+    TrendingEpoch = apps.get_model("drinks", "TrendingEpoch")
+    Review = apps.get_model("reviews", "Review")
+    ReviewLike = apps.get_model("reviews", "ReviewLike")
+
+    # like drinks.stats.rebuild_drink_stats, drinks created before DrinkStats existed
+    # have no stats row and trending scores started at zero
+    epoch, _ = TrendingEpoch.objects.get_or_create(
+        pk=1, defaults={"epoch": time.time()}
+    )
+    scores = {}
+
+    for kind, rows in [
+        ("review", Review.objects.values_list("drink_id", "date_created")),
+        ("favorite", DrinkFavorite.objects.values_list("drink_id", "date_created")),
+        ("like", ReviewLike.objects.values_list("review__drink_id", "date_created")),
+    ]:
+        for drink_id, when in rows.order_by().iterator(chunk_size=2000):
+            scores[drink_id] = scores.get(drink_id, 0) + WEIGHTS[kind] * 2 ** (
+                (when.timestamp() - epoch.epoch) / HALF_LIFE
+            )
+
+    missing = set(Drink.objects.filter(stats__isnull=True).values_list("pk", flat=True))
+    ratings = {
+        row.pop("drink_id"): row
+        for row in Review.objects.filter(drink__stats__isnull=True)
+        .values("drink_id")
+        .annotate(
+            review_count=Count("id"),
+            rating_sum=Sum("rating"),
+            last_reviewed_at=Max("date_created"),
+            **{f"rating_{i}": Count("id", filter=Q(rating=i)) for i in range(1, 6)},
+        )
+        .order_by()
+    }
+
+    batch = []
+
+    for stats in DrinkStats.objects.only("pk").iterator(chunk_size=1000):
+        if stats.pk in scores:
+            stats.trending_score = scores[stats.pk]
+            batch.append(stats)
+
+        if len(batch) == 1000:
+            DrinkStats.objects.bulk_update(batch, ["trending_score"])
+            batch = []
+
+    DrinkStats.objects.bulk_update(batch, ["trending_score"])
+
+    DrinkStats.objects.bulk_create(
+        [
+            DrinkStats(
+                drink_id=drink_id,
+                rating_avg=(
+                    ratings[drink_id]["rating_sum"] / ratings[drink_id]["review_count"]
+                    if drink_id in ratings
+                    else 0
+                ),
+                trending_score=scores.get(drink_id, 0),
+                **ratings.get(drink_id, {}),
+            )
+            for drink_id in missing
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0013_brands"),
+        ("reviews", "0007_reviewlike_date_created"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_drink_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1 on 2026-10-18 18:40
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def rekey_punctuation_brands(apps, schema_editor):
+    Drink = apps.get_model("drinks", "Drink")
+    Brand = apps.get_model("drinks", "Brand")
+
+    # brands without letters or digits (e.g. "!!!") were keyed "", see
+    # fizzgrid.text.name_key
+    drinks = list(Drink.objects.filter(brand_key="").only("brand_name"))
+
+    if not drinks:
+        return
+
+    for drink in drinks:
+        drink.brand_key = drink.brand_name.strip().casefold()
+
+    Drink.objects.bulk_update(drinks, ["brand_key"], batch_size=1000)
+
+    # like drinks.brands.rebuild_brands, for the new keys
+    keys = {drink.brand_key for drink in drinks}
+    rows = (
+        Drink.objects.filter(brand_key__in=keys)
+        .values("brand_key")
+        .annotate(count=Count("id"), first=Min("id"))
+        .order_by()
+    )
+    names = Drink.objects.in_bulk([row["first"] for row in rows])
+
+    Brand.objects.filter(key="").delete()
+    Brand.objects.bulk_create(
+        [
+            Brand(
+                key=row["brand_key"],
+                name=names[row["first"]].brand_name,
+                drink_count=row["count"],
+            )
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=["key"],
+        update_fields=["drink_count"],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0014_backfill_drink_stats"),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_punctuation_brands, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 import os
 import uuid
 from django.db import models
+from fizzgrid.text import name_key
 from profiles.models import Profile
 
 def create_drink_img_filename(instance, filename):
@@ -12,20 +13,150 @@ class Drink(models.Model):
     product_name = models.CharField(max_length=300)
     brand_name = models.CharField(max_length=300)
 
+    # normalized brand_name (fizzgrid.text.name_key), see Brand
+    brand_key = models.CharField(max_length=300, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['brand_key', 'id'], name='drink_brand_key_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.brand_key = name_key(self.brand_name)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.pk}: {self.product_name} - {self.brand_name}'
 
+# drink count per normalized brand name, maintained by drinks.brands
+class Brand(models.Model):
+    key = models.CharField(max_length=300, primary_key=True)
+
+    # brand_name of the first drink with this key
+    name = models.CharField(max_length=300)
+    drink_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-drink_count', 'key'], name='brand_count_idx'),
+            # LIKE 'prefix%' on postgres needs pattern ops outside the C collation
+            models.Index(
+                fields=['key'], name='brand_key_prefix_idx', opclasses=['varchar_pattern_ops']
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name}: {self.drink_count} drinks'
+
 # favorites
 class DrinkFavorite(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
     drink = models.ForeignKey(Drink, on_delete=models.CASCADE)
     date_created = models.DateTimeField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'drink'], name='unique_drink_favorite'),
+        ]
+
 # images
 class DrinkImage(models.Model):
+    class Status(models.TextChoices):
+        # spooled locally, not yet written to storage
+        PENDING = "pending"
+        READY = "ready"
+        FAILED = "failed"
+
     label = models.CharField(max_length=300, blank=True)
     image = models.ImageField(upload_to=create_drink_img_filename)
     drink = models.ForeignKey(Drink, on_delete=models.CASCADE, default=None)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.READY
+    )
+
+    # resized copies, see fizzgrid.images.create_renditions
+    renditions = models.JSONField(default=dict, blank=True)
+
+    # sha256 of the uploaded bytes, computed while the upload streamed in
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.pk}: {self.label} (for drink {self.drink.pk})'
+
+# rating statistics, maintained alongside review writes
+class DrinkStats(models.Model):
+    drink = models.OneToOneField(
+        Drink, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+
+    # star histogram
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    # decayed activity relative to TrendingEpoch, see drinks.trending
+    trending_score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-trending_score', 'drink'], name='drinkstats_trending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.pk}: {self.review_count} reviews, {self.rating_avg:.2f} average'
+
+# precomputed neighbors, see drinks.similarity
+class DrinkSimilarity(models.Model):
+    drink = models.ForeignKey(Drink, on_delete=models.CASCADE, related_name='similar')
+    similar = models.ForeignKey(Drink, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['drink', '-score'], name='drinksimilarity_drink_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.drink_id} -> {self.similar_id}: {self.score:.3f}'
+
+# latest trained recommendation model, see drinks.als
+class RecommenderModel(models.Model):
+    date_created = models.DateTimeField(auto_now_add=True)
+    mean_rating = models.FloatField()
+
+    # packed little endian int32 drink ids and float32 (drinks x factors) item factors
+    drink_ids = models.BinaryField()
+    item_factors = models.BinaryField()
+
+    def __str__(self):
+        return f'{self.pk}: trained {self.date_created}'
+
+# precomputed top drinks per profile, see drinks.recommendations
+class ProfileRecommendations(models.Model):
+    profile = models.OneToOneField(
+        Profile, on_delete=models.CASCADE, primary_key=True, related_name='recommendations'
+    )
+
+    # packed little endian int32 drink ids and float16 predicted ratings, best first
+    drink_ids = models.BinaryField()
+    ratings = models.BinaryField()
+
+    date_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.pk}: {len(self.drink_ids) // 4} drinks'
+
+# time trending scores are relative to, moved forward by compact_trending
+class TrendingEpoch(models.Model):
+    # unix seconds
+    epoch = models.FloatField()
 
     def __str__(self):
-        return f'{self.pk}: {self.label} (for drink {self.drink.pk})'
\ No newline at end of file
+        return f'{self.pk}: {self.epoch}'
@@ -0,0 +1,50 @@
+import numpy as np
+from .models import ProfileRecommendations
+
+# stored array formats, little endian so stores move between machines
+DRINK_ID_DTYPE = np.dtype("<i4")
+RATING_DTYPE = np.dtype("<f2")
+
+
+def pack(drink_ids, ratings):
+    """
+    Binary drink_ids and ratings fields for ProfileRecommendations
+    """
+    return (
+        np.asarray(drink_ids, dtype=DRINK_ID_DTYPE).tobytes(),
+        np.asarray(ratings, dtype=RATING_DTYPE).tobytes(),
+    )
+
+
+def unpack(recommendations):
+    """
+    (drink_ids, ratings) arrays of ProfileRecommendations, best first
+    """
+    return (
+        np.frombuffer(recommendations.drink_ids, dtype=DRINK_ID_DTYPE),
+        np.frombuffer(recommendations.ratings, dtype=RATING_DTYPE),
+    )
+
+
+def forget_recommendation(profile_id, drink_id):
+    """
+    Drop drink_id from a profile's recommendations once they review or favorite it,
+    call in the same transaction as the write
+    """
+    try:
+        recommendations = ProfileRecommendations.objects.select_for_update().get(
+            pk=profile_id
+        )
+    except ProfileRecommendations.DoesNotExist:
+        return
+
+    drink_ids, ratings = unpack(recommendations)
+    keep = drink_ids != int(drink_id)
+
+    if keep.all():
+        return
+
+    recommendations.drink_ids, recommendations.ratings = pack(
+        drink_ids[keep], ratings[keep]
+    )
+    recommendations.save(update_fields=["drink_ids", "ratings", "date_updated"])
@@ -0,0 +1,148 @@
+import re
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.lookups import Contains
+
+# minimum similarity for a fuzzy match, same as the pg_trgm default
+SIMILARITY_THRESHOLD = 0.3
+
+
+class TrigramContains(Contains):
+    """
+    Case insensitive contains as plain "column ILIKE %s", which the gin_trgm_ops indexes
+    can serve (icontains compiles to UPPER(column) LIKE UPPER(%s) on postgres, which
+    they can't)
+    """
+
+    lookup_name = "trigram_contains"
+
+    def get_rhs_op(self, connection, rhs):
+        return f"ILIKE {rhs}"
+
+
+def search_drinks(drinks, search):
+    """
+    Filter drinks matching search by product or brand name, tolerating typos
+    Annotates each drink with rank: float, order by ["-rank", "id"] for best matches first
+    """
+    if connection.vendor == "postgresql":
+        return _search_trigram(drinks, search)
+
+    return _search_fallback(drinks, search)
+
+
+def _search_trigram(drinks, search):
+    """
+    Search using pg_trgm operators, served by the gin_trgm_ops indexes on product/brand name
+    Every arm of the OR must be indexable for postgres to combine the index scans
+    (BitmapOr), a single arm it can't serve makes the whole filter a sequential scan
+    """
+    from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+
+    drinks = drinks.filter(
+        Q(product_name__trigram_similar=search)
+        | Q(brand_name__trigram_similar=search)
+        | Q(product_name__trigram_word_similar=search)
+        | Q(brand_name__trigram_word_similar=search)
+        | Q(TrigramContains(F("product_name"), search))
+        | Q(TrigramContains(F("brand_name"), search))
+    )
+
+    # word similarity finds the search inside longer names, whole name similarity
+    # then prefers the closest name among those
+    return drinks.annotate(
+        rank=(
+            Greatest(
+                TrigramWordSimilarity(search, "product_name"),
+                TrigramWordSimilarity(search, "brand_name"),
+            )
+            + Greatest(
+                TrigramSimilarity("product_name", search),
+                TrigramSimilarity("brand_name", search),
+            )
+        )
+        / 2
+    )
+
+
+def _search_fallback(drinks, search):
+    """
+    Portable search for databases without pg_trgm (SQLite test runs)
+    Scores every drink in python, only suitable for small tables
+    """
+    search_words = trigram_words(search)
+    search_lower = search.lower()
+
+    ranks = {}
+
+    for drink_id, product_name, brand_name in drinks.values_list(
+        "id", "product_name", "brand_name"
+    ):
+        product_words = trigram_words(product_name)
+        brand_words = trigram_words(brand_name)
+
+        best_word = max(
+            word_similarity(search_words, product_words),
+            word_similarity(search_words, brand_words),
+        )
+        best_whole = max(
+            similarity(search_words, product_words),
+            similarity(search_words, brand_words),
+        )
+
+        contains = (
+            search_lower in product_name.lower() or search_lower in brand_name.lower()
+        )
+
+        if contains or max(best_word, best_whole) >= SIMILARITY_THRESHOLD:
+            ranks[drink_id] = (best_word + best_whole) / 2
+
+    return drinks.filter(pk__in=ranks.keys()).annotate(
+        rank=Case(
+            *[When(pk=drink_id, then=Value(rank)) for drink_id, rank in ranks.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+def trigram_words(text):
+    """
+    Split text into words of trigrams the way pg_trgm does
+    (lowercase alphanumeric words padded with two leading and one trailing space)
+    """
+    words = []
+
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        padded = f"  {word} "
+        words.append([padded[i : i + 3] for i in range(len(padded) - 2)])
+
+    return words
+
+
+def similarity(words_a, words_b):
+    """
+    Jaccard similarity of the trigram sets of two strings
+    """
+    trigrams_a = set(trigram for word in words_a for trigram in word)
+    trigrams_b = set(trigram for word in words_b for trigram in word)
+
+    if not trigrams_a or not trigrams_b:
+        return 0.0
+
+    return len(trigrams_a & trigrams_b) / len(trigrams_a | trigrams_b)
+
+
+def word_similarity(words_a, words_b):
+    """
+    Greatest similarity between the first string and any run of whole words in the second,
+    a word-granular approximation of pg_trgm word_similarity
+    """
+    best = 0.0
+
+    for start in range(len(words_b)):
+        for end in range(start + 1, len(words_b) + 1):
+            best = max(best, similarity(words_a, words_b[start:end]))
+
+    return best
@@ -1,11 +1,49 @@
 from rest_framework import serializers
-from .models import Drink, DrinkFavorite, DrinkImage
+from fizzgrid.images import rendition_urls
+from fizzgrid.media_urls import public_url
+from .models import Brand, Drink, DrinkFavorite, DrinkImage, DrinkStats
+
+
+class DrinkStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DrinkStats
+        fields = ["average", "count", "histogram", "last_reviewed_at"]
+
+    average = serializers.SerializerMethodField()
+    count = serializers.IntegerField(source="review_count")
+    histogram = serializers.SerializerMethodField()
+
+    def get_average(self, obj):
+        if obj.review_count:
+            return obj.rating_avg
+        else:
+            return None
+
+    def get_histogram(self, obj):
+        return [obj.rating_1, obj.rating_2, obj.rating_3, obj.rating_4, obj.rating_5]
+
+
+class BrandSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Brand
+        fields = ["key", "name", "drink_count"]
 
 
 class DrinkSerializer(serializers.ModelSerializer):
     class Meta:
         model = Drink
-        fields = "__all__"
+        fields = ["id", "product_name", "brand_name", "rating"]
+
+    rating = serializers.SerializerMethodField()
+
+    def get_rating(self, obj):
+        # drinks without a stats row have not been reviewed
+        try:
+            stats = obj.stats
+        except DrinkStats.DoesNotExist:
+            stats = DrinkStats(drink=obj)
+
+        return DrinkStatsSerializer(stats).data
 
 
 class DrinkFavoriteSerializer(serializers.ModelSerializer):
@@ -17,12 +55,37 @@ class DrinkFavoriteSerializer(serializers.ModelSerializer):
 class DrinkImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = DrinkImage
-        fields = ["id", "drink_id", "label", "image"]
+        fields = ["id", "drink_id", "label", "image", "srcset", "status"]
 
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     def get_image(self, obj):
-        if obj.image:
-            return obj.image.url.split("?")[0]
+        # pending images have a reserved key but nothing stored yet
+        if obj.image and obj.status == DrinkImage.Status.READY:
+            return public_url(obj.image.name)
         else:
             return None
+
+    def get_srcset(self, obj):
+        return rendition_urls(obj.renditions)
+
+
+# values drink_image_row reads
+DRINK_IMAGE_FIELDS = ["id", "drink_id", "label", "image", "renditions", "status"]
+
+
+def drink_image_row(values):
+    """
+    DrinkImageSerializer output from values of DRINK_IMAGE_FIELDS, for streamed lists
+    """
+    ready = values["image"] and values["status"] == DrinkImage.Status.READY
+
+    return {
+        "id": values["id"],
+        "drink_id": values["drink_id"],
+        "label": values["label"],
+        "image": public_url(values["image"]) if ready else None,
+        "srcset": rendition_urls(values["renditions"]),
+        "status": values["status"],
+    }
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from fizzgrid.deletion import bulk_delete
+from tombstones.reaper import bury, image_names
+from .brands import count_drinks
+from .models import Drink, DrinkImage
+
+
+@receiver(post_delete, sender=DrinkImage)
+def bury_drink_image_files(sender, instance, **kwargs):
+    """
+    Delete the image and rendition files once the image delete commits
+    """
+    bury(image_names(instance.image.name, instance.renditions))
+
+
+@receiver(bulk_delete, sender=DrinkImage)
+def bury_drink_images_files(sender, queryset, **kwargs):
+    """
+    Delete the fast deleted images' files once the delete commits
+    """
+    bury(
+        [
+            name
+            for image, renditions in queryset.values_list("image", "renditions")
+            for name in image_names(image, renditions)
+        ]
+    )
+
+
+@receiver(post_save, sender=Drink)
+def count_brand_drink(sender, instance, created, **kwargs):
+    """
+    Add new drinks to their brand's drink count
+    """
+    if created:
+        count_drinks([instance])
+
+
+@receiver(post_delete, sender=Drink)
+def uncount_brand_drink(sender, instance, **kwargs):
+    """
+    Remove deleted drinks from their brand's drink count
+    """
+    count_drinks([instance], -1)
+
+
+@receiver(bulk_delete, sender=Drink)
+def uncount_brand_drinks(sender, queryset, **kwargs):
+    """
+    Remove fast deleted drinks from their brands' drink counts
+    """
+    count_drinks(queryset.only("brand_name", "brand_key"), -1)
@@ -0,0 +1,154 @@
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from reviews.models import Review
+from .models import DrinkFavorite, DrinkSimilarity
+
+# interaction strength, a 5 star review and a favorite count the same
+FAVORITE_WEIGHT = 1.0
+MAX_RATING = 5
+
+
+def read_columns(rows, dtypes, chunk_size=100_000):
+    """
+    Stream values_list rows into numpy arrays, one per column
+    """
+    columns = [[] for _ in dtypes]
+    chunk = []
+
+    def flush():
+        if chunk:
+            for i, column in enumerate(zip(*chunk)):
+                columns[i].append(np.array(column, dtype=dtypes[i]))
+            chunk.clear()
+
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+
+        if len(chunk) >= chunk_size:
+            flush()
+
+    flush()
+
+    return [
+        np.concatenate(column) if column else np.empty(0, dtype=dtype)
+        for column, dtype in zip(columns, dtypes)
+    ]
+
+
+def load_interactions():
+    """
+    Profile x drink interaction matrix from review ratings and favorites
+    Returns (matrix, drink_ids) with matrix as csr float32 and drink_ids mapping columns
+    """
+    review_profiles, review_drinks, ratings = read_columns(
+        Review.objects.order_by().values_list("profile_id", "drink_id", "rating"),
+        [np.int64, np.int64, np.float32],
+    )
+    favorite_profiles, favorite_drinks = read_columns(
+        DrinkFavorite.objects.order_by().values_list("profile_id", "drink_id"),
+        [np.int64, np.int64],
+    )
+
+    profile_ids = np.concatenate([review_profiles, favorite_profiles])
+    drink_ids = np.concatenate([review_drinks, favorite_drinks])
+    values = np.concatenate(
+        [
+            ratings / MAX_RATING,
+            np.full(len(favorite_drinks), FAVORITE_WEIGHT, dtype=np.float32),
+        ]
+    )
+
+    # compact ids to row and column indexes
+    profile_ids, rows = np.unique(profile_ids, return_inverse=True)
+    drink_ids, columns = np.unique(drink_ids, return_inverse=True)
+
+    # duplicate (profile, drink) pairs are summed, review plus favorite
+    matrix = sparse.coo_matrix(
+        (values, (rows, columns)), shape=(len(profile_ids), len(drink_ids))
+    ).tocsr()
+
+    return matrix, drink_ids
+
+
+def top_k_similar(matrix, k=20, batch_size=512):
+    """
+    Item-item cosine similarity of the columns of matrix, keeping the top k per item
+    Computed in batches of items so memory stays at batch_size x items floats
+    Yields (items, neighbors, scores) arrays per batch, neighbors and scores are
+    (len(items), k) with -1 / 0 padding where fewer than k items are similar
+    """
+    items = sparse.csr_matrix(matrix.T, dtype=np.float32)
+
+    # l2 normalize so dot products are cosines
+    norms = np.sqrt(np.asarray(items.multiply(items).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    items = sparse.diags(1 / norms).astype(np.float32) @ items
+
+    items_t = items.T.tocsr()
+    count = items.shape[0]
+    k = min(k, count - 1)
+
+    if k < 1:
+        return
+
+    for start in range(0, count, batch_size):
+        stop = min(start + batch_size, count)
+        batch = np.arange(start, stop)
+
+        similarities = (items[start:stop] @ items_t).toarray()
+
+        # never similar to itself
+        similarities[np.arange(stop - start), batch] = 0
+
+        neighbors = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(similarities, neighbors, axis=1)
+
+        # sort each row's neighbors by score
+        order = np.argsort(-scores, axis=1)
+        neighbors = np.take_along_axis(neighbors, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+
+        neighbors[scores <= 0] = -1
+        scores[scores <= 0] = 0
+
+        yield batch, neighbors, scores
+
+
+def build_similarity(k=20, batch_size=512, write_batch_size=5000):
+    """
+    Recompute DrinkSimilarity from reviews and favorites, replacing the stored neighbors
+    Returns the number of rows written
+    """
+    matrix, drink_ids = load_interactions()
+
+    written = 0
+
+    with transaction.atomic():
+        DrinkSimilarity.objects.all().delete()
+
+        rows = []
+
+        for items, neighbors, scores in top_k_similar(matrix, k, batch_size):
+            for item, item_neighbors, item_scores in zip(items, neighbors, scores):
+                for neighbor, score in zip(item_neighbors, item_scores):
+                    if neighbor < 0:
+                        break
+
+                    rows.append(
+                        DrinkSimilarity(
+                            drink_id=int(drink_ids[item]),
+                            similar_id=int(drink_ids[neighbor]),
+                            score=float(score),
+                        )
+                    )
+
+            if len(rows) >= write_batch_size:
+                DrinkSimilarity.objects.bulk_create(rows)
+                written += len(rows)
+                rows = []
+
+        DrinkSimilarity.objects.bulk_create(rows)
+        written += len(rows)
+
+    return written
@@ -0,0 +1,209 @@
+from datetime import datetime, timezone as dt_timezone
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest
+from reviews.models import Review
+from .models import Drink, DrinkStats
+from .trending import WEIGHTS, decayed, decayed_sum, trending_scores
+
+STAR_FIELDS = [f"rating_{i}" for i in range(1, 6)]
+
+# sort query param for drink lists, each ordering ends with id so it is unique for cursors
+SORT_ORDERINGS = {
+    "rating": ["-rating_avg", "-review_count", "id"],
+    "reviews": ["-review_count", "id"],
+    "recent": ["-last_reviewed_at", "id"],
+    "trending": ["-trending_score", "id"],
+}
+
+# sorts place drinks that were never reviewed last
+NEVER_REVIEWED = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def annotate_stats(drinks):
+    """
+    Annotate drinks with the stats used by SORT_ORDERINGS, drinks without stats count as zero
+    """
+    return drinks.annotate(
+        rating_avg=Coalesce("stats__rating_avg", Value(0.0)),
+        review_count=Coalesce("stats__review_count", Value(0)),
+        last_reviewed_at=Coalesce("stats__last_reviewed_at", Value(NEVER_REVIEWED)),
+    )
+
+
+def _updated_average(rating, change):
+    """
+    Average after adding (change=1) or removing (change=-1) a rating, from pre-update values
+    """
+    return Case(
+        When(
+            review_count__gt=-change,
+            then=Cast(F("rating_sum") + change * rating, FloatField())
+            / (F("review_count") + change),
+        ),
+        default=Value(0.0),
+    )
+
+
+def record_review(review):
+    """
+    Add review to its drink's stats, call in the same transaction as saving the review
+    """
+    rating = review.rating
+
+    updated = DrinkStats.objects.filter(drink_id=review.drink_id).update(
+        review_count=F("review_count") + 1,
+        rating_sum=F("rating_sum") + rating,
+        rating_avg=_updated_average(rating, 1),
+        last_reviewed_at=Greatest(
+            Coalesce("last_reviewed_at", Value(review.date_created)),
+            Value(review.date_created),
+        ),
+        trending_score=F("trending_score")
+        + decayed(WEIGHTS["review"], review.date_created),
+        **{f"rating_{rating}": F(f"rating_{rating}") + 1},
+    )
+
+    # no stats row yet, build it from the reviews table (includes this review)
+    if not updated:
+        rebuild_drink_stats([review.drink_id])
+
+
+def remove_review(review, liked_at=()):
+    """
+    Remove review from its drink's stats, call in the same transaction after deleting it
+    liked_at are the creation dates of the review's likes, deleted along with it
+    """
+    rating = review.rating
+
+    trending_score = F("trending_score") - decayed(
+        WEIGHTS["review"], review.date_created
+    )
+
+    if liked_at:
+        trending_score = trending_score + decayed_sum("like", liked_at, sign=-1)
+
+    # compact_trending zeroes tiny scores, removing activity from one must not go below
+    trending_score = Greatest(trending_score, Value(0.0))
+
+    # latest remaining review
+    last_reviewed_at = (
+        Review.objects.filter(drink_id=OuterRef("drink_id"))
+        .order_by("-date_created")
+        .values("date_created")[:1]
+    )
+
+    updated = DrinkStats.objects.filter(drink_id=review.drink_id).update(
+        review_count=F("review_count") - 1,
+        rating_sum=F("rating_sum") - rating,
+        rating_avg=_updated_average(rating, -1),
+        last_reviewed_at=Subquery(last_reviewed_at),
+        trending_score=trending_score,
+        **{f"rating_{rating}": F(f"rating_{rating}") - 1},
+    )
+
+    if not updated:
+        rebuild_drink_stats([review.drink_id])
+
+
+def record_activity(drink_id, kind, when, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) a favorite or like at datetime when from the drink's
+    trending score, call in the same transaction as the write
+    """
+    # compact_trending zeroes tiny scores, removing activity from one must not go below
+    updated = DrinkStats.objects.filter(drink_id=drink_id).update(
+        trending_score=Greatest(
+            F("trending_score") + decayed(sign * WEIGHTS[kind], when), Value(0.0)
+        )
+    )
+
+    # no stats row yet, build it from the tables (includes this activity)
+    if not updated:
+        rebuild_drink_stats([drink_id])
+
+
+def rebuild_drink_stats(drink_ids=None, batch_size=1000):
+    """
+    Recompute stats from the reviews table with a single GROUP BY and upsert them,
+    trending scores from reviews, favorites and likes
+    Rebuilds every drink if drink_ids is None, returns the number of stats rows written
+    """
+    trending = trending_scores(drink_ids)
+
+    rows = Review.objects.values("drink_id").annotate(
+        review_count=Count("id"),
+        rating_sum=Sum("rating"),
+        last_reviewed_at=Max("date_created"),
+        **{f"rating_{i}": Count("id", filter=Q(rating=i)) for i in range(1, 6)},
+    )
+
+    drinks = Drink.objects.all()
+
+    if drink_ids is not None:
+        rows = rows.filter(drink_id__in=drink_ids)
+        drinks = drinks.filter(pk__in=drink_ids)
+
+    written = 0
+    reviewed = set()
+    batch = []
+
+    for row in rows.order_by().iterator(chunk_size=batch_size):
+        reviewed.add(row["drink_id"])
+        batch.append(
+            DrinkStats(
+                rating_avg=row["rating_sum"] / row["review_count"],
+                trending_score=trending.get(row["drink_id"], 0),
+                **row,
+            )
+        )
+
+        if len(batch) >= batch_size:
+            written += _upsert(batch)
+            batch = []
+
+    # drinks without reviews get empty stats
+    for drink_id in drinks.values_list("pk", flat=True).iterator(chunk_size=batch_size):
+        if drink_id in reviewed:
+            continue
+
+        batch.append(
+            DrinkStats(drink_id=drink_id, trending_score=trending.get(drink_id, 0))
+        )
+
+        if len(batch) >= batch_size:
+            written += _upsert(batch)
+            batch = []
+
+    written += _upsert(batch)
+
+    return written
+
+
+def _upsert(stats):
+    DrinkStats.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=["drink"],
+        update_fields=[
+            "review_count",
+            "rating_sum",
+            "rating_avg",
+            "last_reviewed_at",
+            "trending_score",
+            *STAR_FIELDS,
+        ],
+    )
+
+    return len(stats)
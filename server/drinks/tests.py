@@ -1,8 +1,37 @@
+import hashlib
 import json
+import os
+from io import BytesIO, StringIO
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgresDatabaseWrapper,
+)
+from django.test import override_settings
+from fizzgrid.testing import TemporaryStorageMixin, create_test_image
+from PIL import Image
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
 from profiles.models import Profile
-from .models import Drink, DrinkFavorite
+from reviews.models import Comment, CommentLike, Review, ReviewImage, ReviewLike
+from django.db.models import F
+from fizzgrid.deletion import fast_delete
+from search.models import SuggestChange
+from .models import (
+    Brand,
+    Drink,
+    DrinkFavorite,
+    DrinkImage,
+    DrinkSimilarity,
+    DrinkStats,
+    TrendingEpoch,
+)
+from .search import _search_trigram
+from .uploads import queue_drink_images, spool_path, sweep_pending_images
+from .trending import trending_scores
+from versions.tracking import PendingVersions
 from django.utils import timezone
 
 
@@ -67,7 +96,19 @@ class TestDrinkDetailPOST(APITestCase):
         self.assertEqual(0, len(Drink.objects.all()))
 
     def test_reject_non_image_files(self):
-        pass
+        # login
+        self.client.login(username=self.normal_username, password=self.normal_pass)
+
+        # request with a text file named like an image
+        body = {
+            **self.data_good,
+            "image": SimpleUploadedFile("image.jpg", b"not an image" * 100),
+        }
+
+        response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(0, len(Drink.objects.all()))
 
     def test_reject_duplicate(self):
         # create object
@@ -106,8 +147,10 @@ class TestDrinkDetailPOST(APITestCase):
 
         self.assertEqual(200, response.status_code)
         self.assertSetEqual(
-            set(["id", "product_name", "brand_name"]), set(response_json.keys())
+            set(["id", "product_name", "brand_name", "rating", "images"]),
+            set(response_json.keys()),
         )
+        self.assertListEqual([], response_json["images"])
         self.assertDictContainsSubset(self.data_good, response_json)
         self.assertEqual(
             1,
@@ -120,6 +163,291 @@ class TestDrinkDetailPOST(APITestCase):
         )
 
 
+class TestDrinkDetailImagesPOST(TemporaryStorageMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        # client
+        self.client = APIClient()
+
+        self.url = "/drinks/drink/"
+
+        # user
+        self.username = "normal_user"
+        self.password = "pass_for_normal_user"
+        user = User(username=self.username)
+        user.set_password(self.password)
+
+        user.save()
+
+    def test_create_renditions(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        # request, exif orientation 6 means the photo is rotated 90 degrees
+        body = {
+            "product_name": "Product",
+            "brand_name": "Brand",
+            "image": create_test_image(size=(1200, 900), orientation=6),
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(200, response.status_code)
+
+        drink_image = DrinkImage.objects.get()
+
+        self.assertSetEqual({"thumb", "medium"}, set(drink_image.renditions.keys()))
+
+        for rendition, width in [("thumb", 160), ("medium", 640)]:
+            files = drink_image.renditions[rendition]
+
+            self.assertEqual(width, files["width"])
+            self.assertEqual(round(width * 1200 / 900), files["height"])
+
+            for extension, image_format in [("webp", "WEBP"), ("jpeg", "JPEG")]:
+                with default_storage.open(files[extension]) as file:
+                    image = Image.open(file)
+
+                    self.assertEqual(image_format, image.format)
+                    self.assertEqual((width, files["height"]), image.size)
+                    self.assertEqual(0, len(image.getexif()))
+
+        # renditions in image list
+        response = self.client.get(f"/drinks/images/?drink={drink_image.drink_id}")
+        srcset = json.loads(response.content)["images"][0]["srcset"]
+
+        self.assertTrue(
+            srcset["thumb"]["webp"].startswith("https://media.example.com/")
+        )
+        self.assertEqual(160, srcset["thumb"]["width"])
+
+    def test_images_pending_until_stored(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        # request with several images
+        body = {
+            "product_name": "Product",
+            "brand_name": "Brand",
+            **{f"image{i}": create_test_image(name=f"{i}.jpg") for i in range(3)},
+        }
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, body, format="multipart")
+
+        response_json = json.loads(response.content)
+
+        # drink returned before any storage write
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, len(response_json["images"]))
+
+        for image in response_json["images"]:
+            self.assertEqual("pending", image["status"])
+            self.assertIsNone(image["image"])
+
+        # one storage write per image, besides the table version bumps
+        storage_writes = [
+            callback
+            for callback in callbacks
+            if not isinstance(getattr(callback, "__self__", None), PendingVersions)
+        ]
+
+        self.assertEqual(3, len(storage_writes))
+        self.assertFalse(any(default_storage.listdir("")[1]))
+
+        # run storage writes
+        for callback in callbacks:
+            callback()
+
+        for drink_image in DrinkImage.objects.all():
+            self.assertEqual(DrinkImage.Status.READY, drink_image.status)
+            self.assertTrue(default_storage.exists(drink_image.image.name))
+            self.assertTrue(drink_image.renditions)
+
+        # spooled files removed
+        self.assertListEqual([], os.listdir(f"{self.storage_dir}/spool"))
+
+    def test_content_hash(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        image = create_test_image()
+        content_hash = hashlib.sha256(image.read()).hexdigest()
+        image.seek(0)
+
+        body = {"product_name": "Product", "brand_name": "Brand", "image": image}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(content_hash, DrinkImage.objects.get().content_hash)
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=10 * 1024)
+    def test_reject_too_large(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        # request, noisy png so it does not compress below the limit
+        buffer = BytesIO()
+        Image.frombytes("RGB", (200, 200), os.urandom(200 * 200 * 3)).save(
+            buffer, "PNG"
+        )
+
+        body = {
+            "product_name": "Product",
+            "brand_name": "Brand",
+            "image": SimpleUploadedFile("image.png", buffer.getvalue()),
+        }
+
+        response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(413, response.status_code)
+        self.assertEqual(0, len(Drink.objects.all()))
+        self.assertEqual(0, len(DrinkImage.objects.all()))
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1000 * 1000)
+    def test_reject_too_many_pixels(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        # small file that decodes to a large image
+        body = {
+            "product_name": "Product",
+            "brand_name": "Brand",
+            "image": create_test_image(size=(2000, 2000), image_format="PNG"),
+        }
+
+        response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(0, len(Drink.objects.all()))
+
+    def test_no_upscale(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        # request
+        body = {
+            "product_name": "Product",
+            "brand_name": "Brand",
+            "image": create_test_image(size=(300, 200), image_format="PNG"),
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(200, response.status_code)
+
+        renditions = DrinkImage.objects.get().renditions
+
+        self.assertEqual(160, renditions["thumb"]["width"])
+        self.assertEqual(300, renditions["medium"]["width"])
+
+    def test_delete_renditions(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        body = {
+            "product_name": "Product",
+            "brand_name": "Brand",
+            "image": create_test_image(),
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, body, format="multipart")
+
+        drink_image = DrinkImage.objects.get()
+
+        # delete drink
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/drinks/drink/{drink_image.drink_id}/")
+
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(
+            default_storage.exists(drink_image.renditions["thumb"]["webp"])
+        )
+
+    def test_public_urls(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        body = {
+            "product_name": "Product",
+            "brand_name": "Brand",
+            "image": create_test_image(name="my image.jpg"),
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, body, format="multipart")
+
+        drink_image = DrinkImage.objects.get()
+        url = f"/drinks/images/?drink={drink_image.drink_id}"
+
+        # same url the storage builds
+        image = json.loads(self.client.get(url).content)["images"][0]
+
+        self.assertEqual(default_storage.url(drink_image.image.name), image["image"])
+
+        # cdn prefix
+        with override_settings(MEDIA_PUBLIC_BASE_URL="https://cdn.example.com/media"):
+            image = json.loads(self.client.get(url).content)["images"][0]
+
+        self.assertEqual(
+            f"https://cdn.example.com/media/{drink_image.image.name}", image["image"]
+        )
+        self.assertTrue(
+            image["srcset"]["medium"]["jpeg"].startswith("https://cdn.example.com/")
+        )
+
+    def test_sweep_pending(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        body = {
+            "product_name": "Product",
+            "brand_name": "Brand",
+            **{f"image{i}": create_test_image(name=f"{i}.jpg") for i in range(2)},
+        }
+
+        # storage worker dies before writing
+        with self.captureOnCommitCallbacks():
+            self.client.post(self.url, body, format="multipart")
+
+        retried, lost = DrinkImage.objects.order_by("pk")
+        os.remove(spool_path(lost.pk))
+
+        # recent files are left to the worker
+        self.assertEqual((0, 1, 0), sweep_pending_images())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("sweep_pending_images", timeout=0, stdout=StringIO())
+
+        retried.refresh_from_db()
+        lost.refresh_from_db()
+
+        self.assertEqual(DrinkImage.Status.READY, retried.status)
+        self.assertTrue(default_storage.exists(retried.image.name))
+        self.assertEqual(DrinkImage.Status.FAILED, lost.status)
+        self.assertListEqual([], os.listdir(f"{self.storage_dir}/spool"))
+
+    def test_sweep_rolled_back(self):
+        drink = Drink.objects.create(product_name="Product", brand_name="Brand")
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                queue_drink_images(drink, [create_test_image()], "Product")
+                Drink.objects.create(pk=drink.pk)
+
+        # the spooled file outlives the rollback until swept
+        self.assertFalse(DrinkImage.objects.exists())
+        self.assertEqual(1, len(os.listdir(f"{self.storage_dir}/spool")))
+        self.assertEqual((0, 0, 1), sweep_pending_images(timeout=0))
+        self.assertListEqual([], os.listdir(f"{self.storage_dir}/spool"))
+
+
 class TestDrinkDetailDELETE(APITestCase):
     def setUp(self):
         # client
@@ -150,6 +478,12 @@ class TestDrinkDetailDELETE(APITestCase):
             "id": drink.pk,
             "brand_name": brand_name,
             "product_name": product_name,
+            "rating": {
+                "average": None,
+                "count": 0,
+                "histogram": [0, 0, 0, 0, 0],
+                "last_reviewed_at": None,
+            },
         }
 
         self.good_url = f"/drinks/drink/{drink.pk}/"
@@ -187,6 +521,86 @@ class TestDrinkDetailDELETE(APITestCase):
         self.assertDictEqual(self.data, response_json)
         self.assertEqual(0, len(Drink.objects.all()))
 
+    def create_dependents(self, drink, profile):
+        """
+        One row of every table a drink delete cascades to
+        """
+        review = Review.objects.create(
+            profile=profile,
+            drink=drink,
+            review_text="Review text",
+            rating=4,
+            date_created=timezone.now(),
+        )
+        comment = Comment.objects.create(
+            review=review,
+            profile=profile,
+            comment_text="Comment text",
+            date_created=timezone.now(),
+        )
+        drink_image = DrinkImage.objects.create(
+            drink=drink, label="label", image="drink_imgs/image.jpg"
+        )
+
+        ReviewLike.objects.create(review=review, profile=profile)
+        CommentLike.objects.create(comment=comment, profile=profile)
+        ReviewImage.objects.create(review=review, image=drink_image)
+        DrinkFavorite.objects.get_or_create(
+            drink=drink, profile=profile, defaults={"date_created": timezone.now()}
+        )
+        DrinkStats.objects.get_or_create(drink=drink)
+
+    def test_delete_cascade(self):
+        profile = Profile.objects.create(user=User.objects.get(username="normal_user"))
+        drink = Drink.objects.get()
+        other = Drink.objects.create(product_name="Other", brand_name="Test Brand")
+
+        self.create_dependents(drink, profile)
+        self.create_dependents(other, profile)
+        DrinkSimilarity.objects.create(drink=other, similar=drink, score=0.5)
+
+        # login
+        self.client.login(username=self.admin_username, password=self.admin_pass)
+
+        response = self.client.delete(self.good_url)
+
+        self.assertEqual(200, response.status_code)
+
+        # only the other drink's rows are left
+        for model in (
+            Review,
+            Comment,
+            ReviewLike,
+            CommentLike,
+            ReviewImage,
+            DrinkImage,
+            DrinkFavorite,
+            DrinkStats,
+        ):
+            self.assertEqual(1, model.objects.count(), model.__name__)
+
+        self.assertEqual(other.pk, Review.objects.get().drink_id)
+        self.assertFalse(DrinkSimilarity.objects.exists())
+        self.assertEqual(1, Brand.objects.get(key="test brand").drink_count)
+        self.assertTrue(
+            SuggestChange.objects.filter(object_id=drink.pk, removed=True).exists()
+        )
+
+    def test_fast_delete_chunks(self):
+        profile = Profile.objects.create(user=User.objects.get(username="normal_user"))
+        drink = Drink.objects.get()
+
+        for _ in range(5):
+            self.create_dependents(drink, profile)
+
+        deleted, counts = fast_delete(Drink.objects.filter(pk=drink.pk), chunk_size=2)
+
+        self.assertEqual(5, counts["reviews.Review"])
+        self.assertEqual(5, counts["drinks.DrinkImage"])
+        self.assertEqual(1, counts["drinks.Drink"])
+        self.assertEqual(sum(counts.values()), deleted)
+        self.assertFalse(Review.objects.exists())
+
 
 class TestDrinkDetailGET(APITestCase):
     def setUp(self):
@@ -202,6 +616,12 @@ class TestDrinkDetailGET(APITestCase):
             "id": drink.pk,
             "brand_name": brand_name,
             "product_name": product_name,
+            "rating": {
+                "average": None,
+                "count": 0,
+                "histogram": [0, 0, 0, 0, 0],
+                "last_reviewed_at": None,
+            },
         }
 
         self.good_url = f"/drinks/drink/{drink.pk}/"
@@ -222,6 +642,345 @@ class TestDrinkDetailGET(APITestCase):
         self.assertDictEqual(self.data, response_json)
 
 
+class TestDrinkPageGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        # drink and another drink
+        self.drink = Drink.objects.create(product_name="Product", brand_name="Brand")
+        other_drink = Drink.objects.create(product_name="Other", brand_name="Brand")
+
+        # profiles, all favorite the drink except the viewer
+        self.profiles = []
+
+        for i in range(3):
+            user = User.objects.create(username=f"user{i}")
+            self.profiles.append(Profile.objects.create(user=user))
+
+        viewer_user = User.objects.create(username="viewer")
+        self.viewer = Profile.objects.create(user=viewer_user)
+
+        date = timezone.now()
+
+        for profile in self.profiles:
+            DrinkFavorite.objects.create(
+                profile=profile, drink=self.drink, date_created=date
+            )
+
+        DrinkFavorite.objects.create(
+            profile=self.viewer, drink=other_drink, date_created=date
+        )
+
+        # images
+        for i in range(2):
+            DrinkImage.objects.create(drink=self.drink, image=f"drink_imgs/{i}.jpg")
+
+        # reviews
+        for i in range(8):
+            Review.objects.create(
+                drink=self.drink,
+                profile=self.profiles[i % 3],
+                rating=5,
+                review_text="review text",
+                date_created=date - timezone.timedelta(minutes=i),
+            )
+
+        self.url = f"/drinks/drink/{self.drink.pk}/page/"
+
+    def test_reject_drink_not_found(self):
+        # request
+        response = self.client.get(f"/drinks/drink/{self.drink.pk + 2}/page/")
+
+        self.assertEqual(404, response.status_code)
+
+    def test_get_page(self):
+        # request, table versions for the ETag, drink, images and reviews
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertSetEqual(
+            {
+                "drink",
+                "images",
+                "favorite_count",
+                "favorited",
+                "reviews",
+                "next_cursor",
+            },
+            set(response_json.keys()),
+        )
+        self.assertEqual(self.drink.pk, response_json["drink"]["id"])
+        self.assertEqual(2, len(response_json["images"]))
+        self.assertEqual(3, response_json["favorite_count"])
+        self.assertFalse(response_json["favorited"])
+
+        # first page of reviews, newest first
+        reviews = Review.objects.order_by("-date_created")
+
+        self.assertListEqual(
+            [review.pk for review in reviews[:6]],
+            [review["id"] for review in response_json["reviews"]],
+        )
+
+        # rest of the reviews from the review list
+        response = self.client.get(
+            f"/reviews/?drink={self.drink.pk}&cursor={response_json['next_cursor']}"
+        )
+
+        self.assertListEqual(
+            [review.pk for review in reviews[6:]],
+            [review["id"] for review in json.loads(response.content)["reviews"]],
+        )
+
+    def test_get_page_favorited(self):
+        # authenticate as a profile that favorited the drink
+        self.client.force_authenticate(user=self.profiles[0].user)
+
+        # table versions for the ETag, then the page
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+
+        response_json = json.loads(response.content)
+
+        self.assertEqual(3, response_json["favorite_count"])
+        self.assertTrue(response_json["favorited"])
+
+        # viewer has only favorited the other drink
+        self.client.force_authenticate(user=self.viewer.user)
+
+        response = self.client.get(self.url)
+
+        self.assertFalse(json.loads(response.content)["favorited"])
+
+
+class TestSimilarDrinkListGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        self.drinks = [
+            Drink.objects.create(product_name=f"Product {i}", brand_name="Brand")
+            for i in range(4)
+        ]
+
+        profiles = []
+        for i in range(3):
+            user = User.objects.create(username=f"user{i}")
+            profiles.append(Profile.objects.create(user=user))
+
+        # drinks 0 and 1 share every profile, drink 2 shares one, drink 3 none
+        now = timezone.now()
+
+        for profile, drinks in zip(profiles, [[0, 1, 2], [0, 1], [0, 1, 3]]):
+            for i in drinks:
+                Review.objects.create(
+                    profile=profile,
+                    drink=self.drinks[i],
+                    review_text="Review text",
+                    rating=4,
+                    date_created=now,
+                )
+
+        DrinkFavorite.objects.create(
+            profile=profiles[1], drink=self.drinks[2], date_created=now
+        )
+
+        call_command("build_similarity", stdout=StringIO())
+
+    def get_similar(self, drink):
+        response = self.client.get(f"/drinks/drink/{drink.pk}/similar/")
+
+        self.assertEqual(200, response.status_code)
+
+        return json.loads(response.content)["drinks"]
+
+    def test_reject_drink_not_found(self):
+        response = self.client.get(f"/drinks/drink/{self.drinks[3].pk + 1}/similar/")
+
+        self.assertEqual(404, response.status_code)
+
+    def test_get_similar(self):
+        similar = self.get_similar(self.drinks[0])
+
+        # most shared profiles first
+        self.assertListEqual(
+            [self.drinks[i].pk for i in [1, 2, 3]], [drink["id"] for drink in similar]
+        )
+        self.assertAlmostEqual(1.0, similar[0]["similarity"], places=5)
+        self.assertGreater(similar[1]["similarity"], similar[2]["similarity"])
+        self.assertSetEqual(
+            {"id", "product_name", "brand_name", "rating", "similarity"},
+            set(similar[0].keys()),
+        )
+
+    def test_get_similar_limit(self):
+        response = self.client.get(
+            f"/drinks/drink/{self.drinks[0].pk}/similar/?limit=1"
+        )
+
+        self.assertEqual(1, len(json.loads(response.content)["drinks"]))
+
+    def test_no_similar(self):
+        drink = Drink.objects.create(product_name="New", brand_name="Brand")
+
+        self.assertListEqual([], self.get_similar(drink))
+
+
+class TestRecommendedDrinkListGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        self.drinks = [
+            Drink.objects.create(product_name=f"Product {i}", brand_name="Brand")
+            for i in range(5)
+        ]
+
+        for drink in self.drinks:
+            DrinkStats.objects.create(drink=drink)
+
+        self.users = []
+        self.profiles = []
+        for i in range(4):
+            user = User.objects.create(username=f"user{i}")
+            self.users.append(user)
+            self.profiles.append(Profile.objects.create(user=user))
+
+        # profile 0 agrees with the others on drinks 0 and 1, who love drink 2 and
+        # dislike drink 3
+        now = timezone.now()
+        ratings = [
+            {0: 5, 1: 1},
+            {0: 5, 1: 1, 2: 5, 3: 1},
+            {0: 5, 1: 1, 2: 5, 3: 1},
+            {0: 5, 1: 2, 2: 4, 3: 2},
+        ]
+
+        for profile, profile_ratings in zip(self.profiles, ratings):
+            for i, rating in profile_ratings.items():
+                Review.objects.create(
+                    profile=profile,
+                    drink=self.drinks[i],
+                    review_text="Review text",
+                    rating=rating,
+                    date_created=now,
+                )
+
+        # favorites count as seen
+        DrinkFavorite.objects.create(
+            profile=self.profiles[0], drink=self.drinks[4], date_created=now
+        )
+
+        call_command("train_recommendations", stdout=StringIO())
+
+    def get_recommended(self, user, query=""):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(f"/drinks/recommended/{query}")
+
+        self.assertEqual(200, response.status_code)
+
+        return json.loads(response.content)["drinks"]
+
+    def test_reject_no_user(self):
+        response = self.client.get("/drinks/recommended/")
+
+        self.assertEqual(403, response.status_code)
+
+    def test_reject_no_profile(self):
+        self.client.force_authenticate(user=User.objects.create(username="none"))
+        response = self.client.get("/drinks/recommended/")
+
+        self.assertEqual(403, response.status_code)
+
+    def test_get_recommended(self):
+        self.client.force_authenticate(user=self.users[0])
+
+        # table versions, recommendations and drinks, reviews are never read
+        with self.assertNumQueries(3):
+            response = self.client.get("/drinks/recommended/")
+
+        drinks = json.loads(response.content)["drinks"]
+
+        # unseen drinks only, the one similar profiles liked first
+        self.assertListEqual(
+            [self.drinks[i].pk for i in [2, 3]], [drink["id"] for drink in drinks]
+        )
+        self.assertGreater(drinks[0]["predicted_rating"], drinks[1]["predicted_rating"])
+        self.assertSetEqual(
+            {"id", "product_name", "brand_name", "rating", "predicted_rating"},
+            set(drinks[0].keys()),
+        )
+
+    def test_get_recommended_limit(self):
+        self.assertEqual(1, len(self.get_recommended(self.users[0], "?limit=1")))
+
+    def test_review_removes_recommendation(self):
+        self.client.force_authenticate(user=self.users[0])
+        self.client.post(
+            "/reviews/review/",
+            {
+                "rating": 4,
+                "review_text": "Review text",
+                "drink_id": self.drinks[2].pk,
+            },
+            format="multipart",
+        )
+
+        self.assertListEqual(
+            [self.drinks[3].pk],
+            [drink["id"] for drink in self.get_recommended(self.users[0])],
+        )
+
+    def test_favorite_removes_recommendation(self):
+        self.client.force_authenticate(user=self.users[0])
+        self.client.post(f"/drinks/drink/{self.drinks[3].pk}/favorite/")
+
+        self.assertListEqual(
+            [self.drinks[2].pk],
+            [drink["id"] for drink in self.get_recommended(self.users[0])],
+        )
+
+    def test_trending_without_recommendations(self):
+        user = User.objects.create(username="new")
+        profile = Profile.objects.create(user=user)
+
+        DrinkFavorite.objects.create(
+            profile=profile, drink=self.drinks[0], date_created=timezone.now()
+        )
+
+        drinks = self.get_recommended(user)
+
+        self.assertNotIn(self.drinks[0].pk, [drink["id"] for drink in drinks])
+        self.assertIsNone(drinks[0]["predicted_rating"])
+
+    def test_fold_in(self):
+        user = User.objects.create(username="new")
+        profile = Profile.objects.create(user=user)
+
+        for i, rating in [(0, 5), (1, 1)]:
+            Review.objects.create(
+                profile=profile,
+                drink=self.drinks[i],
+                review_text="Review text",
+                rating=rating,
+                date_created=timezone.now(),
+            )
+
+        call_command("train_recommendations", "--fold-in", stdout=StringIO())
+
+        drink_ids = [drink["id"] for drink in self.get_recommended(user)]
+
+        # unseen drinks only, from the trained item factors
+        self.assertSetEqual({self.drinks[i].pk for i in [2, 3, 4]}, set(drink_ids))
+        self.assertLess(
+            drink_ids.index(self.drinks[2].pk), drink_ids.index(self.drinks[3].pk)
+        )
+
+
 class TestFavoriteDetailPOST(APITestCase):
     def setUp(self):
         # client
@@ -315,6 +1074,21 @@ class TestFavoriteDetailPOST(APITestCase):
             set(["id", "drink_id", "profile_id"]), set(response_json.keys())
         )
         self.assertDictContainsSubset(self.data, response_json)
+
+    def test_unique_constraint(self):
+        DrinkFavorite.objects.create(
+            profile_id=self.data["profile_id"],
+            drink_id=self.data["drink_id"],
+            date_created=timezone.now(),
+        )
+
+        # duplicates are rejected by the database, not only the view
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DrinkFavorite.objects.create(
+                profile_id=self.data["profile_id"],
+                drink_id=self.data["drink_id"],
+                date_created=timezone.now(),
+            )
         self.assertEqual(1, len(DrinkFavorite.objects.all()))
 
 
@@ -465,7 +1239,7 @@ class TestDrinkListGET(APITestCase):
             actual = response_json["drinks"][i]
 
             self.assertSetEqual(
-                set(["id", "product_name", "brand_name"]), set(actual.keys())
+                set(["id", "product_name", "brand_name", "rating"]), set(actual.keys())
             )
             self.assertDictContainsSubset(expected, actual)
 
@@ -485,7 +1259,7 @@ class TestDrinkListGET(APITestCase):
             actual = response_json["drinks"][i]
 
             self.assertSetEqual(
-                set(["id", "product_name", "brand_name"]), set(actual.keys())
+                set(["id", "product_name", "brand_name", "rating"]), set(actual.keys())
             )
             self.assertDictContainsSubset(expected, actual)
 
@@ -503,18 +1277,481 @@ class TestDrinkListGET(APITestCase):
             actual = response_json["drinks"][i]
 
             self.assertSetEqual(
-                set(["id", "product_name", "brand_name"]), set(actual.keys())
+                set(["id", "product_name", "brand_name", "rating"]), set(actual.keys())
             )
             self.assertDictContainsSubset(expected, actual)
 
+    def test_get_cursor(self):
+        # first page
+        response = self.client.get("/drinks/?limit=10&count=true")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response_json["num_pages"])
+        self.assertIsNone(response_json["prev_cursor"])
+        self.assertIsNotNone(response_json["next_cursor"])
+
+        for i in range(10):
+            self.assertDictContainsSubset(self.drinks[i], response_json["drinks"][i])
+
+        # second page
+        response = self.client.get(
+            f"/drinks/?limit=10&cursor={response_json['next_cursor']}"
+        )
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn("num_pages", response_json)
+        self.assertIsNone(response_json["next_cursor"])
+        self.assertIsNotNone(response_json["prev_cursor"])
+
+        for i in range(10):
+            self.assertDictContainsSubset(
+                self.drinks[10 + i], response_json["drinks"][i]
+            )
+
+        # back to first page
+        response = self.client.get(
+            f"/drinks/?limit=10&cursor={response_json['prev_cursor']}"
+        )
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(response_json["prev_cursor"])
+        self.assertDictContainsSubset(self.drinks[0], response_json["drinks"][0])
+
+    def test_get_cursor_search(self):
+        response = self.client.get("/drinks/?search=special&limit=4")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(4, len(response_json["drinks"]))
+        self.assertDictContainsSubset(self.drinks[10], response_json["drinks"][0])
+
+    def test_get_search_typo(self):
+        coke = Drink.objects.create(product_name="Classic", brand_name="Coca-Cola")
+        Drink.objects.create(product_name="Cherry", brand_name="Coca-Cola")
+
+        response = self.client.get("/drinks/?search=coka cola")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(response_json["drinks"]))
+        self.assertEqual(coke.pk, response_json["drinks"][0]["id"])
+
+    def test_get_search_ranked(self):
+        exact = Drink.objects.create(product_name="Root Beer", brand_name="Mug")
+        Drink.objects.create(product_name="Root Beer Float Soda", brand_name="Mug")
+
+        response = self.client.get("/drinks/?search=root beer")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(response_json["drinks"]))
+        self.assertEqual(exact.pk, response_json["drinks"][0]["id"])
+
+    def test_search_trigram_sql(self):
+        # compiled for postgres, every arm of the filter must be one the gin_trgm_ops
+        # indexes serve, UPPER(column) LIKE (icontains) would make it a sequential scan
+        postgres = PostgresDatabaseWrapper(
+            {**connection.settings_dict, "NAME": "fizzgrid"}, alias="postgres"
+        )
+        drinks = _search_trigram(Drink.objects.all(), "co_la")
+        sql, params = drinks.query.get_compiler(connection=postgres).as_sql()
+        where = sql.split(" WHERE ")[1]
+
+        self.assertNotIn("UPPER", where)
+        self.assertEqual(2, where.count(" ILIKE %s"))
+        self.assertIn("%co\\_la%", params)
+
+    def test_get_cursor_search_ranked(self):
+        Drink.objects.create(product_name="Root Beer Float Soda", brand_name="Mug")
+        exact = Drink.objects.create(product_name="Root Beer", brand_name="Mug")
+
+        response = self.client.get("/drinks/?search=root beer&limit=1")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(exact.pk, response_json["drinks"][0]["id"])
+
+        response = self.client.get(
+            f"/drinks/?search=root beer&limit=1&cursor={response_json['next_cursor']}"
+        )
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, len(response_json["drinks"]))
+        self.assertNotEqual(exact.pk, response_json["drinks"][0]["id"])
+        self.assertIsNone(response_json["next_cursor"])
+
+    def test_reject_bad_cursor(self):
+        response = self.client.get("/drinks/?cursor=not-a-cursor")
+
+        self.assertEqual(400, response.status_code)
+
+    def test_reject_bad_limit(self):
+        response = self.client.get("/drinks/?limit=0")
+
+        self.assertEqual(400, response.status_code)
+
+    def test_get_brand(self):
+        coke = Drink.objects.create(product_name="Classic", brand_name="Coca-Cola")
+        Drink.objects.create(product_name="Coca-Cola", brand_name="Other")
+
+        for url in ["/drinks/?brand=coca cola", "/drinks/?brand=COCA-COLA&limit=5"]:
+            response = self.client.get(url)
+            response_json = json.loads(response.content)
+
+            self.assertEqual(200, response.status_code)
+            self.assertListEqual(
+                [coke.pk], [drink["id"] for drink in response_json["drinks"]]
+            )
+
+    def test_get_brand_punctuation(self):
+        Drink.objects.create(product_name="Classic", brand_name="!!!")
+
+        # check a blank brand is rejected
+        response = self.client.get("/drinks/?brand=%20")
+
+        self.assertEqual(400, response.status_code)
+
+        # check other punctuation does not match
+        response = self.client.get("/drinks/", {"brand": "??"})
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual([], response_json["drinks"])
+
+        response = self.client.get("/drinks/?brand=!!!")
+        response_json = json.loads(response.content)
+
+        self.assertListEqual(
+            ["!!!"], [drink["brand_name"] for drink in response_json["drinks"]]
+        )
+
+    def test_get_brand_search(self):
+        response = self.client.get("/drinks/?brand=brand 1&search=special")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual(
+            ["Special Product 1"],
+            [drink["product_name"] for drink in response_json["drinks"]],
+        )
+
+
+class TestBrandListGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        for product_name, brand_name in [
+            ("Classic", "Coca-Cola"),
+            ("Cherry", "coca cola"),
+            ("Zero", "Coca-Cola"),
+            ("Original", "Dr Pepper"),
+            ("Cream Soda", "Dr Pepper"),
+            ("Orange", "Crush"),
+        ]:
+            Drink.objects.create(product_name=product_name, brand_name=brand_name)
+
+    def get_brands(self, query=""):
+        response = self.client.get(f"/drinks/brands/{query}")
+
+        self.assertEqual(200, response.status_code)
+
+        return json.loads(response.content)
+
+    def test_get_brands(self):
+        response_json = self.get_brands()
+
+        self.assertListEqual(
+            [
+                {"key": "coca cola", "name": "Coca-Cola", "drink_count": 3},
+                {"key": "crush", "name": "Crush", "drink_count": 1},
+                {"key": "dr pepper", "name": "Dr Pepper", "drink_count": 2},
+            ],
+            response_json["brands"],
+        )
+
+    def test_get_brands_punctuation(self):
+        drink = Drink.objects.create(product_name="Classic", brand_name="!!!")
+
+        self.assertEqual("!!!", drink.brand_key)
+        self.assertIn(
+            {"key": "!!!", "name": "!!!", "drink_count": 1},
+            self.get_brands()["brands"],
+        )
+
+    def test_get_brands_prefix(self):
+        brands = self.get_brands("?prefix=C")["brands"]
+
+        self.assertListEqual(["coca cola", "crush"], [brand["key"] for brand in brands])
+        self.assertListEqual(
+            ["coca cola"],
+            [brand["key"] for brand in self.get_brands("?prefix=coca-c")["brands"]],
+        )
+
+    def test_get_brands_by_count(self):
+        response_json = self.get_brands("?sort=count&limit=2")
+
+        self.assertListEqual(
+            ["coca cola", "dr pepper"],
+            [brand["key"] for brand in response_json["brands"]],
+        )
+
+        response_json = self.get_brands(
+            f"?sort=count&limit=2&cursor={response_json['next_cursor']}"
+        )
+
+        self.assertListEqual(
+            ["crush"], [brand["key"] for brand in response_json["brands"]]
+        )
+        self.assertIsNone(response_json["next_cursor"])
+
+    def test_counts_maintained(self):
+        Drink.objects.filter(product_name="Orange").get().delete()
+        Drink.objects.create(product_name="Diet", brand_name="Dr. Pepper")
+
+        brands = self.get_brands()["brands"]
+
+        self.assertListEqual(
+            ["coca cola", "dr pepper"], [brand["key"] for brand in brands]
+        )
+        self.assertEqual(3, brands[1]["drink_count"])
+
+    def test_rebuild_brands(self):
+        Brand.objects.update(drink_count=0)
+
+        call_command("rebuild_brands", stdout=StringIO())
+
+        self.assertDictEqual(
+            {"coca cola": 3, "crush": 1, "dr pepper": 2},
+            dict(Brand.objects.values_list("key", "drink_count")),
+        )
+
+    def test_reject_bad_sort(self):
+        response = self.client.get("/drinks/brands/?sort=popular")
+
+        self.assertEqual(400, response.status_code)
+
+
+class TestDrinkListSortGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        # drinks
+        self.drinks = [
+            Drink.objects.create(product_name=f"Product {i}", brand_name="Brand")
+            for i in range(4)
+        ]
+
+        # profiles
+        profiles = []
+        for i in range(3):
+            user = User.objects.create(username=f"user{i}")
+            profiles.append(Profile.objects.create(user=user))
+
+        self.profiles = profiles
+
+        # ratings per drink, last drink is never reviewed
+        ratings = [[2, 3], [5], [4, 4, 5]]
+        now = timezone.now()
+
+        for i in range(len(ratings)):
+            for j in range(len(ratings[i])):
+                Review.objects.create(
+                    profile=profiles[j],
+                    drink=self.drinks[i],
+                    review_text="Review text",
+                    rating=ratings[i][j],
+                    date_created=now - timezone.timedelta(days=i),
+                )
+
+        call_command("rebuild_drink_stats", stdout=StringIO())
+
+    def get_ids(self, url):
+        response = self.client.get(url)
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+
+        return [drink["id"] for drink in response_json["drinks"]]
+
+    def test_sort_rating(self):
+        ids = self.get_ids("/drinks/?sort=rating")
+
+        expected = [self.drinks[i].pk for i in [1, 2, 0, 3]]
+        self.assertListEqual(expected, ids)
+
+    def test_sort_reviews(self):
+        ids = self.get_ids("/drinks/?sort=reviews")
+
+        expected = [self.drinks[i].pk for i in [2, 0, 1, 3]]
+        self.assertListEqual(expected, ids)
+
+    def test_sort_recent(self):
+        ids = self.get_ids("/drinks/?sort=recent")
+
+        expected = [self.drinks[i].pk for i in [0, 1, 2, 3]]
+        self.assertListEqual(expected, ids)
+
+    def test_sort_rating_cursor(self):
+        response = self.client.get("/drinks/?sort=rating&limit=2")
+        response_json = json.loads(response.content)
+
+        ids = self.get_ids(
+            f"/drinks/?sort=rating&limit=2&cursor={response_json['next_cursor']}"
+        )
+
+        expected = [self.drinks[i].pk for i in [0, 3]]
+        self.assertListEqual(expected, ids)
+
+    def test_reject_bad_sort(self):
+        response = self.client.get("/drinks/?sort=name")
+
+        self.assertEqual(400, response.status_code)
+
+    def test_rating_summary(self):
+        response = self.client.get(f"/drinks/drink/{self.drinks[0].pk}/")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2.5, response_json["rating"]["average"])
+        self.assertEqual(2, response_json["rating"]["count"])
+        self.assertListEqual([0, 1, 1, 0, 0], response_json["rating"]["histogram"])
+
+    def test_rebuild_repairs_stats(self):
+        DrinkStats.objects.filter(drink=self.drinks[2]).update(
+            review_count=10, rating_avg=1.0
+        )
+        DrinkStats.objects.filter(drink=self.drinks[3]).delete()
+
+        call_command("rebuild_drink_stats", stdout=StringIO())
+
+        stats = DrinkStats.objects.get(drink=self.drinks[2])
+
+        self.assertEqual(3, stats.review_count)
+        self.assertEqual(13, stats.rating_sum)
+        self.assertListEqual(
+            [0, 0, 0, 2, 1],
+            [
+                stats.rating_1,
+                stats.rating_2,
+                stats.rating_3,
+                stats.rating_4,
+                stats.rating_5,
+            ],
+        )
+        self.assertTrue(DrinkStats.objects.filter(drink=self.drinks[3]).exists())
+
+    def test_sort_trending(self):
+        ids = self.get_ids("/drinks/?sort=trending")
+
+        # recent reviews outweigh more but older ones
+        expected = [self.drinks[i].pk for i in [0, 2, 1, 3]]
+        self.assertListEqual(expected, ids)
+
+    def test_trending_updates(self):
+        # new favorites and a like push an older review up
+        for profile in self.profiles[:2]:
+            self.client.force_authenticate(user=profile.user)
+            self.client.post(f"/drinks/drink/{self.drinks[1].pk}/favorite/")
+
+        self.client.post(f"/drinks/drink/{self.drinks[3].pk}/favorite/")
+
+        review = Review.objects.get(drink=self.drinks[1])
+        self.client.post(f"/reviews/review/{review.pk}/like/")
+
+        ids = self.get_ids("/drinks/?sort=trending")
+
+        expected = [self.drinks[i].pk for i in [1, 0, 2, 3]]
+        self.assertListEqual(expected, ids)
+
+        # removing activity takes back exactly what it added
+        self.client.delete(f"/drinks/drink/{self.drinks[3].pk}/favorite/")
+        self.client.delete(f"/reviews/review/{review.pk}/like/")
+
+        # deleted reviews take their likes with them
+        review = Review.objects.get(drink=self.drinks[2], profile=self.profiles[2])
+        self.client.post(f"/reviews/review/{review.pk}/like/")
+
+        self.client.force_authenticate(user=self.profiles[2].user)
+        self.client.delete(f"/reviews/review/{review.pk}/")
+
+        scores = trending_scores()
+
+        for drink in self.drinks:
+            self.assertAlmostEqual(
+                scores.get(drink.pk, 0),
+                DrinkStats.objects.get(drink=drink).trending_score,
+            )
+
+    def test_compact_trending(self):
+        ids = self.get_ids("/drinks/?sort=trending")
+
+        # a week of decay
+        TrendingEpoch.objects.update(epoch=F("epoch") - 7 * 24 * 60 * 60)
+        before = DrinkStats.objects.get(drink=self.drinks[0]).trending_score
+
+        call_command("compact_trending", stdout=StringIO())
+
+        after = DrinkStats.objects.get(drink=self.drinks[0]).trending_score
+
+        self.assertAlmostEqual(before * 2 ** (-7 / 3), after, delta=before * 1e-3)
+        self.assertListEqual(ids, self.get_ids("/drinks/?sort=trending"))
+
+    def test_trending_never_negative(self):
+        self.client.force_authenticate(user=self.profiles[0].user)
+        self.client.post(f"/drinks/drink/{self.drinks[3].pk}/favorite/")
+
+        # compaction dropped the decayed score to zero
+        DrinkStats.objects.filter(drink=self.drinks[3]).update(trending_score=0)
+
+        self.client.delete(f"/drinks/drink/{self.drinks[3].pk}/favorite/")
+
+        self.assertEqual(0, DrinkStats.objects.get(drink=self.drinks[3]).trending_score)
+
 
 class TestImageListGET(APITestCase):
+    def setUp(self):
+        drink = Drink.objects.create(product_name="Product", brand_name="Brand")
+
+        DrinkImage.objects.create(
+            drink=drink,
+            label="front",
+            image="drinks/front.png",
+            renditions={
+                "thumb": {"width": 160, "height": 90, "webp": "drinks/front_thumb.webp"}
+            },
+        )
+        DrinkImage.objects.create(
+            drink=drink,
+            image="drinks/back.png",
+            status=DrinkImage.Status.PENDING,
+        )
+
+        self.drink_url = f"/drinks/images/?drink={drink.pk}"
+
     def test_get_drink(self):
         pass
 
     def test_get_all(self):
         pass
 
+    def test_get_ndjson(self):
+        response = self.client.get(self.drink_url)
+        images = json.loads(response.content)["images"]
+
+        response = self.client.get(f"{self.drink_url}&format=ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        # streamed rows are built from values, not through the serializer
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(images))
+        self.assertIsNone(images[1]["image"])
+        self.assertListEqual(images, [json.loads(line) for line in lines])
+
 
 class TestFavoriteListGET(APITestCase):
     def setUp(self):
@@ -630,3 +1867,153 @@ class TestFavoriteListGET(APITestCase):
                 set(["id", "profile_id", "drink_id"]), set(actual.keys())
             )
             self.assertDictContainsSubset(expected, actual)
+
+
+class TestImportDrinks(TemporaryStorageMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        # existing drink
+        Drink.objects.create(product_name="Cola", brand_name="Brand")
+
+        # image next to the import file
+        with open(f"{self.storage_dir}/cola.jpg", "wb") as file:
+            file.write(create_test_image().read())
+
+        self.path = f"{self.storage_dir}/drinks.csv"
+
+        with open(self.path, "w") as file:
+            file.write(
+                "product_name,brand_name,images\n"
+                "Cola,Brand,\n"
+                "Cherry Cola,Brand,cola.jpg\n"
+                "Cherry Cola,Brand,\n"
+                ",Brand,\n"
+                "Root Beer,Other Brand,cola.jpg|missing.jpg\n"
+                "Ginger Ale,Other Brand,\n"
+            )
+
+    def import_drinks(self, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "import_drinks",
+                self.path,
+                *args,
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+
+    def test_import(self):
+        self.import_drinks("--batch-size", "2")
+
+        # duplicates of the catalog and within the file are skipped
+        self.assertListEqual(
+            ["Cola", "Cherry Cola", "Root Beer", "Ginger Ale"],
+            list(Drink.objects.order_by("id").values_list("product_name", flat=True)),
+        )
+        self.assertEqual(3, len(DrinkStats.objects.all()))
+        self.assertDictEqual(
+            {"brand": 2, "other brand": 2},
+            dict(Brand.objects.values_list("key", "drink_count")),
+        )
+
+        # missing image skipped
+        self.assertListEqual(
+            ["Cherry Cola", "Root Beer"],
+            [image.drink.product_name for image in DrinkImage.objects.order_by("id")],
+        )
+
+        for drink_image in DrinkImage.objects.all():
+            self.assertEqual(DrinkImage.Status.READY, drink_image.status)
+            self.assertTrue(default_storage.exists(drink_image.image.name))
+
+        # finished imports remove their checkpoint
+        self.assertFalse(os.path.exists(f"{self.path}.checkpoint"))
+
+    def test_resume(self):
+        # earlier run stopped after the first 4 rows
+        with open(f"{self.path}.checkpoint", "w") as file:
+            json.dump({"rows": 4}, file)
+
+        self.import_drinks()
+
+        self.assertListEqual(
+            ["Cola", "Root Beer", "Ginger Ale"],
+            list(Drink.objects.order_by("id").values_list("product_name", flat=True)),
+        )
+
+        # restart ignores the checkpoint
+        with open(f"{self.path}.checkpoint", "w") as file:
+            json.dump({"rows": 4}, file)
+
+        self.import_drinks("--restart")
+
+        self.assertEqual(4, len(Drink.objects.all()))
+
+    def test_import_ndjson(self):
+        path = f"{self.storage_dir}/drinks.ndjson"
+
+        with open(path, "w") as file:
+            file.write('{"product_name": "Cream Soda", "brand_name": "Brand"}\n\n')
+            file.write(
+                '{"product_name": "Lime Soda", "brand_name": "Brand", "images": "cola.jpg"}\n'
+            )
+
+        self.path = path
+        self.import_drinks()
+
+        self.assertEqual(3, len(Drink.objects.all()))
+        self.assertEqual("Lime Soda", DrinkImage.objects.get().drink.product_name)
+
+    def test_import_long_names(self):
+        with open(self.path, "w") as file:
+            file.write(
+                "product_name,brand_name,images\n"
+                f"{'a' * 301},Brand,\n"
+                f"Cream Soda,{'b' * 301},\n"
+                f"{'c' * 300},Brand,\n"
+            )
+
+        stdout = StringIO()
+        stderr = StringIO()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_drinks", self.path, stdout=stdout, stderr=stderr)
+
+        # over-long rows are skipped, not the batch
+        self.assertTrue(Drink.objects.filter(product_name="c" * 300).exists())
+        self.assertFalse(Drink.objects.filter(brand_name="b" * 301).exists())
+        self.assertIn("2 invalid rows", stdout.getvalue())
+        self.assertIn(
+            "Row 1: product_name longer than 300 characters", stderr.getvalue()
+        )
+        self.assertIn("Row 2: brand_name longer than 300 characters", stderr.getvalue())
+
+    def test_import_ndjson_invalid(self):
+        self.path = f"{self.storage_dir}/drinks.ndjson"
+
+        with open(self.path, "w") as file:
+            file.write(
+                '{"product_name": "Cream Soda", "brand_name": "Brand"}\n'
+                '{"product_name": "Lime Soda", \n'
+                '["Lime Soda", "Brand"]\n'
+                "5\n"
+                '{"product_name": "Lime Soda", "brand_name": "Brand", "images": 5}\n'
+                '{"product_name": 5, "brand_name": "Brand"}\n'
+                '{"product_name": "Grape Soda", "brand_name": "Brand"}\n'
+            )
+
+        stdout = StringIO()
+        stderr = StringIO()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_drinks", self.path, stdout=stdout, stderr=stderr)
+
+        # bad lines are skipped, the rest of the file is imported
+        self.assertListEqual(
+            ["Cola", "Cream Soda", "Grape Soda"],
+            list(Drink.objects.order_by("id").values_list("product_name", flat=True)),
+        )
+        self.assertIn("5 invalid rows", stdout.getvalue())
+        self.assertIn("Row 2: invalid JSON", stderr.getvalue())
+        self.assertIn("Row 3: not a JSON object", stderr.getvalue())
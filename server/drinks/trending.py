@@ -0,0 +1,117 @@
+import time
+from django.db import transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Coalesce, Power
+from reviews.models import Review, ReviewLike
+from .models import DrinkFavorite, DrinkStats, TrendingEpoch
+
+# activity weights, a review counts as much as three likes
+WEIGHTS = {"review": 3.0, "favorite": 2.0, "like": 1.0}
+
+# activity counts half as much after this many seconds
+HALF_LIFE = 3 * 24 * 60 * 60
+
+# scores below this after compaction are dropped to zero
+MIN_SCORE = 1e-6
+
+# trending_score stores sum(weight * 2 ** ((time - epoch) / HALF_LIFE)), newer activity
+# adds more instead of older activity being decayed, so writes only ever add to one row.
+# Scores grow over time, compact_trending moves the epoch forward and rescales them,
+# which keeps the order unchanged
+
+
+def get_epoch():
+    """
+    Current epoch in unix seconds, created on first use
+    """
+    epoch, _ = TrendingEpoch.objects.get_or_create(
+        pk=1, defaults={"epoch": time.time()}
+    )
+
+    return epoch.epoch
+
+
+def decayed(amount, when):
+    """
+    Expression for amount of activity at datetime when, relative to the stored epoch
+    The epoch is read by the same statement that updates the score
+    """
+    epoch = Subquery(TrendingEpoch.objects.filter(pk=1).values("epoch")[:1])
+    timestamp = when.timestamp()
+
+    return Value(amount) * Power(
+        Value(2.0), (Value(timestamp) - Coalesce(epoch, Value(timestamp))) / HALF_LIFE
+    )
+
+
+def decayed_sum(kind, times, sign=1):
+    """
+    decayed() for several activities of kind, folded into one term
+    """
+    latest = max(times)
+    amount = sum(2 ** ((when - latest).total_seconds() / HALF_LIFE) for when in times)
+
+    return decayed(sign * WEIGHTS[kind] * amount, latest)
+
+
+def trending_scores(drink_ids=None):
+    """
+    Recompute trending scores from reviews, favorites and likes
+    Returns {drink_id: score} for drinks with any activity
+    """
+    epoch = get_epoch()
+    scores = {}
+
+    activities = [
+        ("review", Review.objects.values_list("drink_id", "date_created")),
+        ("favorite", DrinkFavorite.objects.values_list("drink_id", "date_created")),
+        ("like", ReviewLike.objects.values_list("review__drink_id", "date_created")),
+    ]
+
+    for kind, rows in activities:
+        if drink_ids is not None:
+            drink_field = "review__drink_id" if kind == "like" else "drink_id"
+            rows = rows.filter(**{f"{drink_field}__in": drink_ids})
+
+        for drink_id, when in rows.order_by().iterator(chunk_size=2000):
+            scores[drink_id] = scores.get(drink_id, 0) + WEIGHTS[kind] * 2 ** (
+                (when.timestamp() - epoch) / HALF_LIFE
+            )
+
+    return scores
+
+
+def annotate_trending(drinks):
+    """
+    Annotate drinks with trending_score for SORT_ORDERINGS["trending"]
+    Only drinks with a stats row (every drink gets one on creation, drinks older than
+    DrinkStats got theirs from migration 0014), so the database can
+    read the order from drinkstats_trending_idx instead of sorting every drink
+    """
+    return drinks.filter(stats__isnull=False).annotate(
+        trending_score=F("stats__trending_score")
+    )
+
+
+def compact():
+    """
+    Move the epoch to now and rescale every score by the decay since the old epoch
+    Returns the scale factor applied
+    """
+    with transaction.atomic():
+        epoch = TrendingEpoch.objects.select_for_update().get_or_create(
+            pk=1, defaults={"epoch": time.time()}
+        )[0]
+
+        new_epoch = time.time()
+        factor = 2 ** ((epoch.epoch - new_epoch) / HALF_LIFE)
+
+        DrinkStats.objects.update(trending_score=F("trending_score") * factor)
+        DrinkStats.objects.filter(trending_score__lt=MIN_SCORE).exclude(
+            trending_score=0
+        ).update(trending_score=0)
+
+        epoch.epoch = new_epoch
+        epoch.save(update_fields=["epoch"])
+
+    return factor
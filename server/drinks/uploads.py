@@ -0,0 +1,156 @@
+import os
+import time
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from fizzgrid import storage_writer
+from fizzgrid.images import create_renditions, delete_renditions
+from .models import DrinkImage
+
+# spooled files of pending images are named SPOOL_PREFIX + DrinkImage id
+SPOOL_PREFIX = "drink-image-"
+
+
+def queue_drink_images(drink, uploads, label):
+    """
+    Create pending DrinkImages for validated uploads with one bulk insert and write the
+    files to storage from the worker pool after the transaction commits
+    Returns the created DrinkImages
+    """
+    return queue_images([(drink, upload, label) for upload in uploads])
+
+
+def queue_images(items):
+    """
+    queue_drink_images for images of several drinks, items are (drink, upload, label)
+    """
+    field = DrinkImage._meta.get_field("image")
+
+    drink_images = []
+    spooled = []
+
+    try:
+        for drink, upload, label in items:
+            drink_image = DrinkImage(
+                label=label,
+                drink=drink,
+                status=DrinkImage.Status.PENDING,
+                content_hash=getattr(upload, "content_hash", ""),
+            )
+
+            # reserve the storage key now, the file is written later
+            drink_image.image = field.generate_filename(drink_image, upload.name)
+
+            drink_images.append(drink_image)
+            spooled.append(storage_writer.spool(upload))
+
+        DrinkImage.objects.bulk_create(drink_images)
+
+        # name spooled files after their image so sweep_pending_images can retry them
+        for i, drink_image in enumerate(drink_images):
+            path = spool_path(drink_image.pk)
+            os.replace(spooled[i], path)
+            spooled[i] = path
+    except Exception:
+        storage_writer.discard(spooled)
+        raise
+
+    for drink_image, path in zip(drink_images, spooled):
+        storage_writer.submit(
+            store_drink_image, drink_image.pk, drink_image.image.name, path
+        )
+
+    return drink_images
+
+
+def store_drink_image(drink_image_id, name, path):
+    """
+    Write a spooled image and its renditions to storage and mark the DrinkImage ready
+    """
+    try:
+        with open(path, "rb") as file:
+            stored_name = default_storage.save(name, File(file, name=name))
+            renditions = create_renditions(file, stored_name)
+
+        updated = DrinkImage.objects.filter(pk=drink_image_id).update(
+            image=stored_name, renditions=renditions, status=DrinkImage.Status.READY
+        )
+
+        # image was deleted while the write was in flight
+        if not updated:
+            default_storage.delete(stored_name)
+            delete_renditions(renditions)
+    except Exception:
+        DrinkImage.objects.filter(pk=drink_image_id).update(
+            status=DrinkImage.Status.FAILED
+        )
+        raise
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def spool_path(drink_image_id):
+    """
+    Spooled file of a pending DrinkImage
+    """
+    return storage_writer.spool_path(f"{SPOOL_PREFIX}{drink_image_id}")
+
+
+def sweep_pending_images(timeout=None):
+    """
+    Recover images left pending by a worker that died or a transaction that rolled back
+    Spooled files older than timeout seconds (IMAGE_PENDING_TIMEOUT) are written again
+    if their image is still pending and removed otherwise, pending images without a
+    spooled file can never be written and are marked failed
+    Returns (requeued, failed, removed)
+    """
+    timeout = settings.IMAGE_PENDING_TIMEOUT if timeout is None else timeout
+    cutoff = time.time() - timeout
+
+    # files are spooled before their image is committed, so an image pending now
+    # whose file is not listed below was lost
+    pending = dict(
+        DrinkImage.objects.filter(status=DrinkImage.Status.PENDING).values_list(
+            "pk", "image"
+        )
+    )
+
+    try:
+        names = os.listdir(settings.IMAGE_SPOOL_DIR)
+    except FileNotFoundError:
+        names = []
+
+    requeued = 0
+    removed = []
+    lost = set(pending)
+
+    for name in names:
+        path = storage_writer.spool_path(name)
+        drink_image_id = name.removeprefix(SPOOL_PREFIX)
+        drink_image_id = int(drink_image_id) if drink_image_id.isdigit() else None
+
+        lost.discard(drink_image_id)
+
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+        except FileNotFoundError:
+            # written meanwhile
+            continue
+
+        if drink_image_id in pending:
+            storage_writer.submit(
+                store_drink_image, drink_image_id, pending[drink_image_id], path
+            )
+            requeued += 1
+        else:
+            removed.append(path)
+
+    storage_writer.discard(removed)
+
+    failed = DrinkImage.objects.filter(
+        pk__in=lost, status=DrinkImage.Status.PENDING
+    ).update(status=DrinkImage.Status.FAILED)
+
+    return requeued, failed, len(removed)
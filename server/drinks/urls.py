@@ -14,11 +14,31 @@ urlpatterns = [
         views.DrinkDetail.as_view(http_method_names=["get", "delete"]),
         name="drink_detail",
     ),
+    path(
+        "drink/<int:drink_id>/page/",
+        views.DrinkPage.as_view(),
+        name="drink_page",
+    ),
+    path(
+        "drink/<int:drink_id>/similar/",
+        views.SimilarDrinkList.as_view(),
+        name="similar_drink_list",
+    ),
     path(
         "drink/<int:drink_id>/favorite/",
         views.FavoriteDetail.as_view(),
         name="favorite_detail",
     ),
+    path(
+        "recommended/",
+        views.RecommendedDrinkList.as_view(),
+        name="recommended_drink_list",
+    ),
+    path(
+        "brands/",
+        views.BrandList.as_view(),
+        name="brand_list",
+    ),
     path(
         "images/",
         views.ImageList.as_view(),
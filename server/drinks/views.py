@@ -1,12 +1,44 @@
 from django.http import JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
-from PIL import Image
 from profiles.models import Profile
-from .serializers import DrinkFavoriteSerializer, DrinkImageSerializer, DrinkSerializer
-from .models import Drink, DrinkFavorite, DrinkImage
+from reviews.models import Review
+from reviews.recent import forget_window
+from reviews.serializers import ReviewSerializer
+from .serializers import (
+    DRINK_IMAGE_FIELDS,
+    BrandSerializer,
+    DrinkFavoriteSerializer,
+    DrinkImageSerializer,
+    DrinkSerializer,
+    drink_image_row,
+)
+from .models import (
+    Brand,
+    Drink,
+    DrinkFavorite,
+    DrinkImage,
+    DrinkSimilarity,
+    DrinkStats,
+    ProfileRecommendations,
+)
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Value
+from fizzgrid.db import delete_returning, insert_unique
+from fizzgrid.deletion import fast_delete
+from fizzgrid.pagination import is_cursor_request, paginate_request, parse_limit
+from fizzgrid.streaming import list_response
+from fizzgrid.text import name_key
+from fizzgrid.uploads import ImageUploadMixin
+from .brands import BRAND_ORDERINGS
+from .recommendations import forget_recommendation, unpack
+from .search import search_drinks
+from .stats import SORT_ORDERINGS, annotate_stats, record_activity
+from .trending import annotate_trending
+from .uploads import queue_drink_images
+from tombstones.reaper import reap_soon
+from versions.conditional import conditional
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser
@@ -17,19 +49,66 @@ class DrinkList(APIView):
     List drinks
     """
 
+    @conditional(Drink, DrinkStats)
     def get(self, request):
         """
-        List drinks with query params - search: string, page: int
+        List drinks with query params - search: string, page: int, sort: rating | reviews | recent | trending
+        brand: string, exact brand name (case, accents and punctuation are ignored)
+        Cursor mode query params - cursor: string, limit: int, count: boolean
         """
-        drinks = Drink.objects.all()
+        drinks = Drink.objects.select_related("stats")
 
         # check queries
         page = request.query_params.get("page")
         search = request.query_params.get("search")
+        sort = request.query_params.get("sort")
+        brand = request.query_params.get("brand")
+
+        if brand:
+            brand_key = name_key(brand)
+
+            # check brand is not blank
+            if not brand_key:
+                return JsonResponse({"detail": "brand must not be blank"}, status=400)
+
+            drinks = drinks.filter(brand_key=brand_key)
+
+        # rank by similarity when searching
+        ordering = ["id"]
 
         if search:
-            drinks = drinks.filter(
-                Q(product_name__icontains=search) | Q(brand_name__icontains=search)
+            drinks = search_drinks(drinks, search)
+            ordering = ["-rank", "id"]
+
+        # explicit sort takes precedence over search rank
+        if sort:
+            if sort not in SORT_ORDERINGS:
+                return JsonResponse(
+                    {"detail": f"sort must be one of {', '.join(SORT_ORDERINGS)}"},
+                    status=400,
+                )
+
+            if sort == "trending":
+                drinks = annotate_trending(drinks)
+            else:
+                drinks = annotate_stats(drinks)
+
+            ordering = SORT_ORDERINGS[sort]
+
+        # cursor pagination, no count unless asked for
+        if is_cursor_request(request):
+            try:
+                page_drinks, pagination = paginate_request(
+                    request, drinks, ordering, 10
+                )
+            except ValueError as e:
+                return JsonResponse({"detail": str(e)}, status=400)
+
+            return JsonResponse(
+                {
+                    "drinks": DrinkSerializer(page_drinks, many=True).data,
+                    **pagination,
+                }
             )
 
         # set page to 1 if no page provided
@@ -42,7 +121,7 @@ class DrinkList(APIView):
             return JsonResponse({"detail": "page must be an integer"})
 
         # order drinks
-        drinks = drinks.order_by("id")
+        drinks = drinks.order_by(*ordering)
 
         paginator = Paginator(drinks, 10, 4)
         page_obj = paginator.get_page(page)
@@ -56,14 +135,53 @@ class DrinkList(APIView):
         )
 
 
+class BrandList(APIView):
+    """
+    List brands
+    """
+
+    @conditional(Brand)
+    def get(self, request):
+        """
+        List brands with their drink counts, with query params - prefix: string,
+        sort: name | count, cursor: string, limit: int
+        """
+        brands = Brand.objects.filter(drink_count__gt=0)
+
+        # check queries
+        prefix = request.query_params.get("prefix")
+        sort = request.query_params.get("sort", "name")
+
+        if sort not in BRAND_ORDERINGS:
+            return JsonResponse(
+                {"detail": f"sort must be one of {', '.join(BRAND_ORDERINGS)}"},
+                status=400,
+            )
+
+        if prefix:
+            brands = brands.filter(key__startswith=name_key(prefix))
+
+        try:
+            page_brands, pagination = paginate_request(
+                request, brands, BRAND_ORDERINGS[sort], 20
+            )
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+
+        return JsonResponse(
+            {"brands": BrandSerializer(page_brands, many=True).data, **pagination}
+        )
+
+
 class ImageList(APIView):
     """
     List drink images
     """
 
+    @conditional(DrinkImage, Drink)
     def get(self, request):
         """
-        List drink images with query params - drink: int
+        List drink images with query params - drink: int, format: ndjson
         """
         drink_images = DrinkImage.objects.all()
 
@@ -75,8 +193,13 @@ class ImageList(APIView):
             else:
                 return JsonResponse({"detail": "Drink not found"}, status=404)
 
-        return JsonResponse(
-            {"images": DrinkImageSerializer(drink_images, many=True).data}
+        return list_response(
+            request,
+            "images",
+            drink_images,
+            DrinkImageSerializer,
+            row=drink_image_row,
+            fields=DRINK_IMAGE_FIELDS,
         )
 
 
@@ -85,9 +208,10 @@ class FavoriteList(APIView):
     List drink favorites
     """
 
+    @conditional(DrinkFavorite, Profile, Drink)
     def get(self, request):
         """
-        List drink favorites with query params - profile: int, drink: int
+        List drink favorites with query params - profile: int, drink: int, format: ndjson
         """
         favorites = DrinkFavorite.objects.all()
 
@@ -109,18 +233,17 @@ class FavoriteList(APIView):
             else:
                 return JsonResponse({"detail": "Drink not found"}, status=404)
 
-        return JsonResponse(
-            {"favorites": DrinkFavoriteSerializer(favorites, many=True).data}
-        )
+        return list_response(request, "favorites", favorites, DrinkFavoriteSerializer)
 
 
-class DrinkDetail(APIView):
+class DrinkDetail(ImageUploadMixin, APIView):
     """
     Detail drink
     """
 
     parser_classes = [MultiPartParser]
 
+    @conditional(Drink, DrinkStats)
     def get(self, request, drink_id=None):
         """
         Get drink with id drink_id
@@ -129,7 +252,7 @@ class DrinkDetail(APIView):
 
         # check if drink exists
         try:
-            drink = Drink.objects.get(pk=drink_id)
+            drink = Drink.objects.select_related("stats").get(pk=drink_id)
         except ObjectDoesNotExist:
             return JsonResponse(
                 {"detail": f"Drink with id {drink_id} not found"}, status=404
@@ -142,20 +265,17 @@ class DrinkDetail(APIView):
         Post new drink
         Form data should include product_name, brand_name, any number of image files
         """
+        # images are validated while the body streams in
+        error = self.check_uploads(request)
+
+        if error:
+            return error
+
         product_name = request.data.get("product_name")
         brand_name = request.data.get("brand_name")
         files = request.FILES
 
-        images = []
-
-        for file_name in files:
-            try:
-                file = files.get(file_name)
-
-                Image.open(file)
-                images.append(file)
-            except Exception as e:
-                return JsonResponse({"detail": "Files must be images"}, status=400)
+        images = [files.get(file_name) for file_name in files]
 
         if not product_name:
             return JsonResponse({"detail": "Must provide product_name"}, status=400)
@@ -173,15 +293,21 @@ class DrinkDetail(APIView):
 
         drink = Drink(product_name=product_name, brand_name=brand_name)
 
-        drink.save()
+        with transaction.atomic():
+            drink.save()
+            DrinkStats.objects.create(drink=drink)
 
-        for image in images:
-            drink_image = DrinkImage(
-                label=f"{product_name} - {brand_name}", image=image, drink=drink
+            # images are pending until the storage writer uploads them
+            drink_images = queue_drink_images(
+                drink, images, f"{product_name} - {brand_name}"
             )
-            drink_image.save()
 
-        return JsonResponse(DrinkSerializer(drink).data)
+        return JsonResponse(
+            {
+                **DrinkSerializer(drink).data,
+                "images": DrinkImageSerializer(drink_images, many=True).data,
+            }
+        )
 
     def delete(self, request, drink_id=None):
         """
@@ -200,12 +326,204 @@ class DrinkDetail(APIView):
         # serialize
         data = DrinkSerializer(drink).data
 
-        # delete
-        drink.delete()
+        # delete, image files are deleted from storage in batches after commit
+        with transaction.atomic():
+            fast_delete(Drink.objects.filter(pk=drink.pk))
+            reap_soon()
+
+            # its reviews leave the recent feed
+            transaction.on_commit(forget_window)
 
         return JsonResponse(data)
 
 
+class DrinkPage(APIView):
+    """
+    Everything the drink page renders, in one request
+    """
+
+    @conditional(Drink, DrinkStats, DrinkImage, DrinkFavorite, Review)
+    def get(self, request, drink_id):
+        """
+        Get drink with id drink_id with its images, favorite count, whether the user
+        favorited it and the first page of reviews
+        Query params - limit: int, number of reviews
+        Next review pages come from /reviews/?drink=<drink_id>&cursor=<next_cursor>
+        Runs 4 queries: table versions (for the ETag), drink, images, reviews
+        """
+        user = request.user
+
+        if user.is_authenticated:
+            favorited = Exists(
+                DrinkFavorite.objects.filter(drink=OuterRef("pk"), profile__user=user)
+            )
+        else:
+            favorited = Value(False)
+
+        # check if drink exists, with stats and favorites in the same query
+        try:
+            drink = (
+                Drink.objects.select_related("stats")
+                .annotate(favorite_count=Count("drinkfavorite"), favorited=favorited)
+                .get(pk=drink_id)
+            )
+        except ObjectDoesNotExist:
+            return JsonResponse(
+                {"detail": f"Drink with id {drink_id} not found"}, status=404
+            )
+
+        drink_images = DrinkImage.objects.filter(drink_id=drink_id)
+
+        # first page of reviews, same ordering as ReviewList cursor mode
+        try:
+            reviews, pagination = paginate_request(
+                request,
+                Review.objects.filter(drink_id=drink_id),
+                ["-date_created", "-id"],
+                6,
+            )
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+
+        return JsonResponse(
+            {
+                "drink": DrinkSerializer(drink).data,
+                "images": DrinkImageSerializer(drink_images, many=True).data,
+                "favorite_count": drink.favorite_count,
+                "favorited": drink.favorited,
+                "reviews": ReviewSerializer(reviews, many=True).data,
+                "next_cursor": pagination["next_cursor"],
+            }
+        )
+
+
+class SimilarDrinkList(APIView):
+    """
+    List drinks similar to a drink
+    """
+
+    @conditional(DrinkSimilarity, Drink, DrinkStats)
+    def get(self, request, drink_id):
+        """
+        Get drinks most often rated and favorited by the same profiles as drink with id
+        drink_id, most similar first, precomputed by manage.py build_similarity
+        Query params - limit: int
+        """
+        try:
+            limit = parse_limit(request.query_params.get("limit"), 10, maximum=20)
+        except ValueError:
+            return JsonResponse(
+                {"detail": "limit must be a positive integer"}, status=400
+            )
+
+        similar = (
+            DrinkSimilarity.objects.filter(drink_id=drink_id)
+            .select_related("similar__stats")
+            .order_by("-score")[:limit]
+        )
+        similar = list(similar)
+
+        # no neighbors, check if drink exists
+        if not similar and not Drink.objects.filter(pk=drink_id).exists():
+            return JsonResponse(
+                {"detail": f"Drink with id {drink_id} not found"}, status=404
+            )
+
+        return JsonResponse(
+            {
+                "drinks": [
+                    {**DrinkSerializer(row.similar).data, "similarity": row.score}
+                    for row in similar
+                ]
+            }
+        )
+
+
+class RecommendedDrinkList(APIView):
+    """
+    List drinks recommended for the authenticated profile
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @conditional(
+        ProfileRecommendations, Profile, Drink, DrinkStats, Review, DrinkFavorite
+    )
+    def get(self, request):
+        """
+        Get drinks the authenticated profile has not reviewed or favorited, highest
+        predicted rating first, precomputed by manage.py train_recommendations
+        Profiles without recommendations yet get trending drinks
+        Query params - limit: int
+        """
+        user = request.user
+
+        try:
+            limit = parse_limit(request.query_params.get("limit"), 10)
+        except ValueError:
+            return JsonResponse(
+                {"detail": "limit must be a positive integer"}, status=400
+            )
+
+        recommendations = ProfileRecommendations.objects.filter(
+            profile__user_id=user.pk
+        ).first()
+
+        if recommendations is None:
+            # check user has profile
+            profile = None
+
+            try:
+                profile = Profile.objects.get(user_id=user.pk)
+            except ObjectDoesNotExist:
+                return JsonResponse(
+                    {"detail": "User does not have connected profile"}, status=403
+                )
+
+            drinks = (
+                annotate_trending(Drink.objects.select_related("stats"))
+                .exclude(
+                    Exists(Review.objects.filter(drink=OuterRef("pk"), profile=profile))
+                )
+                .exclude(
+                    Exists(
+                        DrinkFavorite.objects.filter(
+                            drink=OuterRef("pk"), profile=profile
+                        )
+                    )
+                )
+                .order_by(*SORT_ORDERINGS["trending"])[:limit]
+            )
+
+            return JsonResponse(
+                {
+                    "drinks": [
+                        {**DrinkSerializer(drink).data, "predicted_rating": None}
+                        for drink in drinks
+                    ]
+                }
+            )
+
+        drink_ids, ratings = unpack(recommendations)
+        drink_ids = drink_ids[:limit].tolist()
+
+        # drinks deleted since training are skipped
+        drinks = Drink.objects.select_related("stats").in_bulk(drink_ids)
+
+        return JsonResponse(
+            {
+                "drinks": [
+                    {
+                        **DrinkSerializer(drinks[drink_id]).data,
+                        "predicted_rating": round(float(rating), 2),
+                    }
+                    for drink_id, rating in zip(drink_ids, ratings)
+                    if drink_id in drinks
+                ]
+            }
+        )
+
+
 class FavoriteDetail(APIView):
     """
     Detail drink favorites
@@ -229,16 +547,29 @@ class FavoriteDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=403
             )
 
-        # check if drink exists
-        if not Drink.objects.filter(pk=drink_id).exists():
-            return JsonResponse(
-                {"detail": f"Drink with id {drink_id} not found"}, status=404
+        date = timezone.now()
+
+        with transaction.atomic():
+            # create favorite relationship if drink exists and it is not a favorite yet
+            favorite = insert_unique(
+                DrinkFavorite,
+                {"profile_id": profile.pk, "drink_id": drink_id, "date_created": date},
+                exists=(Drink, drink_id),
             )
 
-        # check if favorite relationship already exists
-        if DrinkFavorite.objects.filter(
-            profile_id=profile.pk, drink_id=drink_id
-        ).exists():
+            if favorite:
+                record_activity(drink_id, "favorite", date)
+
+                # favorited drinks are no longer recommended
+                forget_recommendation(profile.pk, drink_id)
+
+        if favorite is None:
+            # check if drink exists
+            if not Drink.objects.filter(pk=drink_id).exists():
+                return JsonResponse(
+                    {"detail": f"Drink with id {drink_id} not found"}, status=404
+                )
+
             return JsonResponse(
                 {
                     "detail": f"User {profile.pk} already has drink {drink_id} in favorites"
@@ -246,16 +577,6 @@ class FavoriteDetail(APIView):
                 status=409,
             )
 
-        # get date
-        date = timezone.now()
-
-        # create favorite relationship
-        favorite = DrinkFavorite(date_created=date)
-        favorite.drink_id = drink_id
-        favorite.profile_id = profile.pk
-
-        favorite.save()
-
         return JsonResponse(DrinkFavoriteSerializer(favorite).data)
 
     def delete(self, request, drink_id):
@@ -274,29 +595,30 @@ class FavoriteDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=403
             )
 
-        # check if drink exists
-        if not Drink.objects.filter(pk=drink_id).exists():
-            return JsonResponse(
-                {"detail": f"Drink with id {drink_id} not found"}, status=404
+        # delete
+        with transaction.atomic():
+            favorites = delete_returning(
+                DrinkFavorite,
+                profile_id=profile.pk,
+                drink_id=drink_id,
+                returning=["date_created"],
             )
 
-        # check if requested favorite exists
-        favorite = None
+            if favorites:
+                record_activity(
+                    drink_id, "favorite", favorites[0].date_created, sign=-1
+                )
+
+        if not favorites:
+            # check if drink exists
+            if not Drink.objects.filter(pk=drink_id).exists():
+                return JsonResponse(
+                    {"detail": f"Drink with id {drink_id} not found"}, status=404
+                )
 
-        try:
-            favorite = DrinkFavorite.objects.get(
-                profile_id=profile.pk, drink_id=drink_id
-            )
-        except ObjectDoesNotExist:
             return JsonResponse(
                 {"detail": f"Drink {drink_id} is not in user {profile.pk} favorites"},
                 status=404,
             )
 
-        # serialize
-        data = DrinkFavoriteSerializer(favorite).data
-
-        # delete
-        favorite.delete()
-
-        return JsonResponse(data)
+        return JsonResponse(DrinkFavoriteSerializer(favorites[0]).data)
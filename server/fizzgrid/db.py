@@ -0,0 +1,145 @@
+from django.db import connection
+from django.db.models import Count, Min
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _where(model, filters):
+    """
+    SQL condition and params matching every field attname in filters by equality
+    """
+    conditions = []
+    params = []
+
+    for name, value in filters.items():
+        field = model._meta.get_field(name)
+
+        conditions.append(f"{_quote(field.column)} = %s")
+        params.append(field.get_db_prep_value(value, connection))
+
+    return " AND ".join(conditions), params
+
+
+def insert_unique(model, values, exists=None):
+    """
+    Insert a row with a single INSERT ... ON CONFLICT DO NOTHING RETURNING statement
+    values maps field attnames to values (ints or datetimes, they are not cast), exists
+    is an optional (model, pk) that must exist for the row to be inserted, checked in the
+    same statement instead of relying on deferred foreign key checks
+    Returns an unsaved-looking instance with pk and values set, or None if the row
+    conflicted with a unique constraint or exists did not match
+    """
+    opts = model._meta
+
+    columns = []
+    params = []
+
+    for name, value in values.items():
+        field = opts.get_field(name)
+
+        columns.append(_quote(field.column))
+        params.append(field.get_db_prep_save(value, connection))
+
+    sql = (
+        f"INSERT INTO {_quote(opts.db_table)} ({', '.join(columns)}) "
+        f"SELECT {', '.join(['%s'] * len(columns))}"
+    )
+
+    # sqlite needs a WHERE clause before ON CONFLICT to parse INSERT ... SELECT
+    if exists:
+        parent, pk = exists
+        parent_opts = parent._meta
+
+        sql += (
+            f" WHERE EXISTS (SELECT 1 FROM {_quote(parent_opts.db_table)} "
+            f"WHERE {_quote(parent_opts.pk.column)} = %s)"
+        )
+        params.append(pk)
+    else:
+        sql += " WHERE 1 = 1"
+
+    sql += f" ON CONFLICT DO NOTHING RETURNING {_quote(opts.pk.column)}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+
+    instance = model(pk=row[0], **values)
+    instance._state.adding = False
+
+    return instance
+
+
+def _from_db(field, value):
+    """
+    Convert a raw column value the way querysets do
+    """
+    col = field.cached_col
+
+    for converter in connection.ops.get_db_converters(col) + col.get_db_converters(
+        connection
+    ):
+        value = converter(value, col, connection)
+
+    return value
+
+
+def delete_returning(model, *, returning=(), **filters):
+    """
+    Delete rows matching filters with a single DELETE ... RETURNING statement
+    Skips signals and cascades, only use for models nothing references
+    Returns instances with pk, filters and the returning field names set (other fields
+    are not loaded)
+    """
+    opts = model._meta
+    where, params = _where(model, filters)
+
+    fields = [opts.pk] + [opts.get_field(name) for name in returning]
+
+    sql = (
+        f"DELETE FROM {_quote(opts.db_table)} WHERE {where} "
+        f"RETURNING {', '.join(_quote(field.column) for field in fields)}"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [
+        model(
+            **filters,
+            **{
+                field.attname: _from_db(field, value)
+                for field, value in zip(fields, row)
+            },
+        )
+        for row in rows
+    ]
+
+
+def delete_duplicates(model, fields):
+    """
+    Delete rows sharing the same values for fields, keeping the oldest (lowest pk)
+    For data migrations that add a unique constraint, returns the number of rows deleted
+    """
+    duplicates = (
+        model.objects.values(*fields)
+        .annotate(keep=Min("pk"), rows=Count("pk"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+
+    deleted = 0
+
+    for row in duplicates.iterator():
+        keep = row.pop("keep")
+        row.pop("rows")
+
+        deleted += model.objects.filter(**row).exclude(pk=keep).delete()[0]
+
+    return deleted
@@ -0,0 +1,119 @@
+from django.db import models, router, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import Signal
+
+# rows deleted per statement
+CHUNK_SIZE = 5000
+
+# sent with sender=model and queryset=the rows about to be deleted (one chunk, still in
+# the database) by fast_delete, instead of pre_delete and post_delete for every row
+bulk_delete = Signal()
+
+
+def cascade_plan(model, _path=()):
+    """
+    [(model, path), ...] for every table deleting model's rows cascades to, children
+    before parents, path is the foreign keys leading from the table up to model
+    Returns None if a relation needs more than a cascading delete (SET_NULL, PROTECT,
+    ...) or a model has delete signal receivers but no bulk_delete receiver
+    """
+    if (
+        pre_delete.has_listeners(model) or post_delete.has_listeners(model)
+    ) and not bulk_delete.has_listeners(model):
+        return None
+
+    plan = []
+
+    for relation in get_candidate_relations_to_delete(model._meta):
+        if relation.on_delete is models.DO_NOTHING:
+            continue
+
+        if relation.on_delete is not models.CASCADE:
+            return None
+
+        child_plan = cascade_plan(relation.related_model, (relation.field,) + _path)
+
+        if child_plan is None:
+            return None
+
+        plan.extend(child_plan)
+
+    plan.append((model, _path))
+
+    return plan
+
+
+def fast_delete(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Delete queryset's rows and everything they cascade to with set based deletes, no
+    dependent row is loaded into Python
+    Each table is emptied of the affected rows (chunk_size per statement) before the
+    tables it references, models with delete signal receivers get one bulk_delete
+    per chunk instead (their chunk's primary keys are loaded)
+    Falls back to queryset.delete() when the cascade needs the deletion Collector
+    Returns (total, {model label: count}) like queryset.delete()
+    """
+    model = queryset.model
+    plan = cascade_plan(model)
+
+    if plan is None:
+        return queryset.delete()
+
+    using = router.db_for_write(model)
+    deleted = {}
+
+    with transaction.atomic(using=using, savepoint=False):
+        for step_model, path in plan:
+            rows = affected_rows(step_model, path, queryset)
+            count = delete_chunks(step_model, rows, chunk_size, using)
+
+            if count:
+                label = step_model._meta.label
+                deleted[label] = deleted.get(label, 0) + count
+
+    return sum(deleted.values()), deleted
+
+
+def affected_rows(model, path, queryset):
+    """
+    Queryset of model's rows referencing queryset's rows through path, as nested
+    subqueries (queryset should only filter on its own columns, it is evaluated again
+    after the tables it could join are emptied)
+    """
+    rows = queryset.model._base_manager.filter(pk__in=queryset.values("pk"))
+
+    # build the filter from the deleted model down
+    for field in reversed(path):
+        rows = field.model._base_manager.filter(
+            **{f"{field.attname}__in": rows.values(field.target_field.attname)}
+        )
+
+    return rows
+
+
+def delete_chunks(model, rows, chunk_size, using):
+    """
+    Delete rows chunk_size at a time, returns the number deleted
+    """
+    manager = model._base_manager
+    send = bulk_delete.has_listeners(model)
+    deleted = 0
+
+    while True:
+        if send:
+            pks = list(rows.values_list("pk", flat=True)[:chunk_size])
+
+            if not pks:
+                return deleted
+
+            chunk = manager.filter(pk__in=pks)
+            bulk_delete.send(sender=model, queryset=chunk, using=using)
+        else:
+            chunk = manager.filter(pk__in=rows.values("pk")[:chunk_size])
+
+        count = chunk._raw_delete(using)
+        deleted += count
+
+        if count < chunk_size:
+            return deleted
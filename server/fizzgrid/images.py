@@ -0,0 +1,110 @@
+import logging
+import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from .media_urls import public_url
+
+logger = logging.getLogger(__name__)
+
+# rendition name -> fixed width in pixels
+RENDITION_WIDTHS = {"thumb": 160, "medium": 640}
+
+# format name -> (pillow format, save options), saved without exif or other metadata
+RENDITION_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def rendition_name(name, rendition, extension):
+    """
+    Storage key for a rendition of the stored image name
+    drink_imgs/<uuid>.png -> drink_imgs/renditions/<uuid>_thumb.webp
+    """
+    directory, filename = os.path.split(name)
+    stem, _ = os.path.splitext(filename)
+
+    return f"{directory}/renditions/{stem}_{rendition}.{extension}"
+
+
+def create_renditions(upload, name, storage=None):
+    """
+    Save fixed width WebP and JPEG renditions of upload next to its stored name
+    Returns {rendition: {"width": int, "height": int, "webp": key, "jpeg": key}}, or {} if
+    upload could not be decoded so callers fall back to the original image
+    """
+    storage = storage or default_storage
+
+    try:
+        upload.seek(0)
+        image = Image.open(upload)
+
+        # decode large jpegs at reduced scale, renditions never need more than this
+        image.draft("RGB", (max(RENDITION_WIDTHS.values()) * 2,) * 2)
+
+        # apply exif orientation before the metadata is dropped
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        logger.warning("Could not create renditions for %s", name, exc_info=True)
+        return {}
+
+    has_alpha = image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    renditions = {}
+
+    for rendition, width in RENDITION_WIDTHS.items():
+        # never upscale
+        width = min(width, image.width)
+        height = max(1, round(image.height * width / image.width))
+
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        renditions[rendition] = {"width": width, "height": height}
+
+        for extension, (image_format, options) in RENDITION_FORMATS.items():
+            frame = resized
+
+            # jpeg has no alpha channel, flatten onto white
+            if image_format == "JPEG" and has_alpha:
+                frame = Image.new("RGB", resized.size, (255, 255, 255))
+                frame.paste(resized, mask=resized.getchannel("A"))
+
+            buffer = BytesIO()
+            frame.save(buffer, image_format, **options)
+
+            renditions[rendition][extension] = storage.save(
+                rendition_name(name, rendition, extension),
+                ContentFile(buffer.getvalue()),
+            )
+
+    return renditions
+
+
+def rendition_urls(renditions, storage=None):
+    """
+    srcset style map of renditions with public urls
+    """
+    return {
+        rendition: {
+            key: public_url(value, storage) if key in RENDITION_FORMATS else value
+            for key, value in files.items()
+        }
+        for rendition, files in renditions.items()
+    }
+
+
+def delete_renditions(renditions, storage=None):
+    """
+    Delete stored rendition files
+    """
+    storage = storage or default_storage
+
+    for files in renditions.values():
+        for extension in RENDITION_FORMATS:
+            if files.get(extension):
+                storage.delete(files[extension])
@@ -0,0 +1,59 @@
+import threading
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.encoding import filepath_to_uri
+
+# storage key used once per storage to discover its url prefix
+PROBE_KEY = "fizzgrid-url-probe"
+
+_base_urls = {}
+_base_urls_lock = threading.Lock()
+
+
+def base_url(storage=None):
+    """
+    Public url prefix of storage, computed once and memoized
+    MEDIA_PUBLIC_BASE_URL (e.g. a CDN) wins, otherwise the storage builds one url for
+    a probe key and the query string (presigned auth) and key are stripped off
+    """
+    storage = storage or default_storage
+
+    # keyed by the wrapped storage so default_storage follows STORAGES changes
+    key = id(getattr(storage, "_wrapped", storage))
+
+    try:
+        return _base_urls[key]
+    except KeyError:
+        pass
+
+    with _base_urls_lock:
+        if key not in _base_urls:
+            public_base_url = getattr(settings, "MEDIA_PUBLIC_BASE_URL", None)
+
+            if public_base_url:
+                url = public_base_url.rstrip("/") + "/"
+            else:
+                url = storage.url(PROBE_KEY).split("?")[0]
+                url = url[: -len(PROBE_KEY)]
+
+            _base_urls[key] = url
+
+    return _base_urls[key]
+
+
+def public_url(name, storage=None):
+    """
+    Public url of a stored file name by plain string formatting, no signing or storage calls
+    """
+    if not name:
+        return None
+
+    return base_url(storage) + filepath_to_uri(name).lstrip("/")
+
+
+@receiver(setting_changed)
+def clear_base_urls(setting, **kwargs):
+    if setting in ("STORAGES", "MEDIA_PUBLIC_BASE_URL", "MEDIA_URL"):
+        _base_urls.clear()
@@ -0,0 +1,230 @@
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a cursor can not be decoded for the given ordering
+    """
+
+
+def encode_cursor(values, direction="next"):
+    """
+    Encode ordering key values into an opaque url safe cursor
+    """
+    key = [
+        value.isoformat() if isinstance(value, datetime) else value for value in values
+    ]
+    payload = json.dumps({"k": key, "d": direction}, separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, queryset, ordering):
+    """
+    Decode cursor into (values, direction), converting each value with the ordering field
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = payload["k"]
+        direction = payload["d"]
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+
+    if direction not in ("next", "prev") or not isinstance(key, list):
+        raise InvalidCursor("Invalid cursor")
+
+    if len(key) != len(ordering):
+        raise InvalidCursor("Invalid cursor")
+
+    values = []
+    for name, value in zip(ordering, key):
+        field = _ordering_field(queryset, name.lstrip("-"))
+
+        try:
+            values.append(field.to_python(value) if field else value)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor")
+
+    return values, direction
+
+
+def _ordering_field(queryset, name):
+    """
+    Get model field or annotation output field for name
+    """
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+
+    try:
+        return queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _keyset_filter(ordering, values, reverse=False):
+    """
+    Build filter selecting rows strictly after values in ordering (or before if reverse)
+    """
+    condition = Q()
+    equal = {}
+
+    for name, value in zip(ordering, values):
+        field = name.lstrip("-")
+        descending = name.startswith("-") != reverse
+        lookup = "lt" if descending else "gt"
+
+        condition |= Q(**equal, **{f"{field}__{lookup}": value})
+        equal[field] = value
+
+    return condition
+
+
+def _key(obj, ordering):
+    return [getattr(obj, name.lstrip("-")) for name in ordering]
+
+
+def parse_limit(value, default, maximum=50):
+    """
+    Parse limit query param, raises ValueError if not a positive integer
+    """
+    if value is None or value == "":
+        return default
+
+    limit = int(value)
+
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+
+    return min(limit, maximum)
+
+
+def paginate_by_cursor(queryset, ordering, cursor=None, limit=10):
+    """
+    Keyset paginate queryset
+
+    ordering must be unique across rows (end with a primary key) and every
+    name must be a model field or annotation on queryset
+    Returns (objects, next_cursor, prev_cursor)
+    """
+    return paginate_merged([queryset], ordering, cursor, limit)
+
+
+def _sort(objects, ordering):
+    """
+    Sort objects by ordering in place, one stable sort per key from the last
+    """
+    for name in reversed(ordering):
+        field = name.lstrip("-")
+        objects.sort(key=lambda obj: getattr(obj, field), reverse=name.startswith("-"))
+
+
+def paginate_merged(querysets, ordering, cursor=None, limit=10):
+    """
+    Keyset paginate the rows of several querysets as one list, e.g. rows of different
+    tables making up one feed, each queryset reads at most limit + 1 rows
+
+    ordering must be unique across the rows of all querysets and every name must be a
+    model field or annotation on each of them
+    Returns (objects, next_cursor, prev_cursor)
+    """
+    direction = "next"
+
+    if cursor:
+        values, direction = decode_cursor(cursor, querysets[0], ordering)
+        keyset = _keyset_filter(ordering, values, reverse=direction == "prev")
+        querysets = [queryset.filter(keyset) for queryset in querysets]
+
+    if direction == "prev":
+        reversed_ordering = [
+            name[1:] if name.startswith("-") else f"-{name}" for name in ordering
+        ]
+        objects = []
+
+        for queryset in querysets:
+            objects.extend(queryset.order_by(*reversed_ordering)[: limit + 1])
+
+        if len(querysets) > 1:
+            _sort(objects, reversed_ordering)
+
+        has_more = len(objects) > limit
+        objects = objects[:limit][::-1]
+
+        prev_cursor = (
+            encode_cursor(_key(objects[0], ordering), "prev") if has_more else None
+        )
+        next_cursor = (
+            encode_cursor(_key(objects[-1], ordering), "next") if objects else None
+        )
+    else:
+        objects = []
+
+        for queryset in querysets:
+            objects.extend(queryset.order_by(*ordering)[: limit + 1])
+
+        if len(querysets) > 1:
+            _sort(objects, ordering)
+
+        has_more = len(objects) > limit
+        objects = objects[:limit]
+
+        next_cursor = (
+            encode_cursor(_key(objects[-1], ordering), "next") if has_more else None
+        )
+        prev_cursor = (
+            encode_cursor(_key(objects[0], ordering), "prev")
+            if cursor and objects
+            else None
+        )
+
+    return objects, next_cursor, prev_cursor
+
+
+def is_cursor_request(request):
+    """
+    Check if request asks for cursor pagination
+    """
+    return "cursor" in request.query_params or "limit" in request.query_params
+
+
+def wants_count(request):
+    """
+    Check if request explicitly asks for num_pages in cursor mode
+    """
+    count = request.query_params.get("count")
+
+    return bool(count) and count.lower() == "true"
+
+
+def paginate_request(request, queryset, ordering, default_limit):
+    """
+    Cursor paginate queryset from request query params - cursor: string, limit: int, count: boolean
+    queryset may be a list of querysets paginated as one, see paginate_merged
+    Returns (objects, pagination) where pagination holds next_cursor, prev_cursor and,
+    only if count=true, num_pages
+    Raises ValueError for a bad cursor or limit
+    """
+    querysets = queryset if isinstance(queryset, list) else [queryset]
+
+    try:
+        limit = parse_limit(request.query_params.get("limit"), default_limit)
+    except ValueError:
+        raise ValueError("limit must be a positive integer")
+
+    objects, next_cursor, prev_cursor = paginate_merged(
+        querysets, ordering, request.query_params.get("cursor"), limit
+    )
+
+    pagination = {"next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+    if wants_count(request):
+        count = sum(queryset.count() for queryset in querysets)
+        pagination["num_pages"] = max(1, math.ceil(count / limit))
+
+    return objects, pagination
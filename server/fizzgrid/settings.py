@@ -14,6 +14,7 @@ DEBUG = True
 
 from pathlib import Path
 import environ
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,14 +36,17 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django.core.mail",
     "corsheaders",
     "storages",
     "profiles",
     "reviews",
     "drinks",
+    "search",
+    "versions",
+    "tombstones",
     "rest_framework",
-    "django_cleanup.apps.CleanupConfig",
 ]
 
 MIDDLEWARE = [
@@ -113,6 +117,11 @@ STORAGES = {
     },
 }
 
+# cache for data derived from the database (e.g. the recent reviews feed)
+# must be shared (e.g. CACHE_URL=redis://host:6379/0, needs the redis package) when
+# several processes serve requests, the per process default is for local runs and tests
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -169,7 +178,9 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
 ]
-CORS_EXPOSE_HEADERS = ["Content-Type", "X-CSRFToken"]
+CORS_EXPOSE_HEADERS = ["Content-Type", "X-CSRFToken", "ETag", "Last-Modified"]
+# conditional GETs, see versions.conditional
+CORS_ALLOW_HEADERS = [*default_headers, "if-none-match", "if-modified-since"]
 CORS_ALLOW_CREDENTIALS = True
 
 # email settings
@@ -183,7 +194,58 @@ EMAIL_USE_SSL = False
 
 # rest config
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "fizzgrid.streaming.NDJSONRenderer",
+    ],
     "TEST_REQUEST_RENDERER_CLASSES": [
         "rest_framework.renderers.MultiPartRenderer",
-    ]
+    ],
 }
+
+# unpaginated lists, see fizzgrid.streaming
+# JSON lists longer than this are rejected, format=ndjson streams any length
+LIST_MAX_ROWS = 10_000
+# rows read from the database cursor (and written to the response) at a time
+LIST_STREAM_CHUNK_SIZE = 2000
+
+# image uploads
+# validated uploads are spooled to local disk and written to storage by a worker pool
+IMAGE_UPLOAD_ASYNC = True
+IMAGE_UPLOAD_WORKERS = 4
+IMAGE_SPOOL_DIR = env("IMAGE_SPOOL_DIR", default=str(BASE_DIR / "spool"))
+# images still pending this long (seconds) are retried or failed by sweep_pending_images,
+# which must see the spool directory of every web process (one host or a shared volume)
+IMAGE_PENDING_TIMEOUT = 60 * 60
+
+# uploads are validated while they stream in, see fizzgrid.uploads
+IMAGE_UPLOAD_MAX_BYTES = 15 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+IMAGE_UPLOAD_MAX_REQUEST_BYTES = 6 * IMAGE_UPLOAD_MAX_BYTES
+
+# search as you type, see search.index
+# workers check for name changes at most this often (seconds)
+SEARCH_SUGGEST_REFRESH_INTERVAL = 1.0
+# changes are kept this long (seconds) by prune_suggest_changes, idle workers rebuild
+SEARCH_SUGGEST_RETENTION = 24 * 60 * 60
+
+# home timelines, see reviews.timeline
+# reviews are copied to at most this many followers, authors with more are read on load
+TIMELINE_FAN_OUT_MAX_FOLLOWERS = 1000
+# latest reviews copied into the follower's timeline on a new follow
+TIMELINE_BACKFILL_REVIEWS = 50
+
+# global recent reviews feed, see reviews.recent
+# latest reviews kept serialized in the cache, feed pages past them are queried
+RECENT_REVIEWS_WINDOW = 500
+# seconds a window is kept, created and deleted reviews are applied to it right away,
+# counters are refreshed when it expires
+RECENT_REVIEWS_TIMEOUT = 60
+
+# ids of each kind one /viewer-state/ request may ask about, about a page of cards
+VIEWER_STATE_MAX_IDS = 100
+
+# public url prefix for stored media (e.g. a CDN), see fizzgrid.media_urls
+# defaults to the storage's own url without query string auth
+MEDIA_PUBLIC_BASE_URL = env("MEDIA_PUBLIC_BASE_URL", default=None)
@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Shared worker pool for storage writes, created on first use
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_UPLOAD_WORKERS,
+                thread_name_prefix="storage-writer",
+            )
+
+    return _executor
+
+
+def spool_path(name):
+    """
+    Path of name in the local spool directory
+    """
+    return os.path.join(settings.IMAGE_SPOOL_DIR, name)
+
+
+def spool(upload):
+    """
+    Copy validated upload to the local spool directory so it outlives the request
+    Returns the spooled file path
+    """
+    os.makedirs(settings.IMAGE_SPOOL_DIR, exist_ok=True)
+
+    _, extension = os.path.splitext(upload.name)
+    path = spool_path(f"{uuid.uuid4()}{extension}")
+
+    with open(path, "wb") as file:
+        for chunk in upload.chunks():
+            file.write(chunk)
+
+    return path
+
+
+def discard(paths):
+    """
+    Remove spooled files, missing ones are ignored
+    """
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _run(job, args):
+    try:
+        job(*args)
+    except Exception:
+        logger.exception("Storage write %s failed", job.__name__)
+    finally:
+        # worker threads hold their own database connections
+        close_old_connections()
+
+
+def submit(job, *args):
+    """
+    Run job(*args) on the worker pool once the current transaction commits
+    Runs inline instead when IMAGE_UPLOAD_ASYNC is off (tests, management commands)
+    """
+
+    def start():
+        if settings.IMAGE_UPLOAD_ASYNC:
+            get_executor().submit(_run, job, args)
+        else:
+            job(*args)
+
+    transaction.on_commit(start)
+
+
+def wait():
+    """
+    Block until queued writes finish, for management commands that exit afterwards
+    """
+    global _executor
+
+    with _executor_lock:
+        executor, _executor = _executor, None
+
+    if executor is not None:
+        executor.shutdown(wait=True)
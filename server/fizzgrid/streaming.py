@@ -0,0 +1,126 @@
+import json
+from datetime import datetime
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept format=ndjson (or Accept: application/x-ndjson)
+    List views stream their rows themselves, see list_response, anything else rendered
+    with it (e.g. errors) is one line
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return (row_encoder()(data) + "\n").encode()
+
+
+def wants_ndjson(request):
+    """
+    Check if request negotiated the NDJSON format
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+
+    return renderer is not None and renderer.format == NDJSONRenderer.format
+
+
+def row_encoder():
+    """
+    Compact JSON encoder for rows, datetimes are formatted like serializers do
+    (ISO 8601 in the current time zone, UTC as Z)
+    """
+    zone = timezone.get_current_timezone()
+
+    def default(value):
+        if isinstance(value, datetime):
+            value = value.astimezone(zone).isoformat()
+
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+
+            return value
+
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+    return json.JSONEncoder(
+        separators=(",", ":"), ensure_ascii=False, default=default
+    ).encode
+
+
+def stream_rows(queryset, fields, row=None):
+    """
+    Encode queryset.values(*fields) as NDJSON lines, reading chunks from a database
+    cursor so memory does not grow with the number of rows
+    row optionally turns each values dict into the output object
+    """
+    encode = row_encoder()
+    chunk_size = settings.LIST_STREAM_CHUNK_SIZE
+    lines = []
+
+    for values in queryset.values(*fields).iterator(chunk_size=chunk_size):
+        lines.append(encode(row(values) if row else values))
+
+        if len(lines) == chunk_size:
+            lines.append("")
+            yield "\n".join(lines)
+            lines = []
+
+    if lines:
+        lines.append("")
+        yield "\n".join(lines)
+
+
+def list_response(
+    request,
+    key,
+    queryset,
+    serializer_class,
+    row=None,
+    fields=None,
+    extra=None,
+    serialize=None,
+):
+    """
+    JsonResponse {key: [serialized objects]} of queryset, or an NDJSON stream of the
+    same objects, one per line, when the request asks for format=ndjson
+    The stream reads values rather than model instances, fields defaults to the
+    serializer's fields, which must then be model field attnames (e.g. drink_id), row
+    builds the serializer's output from the values of fields otherwise, extra keys are
+    only added to the JSON response and serialize optionally replaces the serializer
+    there (a function of the list of objects)
+    The JSON list is limited to LIST_MAX_ROWS objects, longer lists are rejected and
+    must be paginated or streamed
+    """
+    if wants_ndjson(request):
+        return StreamingHttpResponse(
+            stream_rows(queryset, fields or serializer_class.Meta.fields, row),
+            content_type=NDJSON_MEDIA_TYPE,
+        )
+
+    maximum = settings.LIST_MAX_ROWS
+    objects = list(queryset[: maximum + 1]) if maximum else list(queryset)
+
+    if maximum and len(objects) > maximum:
+        return JsonResponse(
+            {
+                "detail": f"More than {maximum} results, paginate or use format=ndjson",
+            },
+            status=400,
+        )
+
+    if serialize is None:
+        data = serializer_class(objects, many=True).data
+    else:
+        data = serialize(objects)
+
+    return JsonResponse({key: data, **(extra or {})})
@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+from io import BytesIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+
+def create_test_image(
+    name="image.jpg", size=(1200, 900), image_format="JPEG", orientation=None
+):
+    """
+    Uploadable image file with camera exif, optionally with an exif orientation
+    """
+    exif = Image.Exif()
+    exif[0x010F] = "Test Camera"
+
+    if orientation:
+        exif[0x0112] = orientation
+
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(buffer, image_format, exif=exif)
+
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type=f"image/{image_format.lower()}"
+    )
+
+
+class TemporaryStorageMixin:
+    """
+    Test case mixin storing files on a temporary filesystem storage instead of S3
+    Storage writes run inline when the transaction commits, capture them with
+    captureOnCommitCallbacks(execute=True)
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.storage_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_dir, ignore_errors=True)
+
+        storage_settings = override_settings(
+            IMAGE_UPLOAD_ASYNC=False,
+            IMAGE_SPOOL_DIR=f"{self.storage_dir}/spool",
+            STORAGES={
+                "default": {
+                    "BACKEND": "django.core.files.storage.FileSystemStorage",
+                    "OPTIONS": {
+                        "location": self.storage_dir,
+                        "base_url": "https://media.example.com/",
+                    },
+                },
+                "staticfiles": {
+                    "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+                },
+            },
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
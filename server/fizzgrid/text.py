@@ -0,0 +1,35 @@
+import re
+import unicodedata
+
+
+def normalize(text):
+    """
+    Lowercase words without accents or punctuation, joined by single spaces
+    For matching names however they were typed ("Coca-Cola" and "coca cola" are equal)
+    """
+    text = text.casefold()
+
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in text if not unicodedata.combining(char))
+
+    return " ".join(re.findall(r"[^\W_]+", text))
+
+
+def name_key(text):
+    """
+    normalize(text), or the casefolded text when it has no letters or digits (e.g.
+    "!!!"), so only blank names get an empty key
+    """
+    return normalize(text) or text.strip().casefold()
+
+
+# C0 control characters but tab, newline and carriage return
+CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+
+def strip_control(text):
+    """
+    Remove control characters from user text, keeping tabs and line breaks
+    """
+    return CONTROL_CHARACTERS.sub("", text)
@@ -0,0 +1,169 @@
+import hashlib
+from io import BytesIO
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import JsonResponse
+from PIL import Image
+
+# leading bytes of each accepted image format
+IMAGE_SIGNATURES = [
+    b"\xff\xd8\xff",  # jpeg
+    b"\x89PNG\r\n\x1a\n",  # png
+    b"GIF87a",
+    b"GIF89a",
+]
+
+# bytes needed to recognise every signature, webp is RIFF....WEBP
+SIGNATURE_LENGTH = 12
+
+# image headers (including exif) must be parsed within this many bytes
+MAX_HEADER_BYTES = 512 * 1024
+
+
+def has_image_signature(data):
+    """
+    Check leading bytes against accepted image formats
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return True
+
+    return any(data.startswith(signature) for signature in IMAGE_SIGNATURES)
+
+
+class UploadRejected(Exception):
+    def __init__(self, detail, status):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    Validate image uploads while the multipart body streams in
+
+    Checks the signature and image header of each file as its first chunks arrive,
+    enforces byte and pixel limits and hashes the content on the fly. A bad upload stops
+    parsing without reading the rest of the body, the reason is kept on
+    request.upload_rejection. Must run before the handlers that store the file.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+
+        self.max_bytes = settings.IMAGE_UPLOAD_MAX_BYTES
+        self.max_pixels = settings.IMAGE_UPLOAD_MAX_PIXELS
+
+        request.upload_rejection = None
+        request.upload_info = {}
+
+    def reject(self, detail, status=400):
+        self.request.upload_rejection = UploadRejected(detail, status)
+
+        raise StopUpload(connection_reset=True)
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        # whole body can not fit the per request limit
+        if content_length > settings.IMAGE_UPLOAD_MAX_REQUEST_BYTES:
+            self.request.upload_rejection = UploadRejected("Upload is too large", 413)
+
+            # nothing has been read, skip parsing entirely
+            return {}, {}
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+
+        self.size = 0
+        self.header = b""
+        self.image_info = None
+        self.hash = hashlib.sha256()
+
+        if self.content_length and self.content_length > self.max_bytes:
+            self.reject("Image is too large", 413)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+
+        if self.size > self.max_bytes:
+            self.reject("Image is too large", 413)
+
+        self.hash.update(raw_data)
+
+        if self.image_info is None:
+            self.header += raw_data
+            self.check_header()
+
+        return raw_data
+
+    def check_header(self):
+        """
+        Parse the image header from the bytes received so far
+        """
+        if len(self.header) >= SIGNATURE_LENGTH and not has_image_signature(
+            self.header
+        ):
+            self.reject("Files must be images")
+
+        try:
+            # only reads the header, pixel data is never decoded here
+            image = Image.open(BytesIO(self.header))
+        except Image.DecompressionBombError:
+            self.reject("Image has too many pixels")
+        except Exception:
+            # header not complete yet
+            if len(self.header) > MAX_HEADER_BYTES:
+                self.reject("Files must be images")
+            return
+
+        width, height = image.size
+
+        if width * height > self.max_pixels:
+            self.reject("Image has too many pixels")
+
+        self.image_info = {"format": image.format, "width": width, "height": height}
+        self.header = b""
+
+    def file_complete(self, file_size):
+        # file ended before a header could be parsed
+        if self.image_info is None:
+            self.reject("Files must be images")
+
+        self.request.upload_info.setdefault(self.field_name, []).append(
+            {**self.image_info, "sha256": self.hash.hexdigest()}
+        )
+
+        # let the next handler build the uploaded file
+        return None
+
+
+class ImageUploadMixin:
+    """
+    APIView mixin validating every uploaded file as an image while the body streams in
+    Views call check_uploads(request) before using request.FILES
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers.insert(0, ImageUploadHandler(request))
+
+        return super().initialize_request(request, *args, **kwargs)
+
+    def check_uploads(self, request):
+        """
+        Returns an error response if an upload was rejected, otherwise sets content_hash,
+        image_format, width and height on each uploaded file and returns None
+        """
+        files = request.FILES
+        rejection = request._request.upload_rejection
+
+        if rejection:
+            return JsonResponse({"detail": rejection.detail}, status=rejection.status)
+
+        for field_name, infos in request._request.upload_info.items():
+            for upload, info in zip(files.getlist(field_name), infos):
+                upload.content_hash = info["sha256"]
+                upload.image_format = info["format"]
+                upload.width = info["width"]
+                upload.height = info["height"]
+
+        return None
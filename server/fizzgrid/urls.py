@@ -8,6 +8,7 @@ from django.contrib import admin
 from django.shortcuts import render
 from django.urls import path, include
 
+from profiles.views import ViewerState
 from . import views
 
 # index view to render react app
@@ -20,5 +21,7 @@ urlpatterns = [
     path('drinks/', include(('drinks.urls', 'drinks'), namespace='drinks')),
     path('profiles/', include(('profiles.urls', 'profiles'), namespace='profiles')),
     path('issues/', include(('issues.urls', 'issues'), namespace='issues')),
+    path('search/', include(('search.urls', 'search'), namespace='search')),
+    path('viewer-state/', ViewerState.as_view(), name='viewer_state'),
     path('csrf/', views.get_csrf)
 ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0002_alter_follow_follower_alter_follow_following"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="profile_img_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-18 15:36
+
+from django.db import migrations, models
+from fizzgrid.db import delete_duplicates
+
+
+def delete_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model("profiles", "Follow")
+    delete_duplicates(Follow, ["follower", "following"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0003_profile_profile_img_renditions"),
+    ]
+
+    operations = [
+        # keep the oldest of any duplicate rows so the constraints can be added
+        migrations.RunPython(delete_duplicate_follows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="follow",
+            constraint=models.UniqueConstraint(
+                fields=("follower", "following"), name="unique_follow"
+            ),
+        ),
+    ]
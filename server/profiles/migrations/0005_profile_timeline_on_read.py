@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0004_unique_constraints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="timeline_on_read",
+            field=models.BooleanField(default=False),
+        ),
+    ]
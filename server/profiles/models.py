@@ -16,8 +16,20 @@ class Profile(models.Model):
     # profile picture
     profile_img = models.ImageField(blank=True, upload_to=create_profile_img_filename)
 
+    # resized copies, see fizzgrid.images.create_renditions
+    profile_img_renditions = models.JSONField(default=dict, blank=True)
+
+    # too many followers to copy reviews into their timelines, followers read this
+    # profile's reviews when loading their timeline instead, see reviews.timeline
+    timeline_on_read = models.BooleanField(default=False)
+
 # follow
 class Follow(models.Model):
     following = models.ForeignKey(Profile, related_name="following", on_delete=models.CASCADE)
     follower = models.ForeignKey(Profile, related_name="follower", on_delete=models.CASCADE)
-    date_created = models.DateTimeField()
\ No newline at end of file
+    date_created = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'following'], name='unique_follow'),
+        ]
\ No newline at end of file
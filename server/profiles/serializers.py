@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from fizzgrid.images import rendition_urls
+from fizzgrid.media_urls import public_url
 from .models import Profile, Follow
 from django.contrib.auth.models import User
 
@@ -6,16 +8,20 @@ from django.contrib.auth.models import User
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
-        fields = ["id", "user_id", "profile_img"]
+        fields = ["id", "user_id", "profile_img", "profile_img_srcset"]
 
     profile_img = serializers.SerializerMethodField()
+    profile_img_srcset = serializers.SerializerMethodField()
 
     def get_profile_img(self, obj):
         if obj.profile_img:
-            return obj.profile_img.url.split("?")[0]
+            return public_url(obj.profile_img.name)
         else:
             return None
 
+    def get_profile_img_srcset(self, obj):
+        return rendition_urls(obj.profile_img_renditions)
+
 
 class FollowSerializer(serializers.ModelSerializer):
     class Meta:
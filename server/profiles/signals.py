@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from fizzgrid.deletion import bulk_delete
+from tombstones.reaper import bury, image_names
+from .models import Profile
+
+
+@receiver(post_delete, sender=Profile)
+def bury_profile_img_files(sender, instance, **kwargs):
+    """
+    Delete the profile image and rendition files once the profile delete commits
+    """
+    bury(image_names(instance.profile_img.name, instance.profile_img_renditions))
+
+
+@receiver(bulk_delete, sender=Profile)
+def bury_profile_imgs_files(sender, queryset, **kwargs):
+    """
+    Delete the fast deleted profiles' image files once the delete commits
+    """
+    bury(
+        [
+            name
+            for profile_img, renditions in queryset.values_list(
+                "profile_img", "profile_img_renditions"
+            )
+            for name in image_names(profile_img, renditions)
+        ]
+    )
@@ -1,8 +1,16 @@
 import json
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, get_user as auth_get_user
+from fizzgrid.testing import TemporaryStorageMixin, create_test_image
+from drinks.models import Drink, DrinkFavorite, DrinkStats
+from reviews.counters import reconcile_counters
+from reviews.models import Comment, CommentLike, Review, ReviewLike
 from .models import Follow, Profile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 
@@ -129,7 +137,8 @@ class TestLoginPOST(APITestCase):
         profile_data = response_json["profile"]
 
         self.assertSetEqual(
-            set(["id", "user_id", "profile_img"]), set(profile_data.keys())
+            set(["id", "user_id", "profile_img", "profile_img_srcset"]),
+            set(profile_data.keys()),
         )
         self.assertDictContainsSubset(self.profile_data, profile_data)
         self.assertDictEqual(self.user_data, user_data)
@@ -217,14 +226,17 @@ class TestAuthProfileDetailGET(APITestCase):
 
         self.assertEqual(200, response.status_code)
         self.assertSetEqual(
-            set(["id", "user_id", "profile_img"]), set(profile_data.keys())
+            set(["id", "user_id", "profile_img", "profile_img_srcset"]),
+            set(profile_data.keys()),
         )
         self.assertDictContainsSubset(self.profile_data, profile_data)
         self.assertDictEqual(self.user_data, user_data)
 
 
-class TestAuthProfileDetailPUT(APITestCase):
+class TestAuthProfileDetailPUT(TemporaryStorageMixin, APITestCase):
     def setUp(self):
+        super().setUp()
+
         # client
         self.client = APIClient()
 
@@ -445,7 +457,25 @@ class TestAuthProfileDetailPUT(APITestCase):
         self.assertIsNotNone(user)
 
     def test_update_image(self):
-        pass
+        # login
+        self.client.login(username=self.profile_username, password=self.profile_pass)
+
+        # request
+        body = {"password": self.profile_pass, "image": create_test_image()}
+        response = self.client.put(self.url, body, format="multipart")
+        response_json = json.loads(response.content)
+        profile_data = response_json["profile"]
+
+        self.assertEqual(200, response.status_code)
+        self.assertIsNotNone(profile_data["profile_img"])
+        self.assertSetEqual(
+            {"thumb", "medium"}, set(profile_data["profile_img_srcset"].keys())
+        )
+
+        profile = Profile.objects.get(user_id=self.profile_user.pk)
+
+        self.assertTrue(profile.profile_img)
+        self.assertEqual(640, profile.profile_img_renditions["medium"]["width"])
 
     def test_update_all(self):
         # login
@@ -460,7 +490,8 @@ class TestAuthProfileDetailPUT(APITestCase):
         # check response
         self.assertEqual(200, response.status_code)
         self.assertSetEqual(
-            set(["id", "user_id", "profile_img"]), set(profile_data.keys())
+            set(["id", "user_id", "profile_img", "profile_img_srcset"]),
+            set(profile_data.keys()),
         )
 
         expected_user = {
@@ -556,6 +587,72 @@ class TestAuthProfileDetailDELETE(APITestCase):
 
         self.assertFalse(auth_get_user(self.client).is_authenticated)
 
+    def test_delete_cascade(self):
+        profile = Profile.objects.get()
+        other = Profile.objects.create(user=User.objects.create(username="other"))
+        drink = Drink.objects.create(product_name="Product", brand_name="Brand")
+
+        # the user's review, liked and commented on by the other profile
+        review = Review.objects.create(
+            profile=profile,
+            drink=drink,
+            review_text="Review text",
+            rating=4,
+            date_created=timezone.now(),
+        )
+        comment = Comment.objects.create(
+            review=review,
+            profile=other,
+            comment_text="Comment text",
+            date_created=timezone.now(),
+        )
+        ReviewLike.objects.create(review=review, profile=other)
+        CommentLike.objects.create(comment=comment, profile=other)
+
+        # the other profile's review, liked by the user
+        other_review = Review.objects.create(
+            profile=other,
+            drink=drink,
+            review_text="Review text",
+            rating=2,
+            date_created=timezone.now(),
+        )
+        ReviewLike.objects.create(review=other_review, profile=profile)
+        Comment.objects.create(
+            review=other_review,
+            profile=profile,
+            comment_text="Comment text",
+            date_created=timezone.now(),
+        )
+        reconcile_counters()
+        Follow.objects.create(
+            follower=profile, following=other, date_created=timezone.now()
+        )
+        Follow.objects.create(
+            follower=other, following=profile, date_created=timezone.now()
+        )
+
+        # login
+        self.client.login(username=self.profile_username, password=self.profile_pass)
+
+        response = self.client.delete(
+            self.url, {"password": self.profile_pass}, format="multipart"
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual([other.pk], [p.pk for p in Profile.objects.all()])
+        self.assertListEqual([other_review.pk], [r.pk for r in Review.objects.all()])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(ReviewLike.objects.exists())
+        self.assertFalse(CommentLike.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(1, DrinkStats.objects.get(drink=drink).review_count)
+
+        # the other review's counters lose the user's like and comment
+        other_review.refresh_from_db()
+        self.assertEqual(0, other_review.like_count)
+        self.assertEqual(0, other_review.comment_count)
+
 
 class TestProfileDetailGET(APITestCase):
     def setUp(self):
@@ -588,7 +685,8 @@ class TestProfileDetailGET(APITestCase):
 
         self.assertEqual(200, response.status_code)
         self.assertSetEqual(
-            set(["id", "user_id", "profile_img"]), set(profile_data.keys())
+            set(["id", "user_id", "profile_img", "profile_img_srcset"]),
+            set(profile_data.keys()),
         )
         self.assertDictEqual({"username": self.profile_username}, user_data)
 
@@ -784,7 +882,17 @@ class TestProfileDetailPOST(APITestCase):
         self.assertEqual(1, len(Profile.objects.all()))
 
     def test_reject_non_image(self):
-        pass
+        # request with a text file named like an image
+        body = {
+            **self.data,
+            "image": SimpleUploadedFile("image.png", b"not an image" * 100),
+        }
+
+        response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(1, len(User.objects.all()))
+        self.assertEqual(1, len(Profile.objects.all()))
 
     def test_create_profile(self):
         # request
@@ -796,7 +904,8 @@ class TestProfileDetailPOST(APITestCase):
         # check response
         self.assertEqual(200, response.status_code)
         self.assertSetEqual(
-            set(["id", "user_id", "profile_img"]), set(profile_data.keys())
+            set(["id", "user_id", "profile_img", "profile_img_srcset"]),
+            set(profile_data.keys()),
         )
         self.assertDictEqual(
             {"username": self.data["username"], "email": self.data["email"]}, user_data
@@ -844,6 +953,7 @@ class TestProfileListGET(APITestCase):
                         "id": profile.pk,
                         "user_id": user.pk,
                         "profile_img": None,
+                        "profile_img_srcset": {},
                     },
                     "user": {"username": user.username},
                 }
@@ -866,6 +976,7 @@ class TestProfileListGET(APITestCase):
                         "id": profile.pk,
                         "user_id": user.pk,
                         "profile_img": None,
+                        "profile_img_srcset": {},
                     },
                     "user": {"username": user.username},
                 }
@@ -919,6 +1030,30 @@ class TestProfileListGET(APITestCase):
 
         self.assertListEqual(self.profiles[:10], profile_list)
 
+    def test_get_cursor(self):
+        response = self.client.get("/profiles/?limit=10&count=true")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response_json["num_pages"])
+        self.assertListEqual(self.profiles[:10], response_json["profiles"])
+
+        response = self.client.get(
+            f"/profiles/?limit=10&cursor={response_json['next_cursor']}"
+        )
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual(self.profiles[10:], response_json["profiles"])
+        self.assertIsNone(response_json["next_cursor"])
+
+    def test_get_cursor_search(self):
+        response = self.client.get("/profiles/?search=special&limit=5")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual(self.profiles[10:15], response_json["profiles"])
+
 
 class TestFollowDetailPOST(APITestCase):
     def setUp(self):
@@ -1187,3 +1322,132 @@ class TestFollowListGET(APITestCase):
 
         self.assertEqual(200, response.status_code)
         self.assertListEqual(self.follow_data, follow_list)
+
+
+class TestViewerStateGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        # viewer and another profile
+        self.username = "viewer"
+        self.password = "viewerpass123"
+        user = User(username=self.username)
+        user.set_password(self.password)
+        user.save()
+        viewer = Profile.objects.create(user=user)
+        other = Profile.objects.create(user=User.objects.create(username="other"))
+        self.profiles = [viewer, other]
+
+        # drinks, reviews and comments
+        self.drinks = [
+            Drink.objects.create(product_name=f"Product {i}", brand_name="Brand")
+            for i in range(3)
+        ]
+        self.reviews = [
+            Review.objects.create(
+                profile=other,
+                drink=drink,
+                review_text="Review text",
+                rating=4,
+                date_created=timezone.now(),
+            )
+            for drink in self.drinks
+        ]
+        self.comments = [
+            Comment.objects.create(
+                review=review,
+                profile=other,
+                comment_text="Comment text",
+                date_created=timezone.now(),
+            )
+            for review in self.reviews
+        ]
+
+        # the viewer favorited, liked and followed the first of each
+        now = timezone.now()
+        DrinkFavorite.objects.create(
+            profile=viewer, drink=self.drinks[0], date_created=now
+        )
+        ReviewLike.objects.create(profile=viewer, review=self.reviews[0])
+        CommentLike.objects.create(profile=viewer, comment=self.comments[0])
+        Follow.objects.create(follower=viewer, following=other, date_created=now)
+
+        # the other profile did everything, none of it is the viewer's
+        DrinkFavorite.objects.create(
+            profile=other, drink=self.drinks[1], date_created=now
+        )
+        ReviewLike.objects.create(profile=other, review=self.reviews[1])
+        Follow.objects.create(follower=other, following=viewer, date_created=now)
+
+        self.url = "/viewer-state/"
+
+    def ids(self, objs):
+        return ",".join(str(obj.pk) for obj in objs)
+
+    def test_reject_no_user(self):
+        response = self.client.get(f"{self.url}?drinks=1")
+
+        self.assertEqual(403, response.status_code)
+
+    def test_get(self):
+        self.client.login(username=self.username, password=self.password)
+
+        url = (
+            f"{self.url}?drinks={self.ids(self.drinks)}"
+            f"&reviews={self.ids(self.reviews)}&comments={self.ids(self.comments)}"
+            f"&profiles={self.ids(self.profiles)}"
+        )
+
+        # one query per relation
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertDictEqual(
+            {
+                "favorited_drinks": [self.drinks[0].pk],
+                "liked_reviews": [self.reviews[0].pk],
+                "liked_comments": [self.comments[0].pk],
+                "followed_profiles": [self.profiles[1].pk],
+            },
+            json.loads(response.content),
+        )
+        for model in (DrinkFavorite, ReviewLike, CommentLike, Follow):
+            table = f'FROM "{model._meta.db_table}"'
+            self.assertEqual(1, len([q for q in queries if table in q["sql"]]))
+
+    def test_get_some(self):
+        self.client.login(username=self.username, password=self.password)
+
+        response = self.client.get(f"{self.url}?reviews={self.ids(self.reviews[1:])}")
+
+        self.assertEqual(200, response.status_code)
+        self.assertDictEqual(
+            {
+                "favorited_drinks": [],
+                "liked_reviews": [],
+                "liked_comments": [],
+                "followed_profiles": [],
+            },
+            json.loads(response.content),
+        )
+
+    @override_settings(VIEWER_STATE_MAX_IDS=2)
+    def test_reject_bad_ids(self):
+        self.client.login(username=self.username, password=self.password)
+
+        response = self.client.get(f"{self.url}?drinks=1,a")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(
+            "drinks must be comma separated integers",
+            json.loads(response.content)["detail"],
+        )
+
+        response = self.client.get(f"{self.url}?reviews=1,2,3")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(
+            "reviews can have at most 2 ids", json.loads(response.content)["detail"]
+        )
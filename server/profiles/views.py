@@ -15,6 +15,22 @@ from .serializers import (
 )
 from .models import Profile, Follow
 from django.core.paginator import Paginator
+from django.conf import settings
+from django.db import transaction
+from drinks.stats import rebuild_drink_stats
+from drinks.models import DrinkFavorite
+from reviews import timeline
+from reviews.counters import reconcile_counters
+from reviews.recent import forget_window
+from reviews.models import Comment, CommentLike, Review, ReviewLike
+from fizzgrid.images import create_renditions
+from fizzgrid.db import delete_returning, insert_unique
+from fizzgrid.deletion import fast_delete
+from fizzgrid.pagination import is_cursor_request, paginate_request
+from fizzgrid.streaming import list_response
+from fizzgrid.uploads import ImageUploadMixin
+from tombstones.reaper import bury, image_names, reap_soon
+from versions.conditional import conditional
 from rest_framework.decorators import api_view, parser_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny, BasePermission
 from django.contrib.auth.password_validation import validate_password
@@ -32,6 +48,25 @@ def validate_username(username):
         raise ValidationError("Username must be made up of a-z, 1-9, _")
 
 
+def parse_ids(value, name):
+    """
+    Parse comma separated ids query param, raises ValueError if not integers or more
+    than VIEWER_STATE_MAX_IDS
+    """
+    if not value:
+        return []
+
+    try:
+        ids = {int(part) for part in value.split(",")}
+    except ValueError:
+        raise ValueError(f"{name} must be comma separated integers")
+
+    if len(ids) > settings.VIEWER_STATE_MAX_IDS:
+        raise ValueError(f"{name} can have at most {settings.VIEWER_STATE_MAX_IDS} ids")
+
+    return sorted(ids)
+
+
 def format_user_profile(user, profile, limited=True):
     if limited:
         return {
@@ -91,13 +126,14 @@ class IsAuthenticatedOrPost(BasePermission):
             return request.user and request.user.is_authenticated
 
 
-class AuthenticatedProfileDetail(APIView):
+class AuthenticatedProfileDetail(ImageUploadMixin, APIView):
     """
     Detail authenticated user
     """
 
     permission_classes = [IsAuthenticatedOrPost]
 
+    @conditional(Profile, User)
     def get(self, request):
         """
         Get authenticated user
@@ -127,6 +163,12 @@ class AuthenticatedProfileDetail(APIView):
                 {"detail": "Log out before creating new user"}, status=403
             )
 
+        # image is validated while the body streams in
+        error = self.check_uploads(request)
+
+        if error:
+            return error
+
         # get request data
         email = request.data.get("email")
         username = request.data.get("username")
@@ -175,6 +217,13 @@ class AuthenticatedProfileDetail(APIView):
         user.save()
         profile.save()
 
+        # resized copies for list views
+        if profile_img:
+            profile.profile_img_renditions = create_renditions(
+                profile_img, profile.profile_img.name
+            )
+            profile.save(update_fields=["profile_img_renditions"])
+
         # login
         user = authenticate(username=username, password=password)
 
@@ -200,6 +249,12 @@ class AuthenticatedProfileDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=401
             )
 
+        # image is validated while the body streams in
+        error = self.check_uploads(request)
+
+        if error:
+            return error
+
         # get request data
         email = request.data.get("email")
         username = request.data.get("username")
@@ -269,8 +324,22 @@ class AuthenticatedProfileDetail(APIView):
                 return JsonResponse({"detail": str(e)}, status=400)
 
         if profile_img:
+            old_names = image_names(
+                profile.profile_img.name, profile.profile_img_renditions
+            )
+
             profile.profile_img = profile_img
-            profile.profile_img.save()
+            profile.save()
+
+            # resized copies for list views, replacing the old ones
+            profile.profile_img_renditions = create_renditions(
+                profile_img, profile.profile_img.name
+            )
+            profile.save(update_fields=["profile_img_renditions"])
+
+            # replaced files
+            bury(old_names)
+            reap_soon()
 
         user.save()
 
@@ -304,8 +373,51 @@ class AuthenticatedProfileDetail(APIView):
 
         data = format_user_profile(user, profile)
 
+        # drinks whose stats lose this profile's reviews, favorites and likes
+        drink_ids = set(
+            Review.objects.filter(profile_id=profile.pk).values_list(
+                "drink_id", flat=True
+            )
+        )
+        drink_ids.update(
+            DrinkFavorite.objects.filter(profile_id=profile.pk).values_list(
+                "drink_id", flat=True
+            )
+        )
+        drink_ids.update(
+            ReviewLike.objects.filter(profile_id=profile.pk).values_list(
+                "review__drink_id", flat=True
+            )
+        )
+
+        # others' reviews and comments whose counters lose this profile's likes and
+        # comments
+        review_ids = set(
+            ReviewLike.objects.filter(profile_id=profile.pk).values_list(
+                "review_id", flat=True
+            )
+        )
+        review_ids.update(
+            Comment.objects.filter(profile_id=profile.pk).values_list(
+                "review_id", flat=True
+            )
+        )
+        comment_ids = list(
+            CommentLike.objects.filter(profile_id=profile.pk).values_list(
+                "comment_id", flat=True
+            )
+        )
+
         logout(request)
-        user.delete()
+
+        with transaction.atomic():
+            fast_delete(User.objects.filter(pk=user.pk))
+            rebuild_drink_stats(list(drink_ids))
+            reconcile_counters(list(review_ids), comment_ids)
+            reap_soon()
+
+            # their reviews leave the recent feed
+            transaction.on_commit(forget_window)
 
         return JsonResponse({"profile": data})
 
@@ -317,6 +429,7 @@ class ProfileDetail(APIView):
 
     parser_classes = [MultiPartParser]
 
+    @conditional(Profile, User)
     def get(self, request, profile_id):
         """
         Get profile with id profile_id
@@ -340,10 +453,12 @@ class ProfileList(APIView):
     List profiles
     """
 
+    @conditional(Profile, User)
     def get(self, request):
         """
         Get profiles
         Optional query params - page: int, search: string
+        Cursor mode query params - cursor: string, limit: int, count: boolean
         """
         profiles = Profile.objects.all()
 
@@ -356,6 +471,19 @@ class ProfileList(APIView):
         if search:
             users = users.filter(username__icontains=search)
 
+        # cursor pagination, profiles joined in the same query
+        if is_cursor_request(request):
+            try:
+                page_users, pagination = paginate_request(
+                    request, users.select_related("profile"), ["id"], 10
+                )
+            except ValueError as e:
+                return JsonResponse({"detail": str(e)}, status=400)
+
+            response = [format_user_profile(user, user.profile) for user in page_users]
+
+            return JsonResponse({"profiles": response, **pagination})
+
         # set page to 1 if no page provided
         if not page:
             page = 1
@@ -403,24 +531,40 @@ class FollowDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=401
             )
 
-        # check if requested following exists
-        try:
-            Profile.objects.get(pk=following_id)
-        except ObjectDoesNotExist:
-            return JsonResponse(
-                {"detail": f"Profile with id {following_id} not found"},
-                status=404,
-            )
-        current_date = timezone.now()
-
         # check if following and follower are the same
         if profile.pk == following_id:
+            if not Profile.objects.filter(pk=following_id).exists():
+                return JsonResponse(
+                    {"detail": f"Profile with id {following_id} not found"},
+                    status=404,
+                )
+
             return JsonResponse("Profile can not follow themselves", status=406)
 
-        # check if follow relationship already exists
-        if Follow.objects.filter(
-            following_id=following_id, follower_id=profile.pk
-        ).exists():
+        # create follow if requested following exists and is not followed yet
+        with transaction.atomic():
+            follow = insert_unique(
+                Follow,
+                {
+                    "follower_id": profile.pk,
+                    "following_id": following_id,
+                    "date_created": timezone.now(),
+                },
+                exists=(Profile, following_id),
+            )
+
+            # their latest reviews show up in the timeline right away
+            if follow is not None:
+                timeline.backfill(profile.pk, following_id)
+
+        if follow is None:
+            # check if requested following exists
+            if not Profile.objects.filter(pk=following_id).exists():
+                return JsonResponse(
+                    {"detail": f"Profile with id {following_id} not found"},
+                    status=404,
+                )
+
             return JsonResponse(
                 {
                     "detail": f"Profile {profile.pk} already follows profile {following_id}"
@@ -428,13 +572,6 @@ class FollowDetail(APIView):
                 status=409,
             )
 
-        # create follow object
-        follow = Follow(date_created=current_date)
-        follow.follower_id = profile.pk
-        follow.following_id = following_id
-
-        follow.save()
-
         return JsonResponse(FollowSerializer(follow).data)
 
     def delete(self, request, following_id):
@@ -453,14 +590,17 @@ class FollowDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=401
             )
 
-        # check if requested follow exists
-        follow = None
-
-        try:
-            follow = Follow.objects.get(
-                following_id=following_id, follower_id=profile.pk
+        # delete, along with their reviews in the timeline
+        with transaction.atomic():
+            follows = delete_returning(
+                Follow, following_id=following_id, follower_id=profile.pk
             )
-        except ObjectDoesNotExist:
+
+            if follows:
+                timeline.forget(profile.pk, following_id)
+
+        # check if requested follow existed
+        if not follows:
             return JsonResponse(
                 {
                     "detail": f"Profile {profile.pk} is not following profile {following_id}"
@@ -468,12 +608,7 @@ class FollowDetail(APIView):
                 status=404,
             )
 
-        data = FollowSerializer(follow).data
-
-        # delete
-        follow.delete()
-
-        return JsonResponse(data)
+        return JsonResponse(FollowSerializer(follows[0]).data)
 
 
 class FollowList(APIView):
@@ -481,10 +616,11 @@ class FollowList(APIView):
     List follow
     """
 
+    @conditional(Follow, Profile)
     def get(self, request):
         """
         Get follows
-        Optional query params - following: int, follower: int
+        Optional query params - following: int, follower: int, format: ndjson
         """
         follows = Follow.objects.all()
 
@@ -511,4 +647,63 @@ class FollowList(APIView):
 
             follows = follows.filter(follower_id=follower)
 
-        return JsonResponse({"follows": FollowSerializer(follows, many=True).data})
+        return list_response(request, "follows", follows, FollowSerializer)
+
+
+class ViewerState(APIView):
+    """
+    What the authenticated profile did to the cards of a list page
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @conditional(DrinkFavorite, ReviewLike, CommentLike, Follow, Profile)
+    def get(self, request):
+        """
+        Get which of the given drinks the authenticated profile favorited, reviews and
+        comments it liked and profiles it follows
+        Optional query params - drinks: ids, reviews: ids, comments: ids, profiles: ids
+        (comma separated)
+        """
+        user = request.user
+
+        # check user has profile
+        profile = None
+
+        try:
+            profile = Profile.objects.get(user_id=user.pk)
+        except ObjectDoesNotExist:
+            return JsonResponse(
+                {"detail": "User does not have connected profile"}, status=401
+            )
+
+        # one IN query per relation, bounded by the ids asked about
+        relations = [
+            ("drinks", "favorited_drinks", DrinkFavorite, "drink_id", "profile_id"),
+            ("reviews", "liked_reviews", ReviewLike, "review_id", "profile_id"),
+            ("comments", "liked_comments", CommentLike, "comment_id", "profile_id"),
+            ("profiles", "followed_profiles", Follow, "following_id", "follower_id"),
+        ]
+
+        try:
+            ids = {
+                param: parse_ids(request.query_params.get(param), param)
+                for param, *_ in relations
+            }
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+
+        data = {}
+
+        for param, key, model, target, owner in relations:
+            if not ids[param]:
+                data[key] = []
+                continue
+
+            data[key] = sorted(
+                model.objects.filter(
+                    **{owner: profile.pk, f"{target}__in": ids[param]}
+                ).values_list(target, flat=True)
+            )
+
+        return JsonResponse(data)
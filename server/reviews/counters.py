@@ -0,0 +1,64 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Comment, CommentLike, Review, ReviewLike
+
+# (model, counter field, counted model, foreign key of the counted model to model)
+COUNTERS = [
+    (Review, "like_count", ReviewLike, "review"),
+    (Review, "comment_count", Comment, "review"),
+    (Comment, "like_count", CommentLike, "comment"),
+]
+
+
+def change_count(model, pk, field, change):
+    """
+    Add change to a counter with one UPDATE, call in the same transaction as the write
+    it counts, returns the number of rows updated
+    """
+    return model.objects.filter(pk=pk).update(**{field: F(field) + change})
+
+
+def counted(counted_model, foreign_key):
+    """
+    Expression counting counted_model's rows referencing the outer row
+    """
+    rows = (
+        counted_model.objects.filter(**{foreign_key: OuterRef("pk")})
+        .order_by()
+        .values(foreign_key)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+
+    return Coalesce(Subquery(rows), Value(0))
+
+
+def reconcile_counters(review_ids=None, comment_ids=None, batch_size=10_000):
+    """
+    Recount counters that drifted from their tables, with set based UPDATEs that only
+    write the rows whose counter is wrong
+    Only the given reviews and comments if either ids is given, otherwise every row in
+    primary key ranges of batch_size (each range is one short statement)
+    Returns {"Model.field": rows fixed}
+    """
+    ids = {Review: review_ids, Comment: comment_ids}
+    limited = review_ids is not None or comment_ids is not None
+    fixed = {}
+
+    for model, field, counted_model, foreign_key in COUNTERS:
+        actual = counted(counted_model, foreign_key)
+        label = f"{model.__name__}.{field}"
+
+        if limited:
+            rows = model.objects.filter(pk__in=ids[model] or [])
+            fixed[label] = rows.exclude(**{field: actual}).update(**{field: actual})
+            continue
+
+        fixed[label] = 0
+        last = model.objects.order_by("-pk").values_list("pk", flat=True).first()
+
+        for start in range(0, (last or 0) + 1, batch_size):
+            rows = model.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+            fixed[label] += rows.exclude(**{field: actual}).update(**{field: actual})
+
+    return fixed
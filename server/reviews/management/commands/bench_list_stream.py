@@ -0,0 +1,113 @@
+import resource
+import subprocess
+import sys
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.utils import timezone
+from drinks.models import Drink, DrinkStats
+from fizzgrid.deletion import fast_delete
+from profiles.models import Profile
+from reviews.models import Review
+
+BRAND = "Bench List Stream"
+
+
+def peak_rss():
+    # kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark peak RSS of listing every review of a drink as one JSON response "
+        "(LIST_MAX_ROWS disabled) and as an NDJSON stream, each in a fresh process. "
+        "Writes to the configured database, the synthetic data is removed afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reviews", type=int, default=1_000_000)
+        parser.add_argument("--profiles", type=int, default=100)
+        # internal, run one measurement in this process
+        parser.add_argument("--measure", choices=["json", "ndjson"])
+        parser.add_argument("--drink", type=int)
+
+    def handle(self, *args, **options):
+        if options["measure"]:
+            self.measure(options["measure"], options["drink"])
+            return
+
+        drink = self.create_data(options["reviews"], options["profiles"])
+
+        try:
+            for mode in ("json", "ndjson"):
+                subprocess.run(
+                    [
+                        sys.executable,
+                        sys.argv[0],
+                        "bench_list_stream",
+                        f"--measure={mode}",
+                        f"--drink={drink.pk}",
+                    ],
+                    check=True,
+                )
+        finally:
+            fast_delete(Drink.objects.filter(brand_name=BRAND))
+            fast_delete(User.objects.filter(username__startswith="bench-stream-"))
+
+    def measure(self, mode, drink_id):
+        client = Client()
+        url = f"/reviews/?drink={drink_id}"
+
+        if mode == "ndjson":
+            url += "&format=ndjson"
+
+        before = peak_rss()
+        start = time.perf_counter()
+
+        with override_settings(LIST_MAX_ROWS=None):
+            response = client.get(url)
+
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+
+        seconds = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{mode}: {size / 1024 / 1024:.0f} MiB in {seconds:.1f} s, "
+            f"peak RSS {peak_rss() / 1024 / 1024:.0f} MiB "
+            f"({before / 1024 / 1024:.0f} MiB before the request)"
+        )
+
+    def create_data(self, review_count, profile_count):
+        now = timezone.now()
+
+        drink = Drink.objects.create(product_name="Drink", brand_name=BRAND)
+        DrinkStats.objects.create(drink=drink)
+
+        profiles = []
+
+        for i in range(profile_count):
+            user = User.objects.create(username=f"bench-stream-{i}")
+            profiles.append(Profile.objects.create(user=user))
+
+        # in batches, the review objects would take as much memory as the json list
+        for offset in range(0, review_count, 10_000):
+            Review.objects.bulk_create(
+                [
+                    Review(
+                        profile=profiles[i % profile_count],
+                        drink=drink,
+                        review_text=f"Review {i} of a drink, with a few words to it",
+                        rating=i % 5 + 1,
+                        date_created=now - timezone.timedelta(seconds=i),
+                    )
+                    for i in range(offset, min(offset + 10_000, review_count))
+                ],
+                batch_size=1000,
+            )
+
+        return drink
@@ -0,0 +1,118 @@
+import random
+import statistics
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils import timezone
+from drinks.models import Drink, DrinkStats
+from fizzgrid.deletion import fast_delete
+from profiles.models import Profile
+from reviews.models import Review
+from reviews.search import SEARCH_ORDERING, search_reviews
+
+BRAND = "Bench Review Search"
+
+WORDS = [
+    "sweet", "crisp", "flat", "syrupy", "tart", "smooth", "bubbly", "bitter",
+    "cherry", "vanilla", "ginger", "lime", "caramel", "citrus", "herbal", "cream",
+    "aftertaste", "finish", "carbonation", "bottle", "can", "ice", "summer", "classic",
+]  # fmt: skip
+
+# searches as typed on the reviews page
+QUERIES = ["cherry", "ginger lime", '"root beer"', "smooth -flat", "caramel finish"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark review search against the icontains scan on synthetic reviews. "
+        "Writes to the configured database, the synthetic data is removed afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5_000_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--keep", action="store_true", help="keep synthetic reviews after the run"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stderr.write(
+                "Not running on postgres, the search path is the icontains fallback"
+            )
+
+        self.create_reviews(options["rows"])
+
+        try:
+            for name, run in [("icontains", self.icontains), ("search", self.search)]:
+                timings = []
+
+                for _ in range(options["repeat"]):
+                    for query in QUERIES:
+                        start = time.perf_counter()
+                        run(query)
+                        timings.append((time.perf_counter() - start) * 1000)
+
+                timings.sort()
+                p95 = timings[int(len(timings) * 0.95) - 1]
+
+                self.stdout.write(
+                    f"{name}: median {statistics.median(timings):.1f} ms, "
+                    f"p95 {p95:.1f} ms over {len(timings)} searches"
+                )
+        finally:
+            if not options["keep"]:
+                fast_delete(Drink.objects.filter(brand_name=BRAND))
+                fast_delete(User.objects.filter(username="bench-review-search"))
+
+    def create_reviews(self, rows):
+        drink, _ = Drink.objects.get_or_create(product_name="Drink", brand_name=BRAND)
+        DrinkStats.objects.get_or_create(drink=drink)
+
+        user, _ = User.objects.get_or_create(username="bench-review-search")
+        profile, _ = Profile.objects.get_or_create(user=user)
+
+        existing = Review.objects.filter(drink=drink).count()
+        rng = random.Random(0)
+        now = timezone.now()
+        batch = []
+
+        for i in range(existing, rows):
+            # a few hundred words, like real reviews
+            text = " ".join(rng.choices(WORDS, k=rng.randint(20, 300)))
+
+            if i % 50 == 0:
+                text += " tastes like root beer"
+
+            batch.append(
+                Review(
+                    profile=profile,
+                    drink=drink,
+                    review_text=text[:4096],
+                    rating=rng.randint(1, 5),
+                    date_created=now - timezone.timedelta(minutes=i),
+                )
+            )
+
+            if len(batch) == 10_000:
+                Review.objects.bulk_create(batch)
+                batch = []
+
+        Review.objects.bulk_create(batch)
+
+    def icontains(self, query):
+        # ReviewList before full text search
+        reviews = Review.objects.filter(review_text__icontains=query).order_by(
+            "-date_created"
+        )
+
+        page_obj = Paginator(reviews, 6, 4).get_page(1)
+        return list(page_obj.object_list)
+
+    def search(self, query):
+        reviews = search_reviews(Review.objects.all(), query).order_by(*SEARCH_ORDERING)
+
+        page_obj = Paginator(reviews, 6, 4).get_page(1)
+        return list(page_obj.object_list)
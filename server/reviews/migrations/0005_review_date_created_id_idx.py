@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drinks', '0003_alter_drinkfavorite_profile'),
+        ('profiles', '0002_alter_follow_follower_alter_follow_following'),
+        ('reviews', '0004_alter_review_drink_alter_review_profile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-date_created', '-id'], name='review_date_created_id_idx'),
+        ),
+    ]
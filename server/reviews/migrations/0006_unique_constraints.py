@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-18 15:36
+
+from django.db import migrations, models
+from fizzgrid.db import delete_duplicates
+
+
+def delete_duplicate_comment_likes(apps, schema_editor):
+    CommentLike = apps.get_model("reviews", "CommentLike")
+    delete_duplicates(CommentLike, ["comment", "profile"])
+
+
+def delete_duplicate_review_likes(apps, schema_editor):
+    ReviewLike = apps.get_model("reviews", "ReviewLike")
+    delete_duplicates(ReviewLike, ["review", "profile"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0004_unique_constraints"),
+        ("reviews", "0005_review_date_created_id_idx"),
+    ]
+
+    operations = [
+        # keep the oldest of any duplicate rows so the constraints can be added
+        migrations.RunPython(delete_duplicate_comment_likes, migrations.RunPython.noop),
+        migrations.RunPython(delete_duplicate_review_likes, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="commentlike",
+            constraint=models.UniqueConstraint(
+                fields=("comment", "profile"), name="unique_comment_like"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="reviewlike",
+            constraint=models.UniqueConstraint(
+                fields=("review", "profile"), name="unique_review_like"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1 on 2026-10-18 15:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0006_unique_constraints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reviewlike",
+            name="date_created",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
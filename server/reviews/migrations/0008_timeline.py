@@ -0,0 +1,116 @@
+# Generated by Django 5.1 on 2026-10-18 16:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_timelines(apps, schema_editor):
+    Follow = apps.get_model("profiles", "Follow")
+    Review = apps.get_model("reviews", "Review")
+    TimelineEntry = apps.get_model("reviews", "TimelineEntry")
+
+    latest = {}
+
+    for follow in Follow.objects.order_by("id").iterator(2000):
+        # each author's latest reviews, like a new follow
+        if follow.following_id not in latest:
+            latest[follow.following_id] = list(
+                Review.objects.filter(profile_id=follow.following_id)
+                .order_by("-date_created", "-id")
+                .values_list("pk", "date_created")[: settings.TIMELINE_BACKFILL_REVIEWS]
+            )
+
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    profile_id=follow.follower_id,
+                    review_id=review_id,
+                    author_id=follow.following_id,
+                    date_created=date_created,
+                )
+                for review_id, date_created in latest[follow.following_id]
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("drinks", "0013_brands"),
+        ("profiles", "0005_profile_timeline_on_read"),
+        ("reviews", "0007_reviewlike_date_created"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimelineEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date_created", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["profile", "-date_created", "-id"],
+                name="review_profile_date_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="timelineentry",
+            name="author",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="profiles.profile",
+            ),
+        ),
+        migrations.AddField(
+            model_name="timelineentry",
+            name="profile",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="profiles.profile",
+            ),
+        ),
+        migrations.AddField(
+            model_name="timelineentry",
+            name="review",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="reviews.review",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(
+                fields=["profile", "-date_created", "-review"],
+                name="timeline_profile_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="timelineentry",
+            index=models.Index(
+                fields=["profile", "author"], name="timeline_profile_author_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="timelineentry",
+            constraint=models.UniqueConstraint(
+                fields=("profile", "review"), name="unique_timeline_entry"
+            ),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1 on 2026-10-18 16:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Review = apps.get_model("reviews", "Review")
+    ReviewLike = apps.get_model("reviews", "ReviewLike")
+    Comment = apps.get_model("reviews", "Comment")
+    CommentLike = apps.get_model("reviews", "CommentLike")
+
+    # like reviews.counters.reconcile_counters, one UPDATE per counter
+    for model, field, counted_model, foreign_key in [
+        (Review, "like_count", ReviewLike, "review"),
+        (Review, "comment_count", Comment, "review"),
+        (Comment, "like_count", CommentLike, "comment"),
+    ]:
+        rows = (
+            counted_model.objects.filter(**{foreign_key: OuterRef("pk")})
+            .order_by()
+            .values(foreign_key)
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+
+        model.objects.update(**{field: Coalesce(Subquery(rows), Value(0))})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0008_timeline"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="like_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="comment_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="like_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0005_profile_timeline_on_read"),
+        ("reviews", "0009_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["review", "date_created", "id"], name="comment_review_date_idx"
+            ),
+        ),
+    ]
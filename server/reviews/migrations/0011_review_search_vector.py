@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+def create_search_vector(apps, schema_editor):
+    # tsvector only exists on postgres, other databases use the icontains fallback search
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    # generated, so every write path (ORM, bulk, raw SQL) keeps it current
+    schema_editor.execute(
+        "ALTER TABLE reviews_review ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', review_text)) STORED"
+    )
+    schema_editor.execute(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS review_search_vector_idx "
+        "ON reviews_review USING gin (search_vector)"
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS review_search_vector_idx")
+    schema_editor.execute(
+        "ALTER TABLE reviews_review DROP COLUMN IF EXISTS search_vector"
+    )
+
+
+class Migration(migrations.Migration):
+
+    # concurrent index builds can not run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("reviews", "0010_comment_review_date_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
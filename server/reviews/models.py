@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from profiles.models import Profile
 from drinks.models import Drink, DrinkImage
@@ -11,10 +12,30 @@ class Review(models.Model):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name="profile")
     drink = models.ForeignKey(Drink, on_delete=models.CASCADE, related_name="drink")
 
+    # denormalized, see reviews.counters
+    like_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-date_created", "-id"], name="review_date_created_id_idx"
+            ),
+            models.Index(
+                fields=["profile", "-date_created", "-id"], name="review_profile_date_idx"
+            ),
+        ]
+
 # review like
 class ReviewLike(models.Model):
     review = models.ForeignKey(Review, on_delete=models.CASCADE)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
+    date_created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['review', 'profile'], name='unique_review_like'),
+        ]
 
 # comment
 class Comment(models.Model):
@@ -23,12 +44,49 @@ class Comment(models.Model):
     review = models.ForeignKey(Review, on_delete=models.CASCADE)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
 
+    # denormalized, see reviews.counters
+    like_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # a review's thread in date order (either way), see reviews.threads
+            models.Index(
+                fields=["review", "date_created", "id"], name="comment_review_date_idx"
+            ),
+        ]
+
 # comment like
 class CommentLike(models.Model):
     comment = models.ForeignKey(Comment, on_delete=models.CASCADE)
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['comment', 'profile'], name='unique_comment_like'),
+        ]
+
 # review image
 class ReviewImage(models.Model):
     review = models.ForeignKey(Review, on_delete=models.CASCADE)
-    image = models.ForeignKey(DrinkImage, on_delete=models.CASCADE)
\ No newline at end of file
+    image = models.ForeignKey(DrinkImage, on_delete=models.CASCADE)
+
+# home timeline entry, a review by a followed profile copied to the follower when it is
+# posted (or when the follow is made), see reviews.timeline
+class TimelineEntry(models.Model):
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='+')
+    review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='+')
+
+    # review's profile and date, copied so pages are read from this table alone
+    author = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='+')
+    date_created = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['profile', 'review'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['profile', '-date_created', '-review'], name='timeline_profile_date_idx'
+            ),
+            models.Index(fields=['profile', 'author'], name='timeline_profile_author_idx'),
+        ]
@@ -0,0 +1,269 @@
+import math
+import time
+from functools import partial
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from fizzgrid.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    parse_limit,
+    wants_count,
+)
+from .models import Review
+from .serializers import ReviewSerializer
+
+# the window lives in the default cache, which must be shared (CACHE_URL) when several
+# processes serve requests, otherwise each keeps its own copy and sees the writes of
+# the others only when it expires (RECENT_REVIEWS_TIMEOUT)
+CACHE_KEY = "reviews:recent-window"
+
+# the feed's period and ordering, see ReviewList
+RECENT_PERIOD = timezone.timedelta(days=7)
+RECENT_ORDERING = ["-date_created", "-id"]
+
+# query params of feed requests the window can answer
+FEED_PARAMS = {"recent", "cursor", "limit", "count", "page"}
+
+
+def is_feed_request(request):
+    """
+    Check if request only asks for the global recent feed (recent=true without filters)
+    The feed is the same for every user, anonymous or not
+    """
+    params = request.query_params
+
+    return params.get("recent", "").lower() == "true" and set(params) <= FEED_PARAMS
+
+
+def refresh_window():
+    """
+    Store the RECENT_REVIEWS_WINDOW latest reviews of the period, serialized, newest
+    first, with one indexed query
+    complete is true when the window holds every review of the period
+    Created and deleted reviews are applied in place (add_to_window, remove_from_window),
+    other changes (like and comment counters, edits) show once the window expires
+    """
+    maximum = settings.RECENT_REVIEWS_WINDOW
+    since = timezone.now() - RECENT_PERIOD
+
+    reviews = list(
+        Review.objects.filter(date_created__gte=since).order_by(*RECENT_ORDERING)[
+            : maximum + 1
+        ]
+    )
+    complete = len(reviews) <= maximum
+    reviews = reviews[:maximum]
+
+    window = {
+        "built_at": time.time(),
+        "complete": complete,
+        "entries": [
+            (review.date_created, review.pk, dict(row))
+            for review, row in zip(reviews, ReviewSerializer(reviews, many=True).data)
+        ],
+    }
+    cache.set(CACHE_KEY, window, settings.RECENT_REVIEWS_TIMEOUT)
+
+    return window
+
+
+def forget_window():
+    """
+    Drop the cached window, the next feed request builds it
+    """
+    cache.delete(CACHE_KEY)
+
+
+def add_to_window(review):
+    """
+    Add a created review to the cached window once the current transaction commits
+    """
+    transaction.on_commit(partial(_update_window, _insert, review))
+
+
+def remove_from_window(review_id):
+    """
+    Remove a deleted review from the cached window once the current transaction commits
+    Deletes of many reviews (accounts, drinks) forget_window on commit instead
+    """
+    transaction.on_commit(partial(_update_window, _remove, review_id))
+
+
+def _update_window(change, *args):
+    """
+    Apply change(window, *args) to the cached window, if any, without extending its
+    lifetime so counters are still refreshed every RECENT_REVIEWS_TIMEOUT
+    Concurrent updates of a shared cache can overwrite each other, the loss lasts until
+    the window expires
+    """
+    window = cache.get(CACHE_KEY)
+
+    if window is None:
+        return
+
+    timeout = settings.RECENT_REVIEWS_TIMEOUT - (time.time() - window["built_at"])
+
+    if timeout <= 0:
+        return
+
+    change(window, *args)
+    cache.set(CACHE_KEY, window, timeout)
+
+
+def _insert(window, review):
+    entries = window["entries"]
+    key = (review.date_created, review.pk)
+
+    if review.date_created < timezone.now() - RECENT_PERIOD:
+        return
+
+    # older than an incomplete window holds, read from the database
+    if not window["complete"] and entries and key < entries[-1][:2]:
+        return
+
+    position = next(
+        (i for i, entry in enumerate(entries) if entry[:2] < key), len(entries)
+    )
+    entries.insert(position, (*key, dict(ReviewSerializer(review).data)))
+
+    if len(entries) > settings.RECENT_REVIEWS_WINDOW:
+        entries.pop()
+        window["complete"] = False
+
+
+def _remove(window, review_id):
+    window["entries"] = [entry for entry in window["entries"] if entry[1] != review_id]
+
+
+def current_window():
+    """
+    (entries, complete) of the cached window (built if missing), limited to the reviews
+    inside the period now
+    """
+    window = cache.get(CACHE_KEY) or refresh_window()
+
+    now = timezone.now()
+    since = now - RECENT_PERIOD
+    entries = window["entries"]
+
+    visible = [entry for entry in entries if since <= entry[0] < now]
+
+    # once the oldest review ages out every review older than the window has too
+    complete = window["complete"] or (bool(entries) and entries[-1][0] < since)
+
+    return visible, complete
+
+
+def window_response(request):
+    """
+    Answer a feed request from the window, like ReviewList would from the database
+    Returns None when the window does not cover the request (pages past an incomplete
+    window, counts of an incomplete window, bad params), ReviewList queries then
+    """
+    entries, complete = current_window()
+    params = request.query_params
+
+    if "cursor" in params or "limit" in params:
+        try:
+            limit = parse_limit(params.get("limit"), 6)
+        except ValueError:
+            return None
+
+        page = paginate_window(entries, complete, params.get("cursor"), limit)
+
+        if page is None or (wants_count(request) and not complete):
+            return None
+
+        rows, pagination = page
+
+        if wants_count(request):
+            pagination["num_pages"] = max(1, math.ceil(len(entries) / limit))
+
+        return JsonResponse({"reviews": rows, **pagination})
+
+    if not complete:
+        return None
+
+    rows = [row for _, _, row in entries]
+    page = params.get("page")
+
+    if page:
+        try:
+            page = int(page)
+        except ValueError:
+            return None
+
+        paginator = Paginator(rows, 6, 4)
+        page_obj = paginator.get_page(page)
+
+        return JsonResponse(
+            {"reviews": page_obj.object_list, "num_pages": paginator.num_pages}
+        )
+
+    return JsonResponse({"reviews": rows, "num_pages": 1})
+
+
+def paginate_window(entries, complete, cursor, limit):
+    """
+    Keyset paginate window entries with the cursors paginate_request uses for
+    RECENT_ORDERING, so clients can move between the window and the database
+    Returns (rows, pagination) or None if the page may need reviews older than the
+    window holds
+    """
+    direction = "next"
+    key = None
+
+    if cursor:
+        try:
+            key, direction = decode_cursor(
+                cursor, Review.objects.all(), RECENT_ORDERING
+            )
+        except InvalidCursor:
+            return None
+
+        # ReviewList rejects null keys
+        if None in key:
+            return None
+
+        # naive dates are read in the current time zone, as the database query does
+        if timezone.is_naive(key[0]):
+            key[0] = timezone.make_aware(key[0])
+
+        key = tuple(key)
+
+    if direction == "prev":
+        # every review newer than the cursor is in the window, unless it is older
+        if not complete and (not entries or key < entries[-1][:2]):
+            return None
+
+        before = [entry for entry in entries if entry[:2] > key]
+        page = before[-limit:]
+
+        prev_cursor = (
+            encode_cursor(list(page[0][:2]), "prev") if len(before) > limit else None
+        )
+        next_cursor = encode_cursor(list(page[-1][:2]), "next") if page else None
+    else:
+        after = [entry for entry in entries if key is None or entry[:2] < key]
+
+        # the rest of the page, or whether there is more, is past the window
+        if len(after) <= limit and not complete:
+            return None
+
+        page = after[:limit]
+
+        next_cursor = (
+            encode_cursor(list(page[-1][:2]), "next") if len(after) > limit else None
+        )
+        prev_cursor = (
+            encode_cursor(list(page[0][:2]), "prev") if cursor and page else None
+        )
+
+    pagination = {"next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+    return [row for _, _, row in page], pagination
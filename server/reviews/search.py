@@ -0,0 +1,162 @@
+import html
+import re
+from django.db import connection
+from django.db.models import F, FloatField, Func, TextField, Value
+from django.db.models.expressions import RawSQL
+from .serializers import ReviewSerializer
+
+# text search configuration of the search_vector column, see migration 0011
+SEARCH_CONFIG = "english"
+
+# ts_headline options, matches are wrapped in control characters, see mark_matches
+# Reviews are written without control characters (ReviewDetail.post), older ones are
+# stripped of these before ts_headline and highlight_fallback see them
+MATCH_START = "\x02"
+MATCH_STOP = "\x03"
+HEADLINE_WORDS = 35
+HEADLINE_OPTIONS = {
+    "start_sel": MATCH_START,
+    "stop_sel": MATCH_STOP,
+    "max_words": HEADLINE_WORDS,
+    "min_words": 15,
+}
+
+# search results, best matches first, newest first between equal ranks
+SEARCH_ORDERING = ["-rank", "-date_created", "-id"]
+
+
+def search_reviews(reviews, search):
+    """
+    Filter reviews matching search by review text
+    Annotates each review with rank: float and headline: string (a snippet with matches
+    highlighted), order by SEARCH_ORDERING
+    """
+    if connection.vendor == "postgresql":
+        return _search_full_text(reviews, search)
+
+    return _search_fallback(reviews, search)
+
+
+def _search_full_text(reviews, search):
+    """
+    Search the generated search_vector column with websearch syntax ("quoted phrases",
+    or, -excluded), served by its GIN index, ranked by cover density
+    """
+    from django.contrib.postgres.search import (
+        SearchHeadline,
+        SearchQuery,
+        SearchRank,
+        SearchVectorField,
+    )
+
+    query = SearchQuery(search, config=SEARCH_CONFIG, search_type="websearch")
+
+    # the column is not a model field, SQLite has no tsvector
+    reviews = reviews.alias(
+        search_vector=RawSQL(
+            f'{connection.ops.quote_name(reviews.model._meta.db_table)}."search_vector"',
+            [],
+            output_field=SearchVectorField(),
+        )
+    )
+
+    return reviews.filter(search_vector=query).annotate(
+        rank=SearchRank(F("search_vector"), query, cover_density=True),
+        headline=SearchHeadline(
+            Func(
+                F("review_text"),
+                Value(MATCH_START + MATCH_STOP),
+                Value(""),
+                function="translate",
+                output_field=TextField(),
+            ),
+            query,
+            config=SEARCH_CONFIG,
+            **HEADLINE_OPTIONS,
+        ),
+    )
+
+
+def _search_fallback(reviews, search):
+    """
+    Portable search for databases without tsvector (SQLite test runs), a substring scan
+    without ranking, headline is the review text until highlight_fallback
+    """
+    return reviews.filter(review_text__icontains=search).annotate(
+        rank=Value(0.0, output_field=FloatField()),
+        headline=Value("", output_field=TextField()),
+    )
+
+
+def highlight(review, search):
+    """
+    Headline of a review from search_reviews, built in python for the fallback search
+    review is a model instance or a values dict
+    """
+    if isinstance(review, dict):
+        headline, text = review["headline"], review["review_text"]
+    else:
+        headline, text = review.headline, review.review_text
+
+    if connection.vendor == "postgresql":
+        return mark_matches(headline)
+
+    return highlight_fallback(text, search)
+
+
+def mark_matches(headline):
+    """
+    HTML of a headline with matches between MATCH_START and MATCH_STOP, the text is
+    escaped (reviews may contain markup) and only the matches are wrapped in <b></b>
+    """
+    return html.escape(headline).replace(MATCH_START, "<b>").replace(MATCH_STOP, "</b>")
+
+
+def highlight_fallback(text, search):
+    """
+    Approximate ts_headline, up to HEADLINE_WORDS words starting a few words before the
+    first match, escaped like mark_matches with every match wrapped in <b></b>
+    """
+    text = text.replace(MATCH_START, "").replace(MATCH_STOP, "")
+    pattern = re.compile(re.escape(search), re.IGNORECASE)
+    match = pattern.search(text)
+
+    words = text.split()
+
+    if match:
+        first = len(text[: match.start()].split())
+        start = max(0, min(first - 5, len(words) - HEADLINE_WORDS))
+        words = words[start : start + HEADLINE_WORDS]
+    else:
+        words = words[:HEADLINE_WORDS]
+
+    return mark_matches(
+        pattern.sub(lambda m: f"{MATCH_START}{m.group(0)}{MATCH_STOP}", " ".join(words))
+    )
+
+
+def serialize_results(reviews, search):
+    """
+    ReviewSerializer output of search results with their headlines
+    """
+    data = ReviewSerializer(reviews, many=True).data
+
+    for review, item in zip(reviews, data):
+        item["headline"] = highlight(review, search)
+
+    return data
+
+
+# values read by result_row
+RESULT_FIELDS = ReviewSerializer.Meta.fields + ["headline"]
+
+
+def result_row(search):
+    """
+    Row builder of streamed search results, from values of RESULT_FIELDS
+    """
+
+    def row(values):
+        return {**values, "headline": highlight(values, search)}
+
+    return row
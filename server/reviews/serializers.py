@@ -12,6 +12,8 @@ class ReviewSerializer(serializers.ModelSerializer):
             "date_created",
             "drink_id",
             "profile_id",
+            "like_count",
+            "comment_count",
         ]
 
 
@@ -30,7 +32,14 @@ class ReviewImageSerializer(serializers.ModelSerializer):
 class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
-        fields = ["id", "review_id", "profile_id", "comment_text", "date_created"]
+        fields = [
+            "id",
+            "review_id",
+            "profile_id",
+            "comment_text",
+            "date_created",
+            "like_count",
+        ]
 
 
 class CommentLikeSerializer(serializers.ModelSerializer):
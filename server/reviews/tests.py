@@ -1,10 +1,19 @@
 import json
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
 from django.utils import timezone
 from profiles.models import Profile
-from drinks.models import Drink
-from .models import CommentLike, Review, ReviewLike, Comment
+from drinks.models import Drink, DrinkStats
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from fizzgrid.pagination import encode_cursor
+from .recent import forget_window
+from .search import highlight_fallback, mark_matches
+from .models import CommentLike, Review, ReviewLike, Comment, TimelineEntry
 import random
 from django.contrib.auth import get_user as auth_get_user
 
@@ -18,6 +27,9 @@ class TestReviewListGET(APITestCase):
         # client
         self.client = APIClient()
 
+        # the cached feed window outlives test transactions
+        forget_window()
+
         # profiles
         profile_objs = []
         for i in range(5):
@@ -81,6 +93,8 @@ class TestReviewListGET(APITestCase):
                     "review_text": review_text,
                     "date_created": format_date(date_created),
                     "rating": rating,
+                    "like_count": 0,
+                    "comment_count": 0,
                 }
 
                 if days_ago < 7:
@@ -142,9 +156,86 @@ class TestReviewListGET(APITestCase):
         response_json = json.loads(response.content)
         review_list = response_json["reviews"]
 
+        # matches are highlighted in each review's headline
+        headlines = [review.pop("headline") for review in review_list]
+
         self.assertEqual(200, response.status_code)
         self.assertListEqual(self.expected_search_data, review_list)
 
+        for review, headline in zip(review_list, headlines):
+            self.assertEqual(
+                review["review_text"].replace(
+                    self.search_query, f"<b>{self.search_query}</b>"
+                ),
+                headline,
+            )
+
+    def test_get_search_cursor(self):
+        reviews = []
+        cursor = ""
+
+        while cursor is not None:
+            response = self.client.get(f"{self.search_url}&limit=4&cursor={cursor}")
+            response_json = json.loads(response.content)
+
+            self.assertEqual(200, response.status_code)
+
+            reviews += response_json["reviews"]
+            cursor = response_json["next_cursor"]
+
+        self.assertListEqual(
+            [review["id"] for review in self.expected_search_data],
+            [review["id"] for review in reviews],
+        )
+        self.assertTrue(all("<b>" in review["headline"] for review in reviews))
+
+        # streamed results have headlines too
+        response = self.client.get(f"{self.search_url}&format=ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertListEqual(reviews, [json.loads(line) for line in lines])
+
+    def test_get_search_escaped(self):
+        review = Review.objects.first()
+        review.review_text = '<img src=x onerror="alert(1)"> markup review'
+        review.save()
+
+        for url in ["/reviews/?search=markup", "/reviews/?search=markup&limit=5"]:
+            response = self.client.get(url)
+            [result] = json.loads(response.content)["reviews"]
+
+            self.assertEqual(
+                "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <b>markup</b> review",
+                result["headline"],
+            )
+
+    def test_highlight_fallback(self):
+        text = " ".join(f"word{i}" for i in range(100)) + " Fizzy end fizzy"
+
+        self.assertEqual(
+            " ".join(f"word{i}" for i in range(68, 100))
+            + " <b>Fizzy</b> end <b>fizzy</b>",
+            highlight_fallback(text, "fizzy"),
+        )
+        self.assertEqual(
+            "a <b>fizzy</b> one", highlight_fallback("a fizzy one", "fizzy")
+        )
+
+    def test_highlight_escaped(self):
+        text = '<script>alert("fizzy")</script> <b>not a match</b> \x02fizzy & co'
+
+        # only the highlights are markup
+        self.assertEqual(
+            "&lt;script&gt;alert(&quot;<b>fizzy</b>&quot;)&lt;/script&gt; "
+            "&lt;b&gt;not a match&lt;/b&gt; <b>fizzy</b> &amp; co",
+            highlight_fallback(text, "fizzy"),
+        )
+        self.assertEqual("<b>&lt;b&gt;</b> tag", highlight_fallback("<b> tag", "<b>"))
+        self.assertEqual(
+            "&lt;i&gt;<b>fizzy</b>&lt;/i&gt;",
+            mark_matches("<i>\x02fizzy\x03</i>"),
+        )
+
     def test_get_page(self):
         response = self.client.get(self.page_url)
         response_json = json.loads(response.content)
@@ -171,6 +262,100 @@ class TestReviewListGET(APITestCase):
         self.assertEqual(200, response.status_code)
         self.assertListEqual(self.expected_review_data, review_list)
 
+    def test_get_cursor(self):
+        reviews = []
+        cursor = ""
+
+        # walk every page
+        while cursor is not None:
+            response = self.client.get(f"/reviews/?limit=7&cursor={cursor}")
+            response_json = json.loads(response.content)
+
+            self.assertEqual(200, response.status_code)
+            self.assertNotIn("num_pages", response_json)
+
+            reviews += response_json["reviews"]
+            cursor = response_json["next_cursor"]
+
+        self.assertListEqual(self.expected_review_data, reviews)
+
+    def test_get_cursor_prev(self):
+        response = self.client.get("/reviews/?limit=6")
+        first_page = json.loads(response.content)
+
+        response = self.client.get(f"/reviews/?cursor={first_page['next_cursor']}")
+        second_page = json.loads(response.content)
+
+        self.assertListEqual(self.expected_review_data[6:12], second_page["reviews"])
+
+        response = self.client.get(f"/reviews/?cursor={second_page['prev_cursor']}")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual(first_page["reviews"], response_json["reviews"])
+        self.assertIsNone(response_json["prev_cursor"])
+
+    def test_reject_bad_cursor_key(self):
+        # well formed cursors whose values don't fit the ordering fields
+        for key in [[[1], 5], [1, 5], ["2024-01-01T00:00:00Z", {"id": 1}]]:
+            response = self.client.get(f"/reviews/?cursor={encode_cursor(key)}")
+
+            self.assertEqual(400, response.status_code)
+
+    def test_get_cursor_count(self):
+        response = self.client.get("/reviews/?recent=true&limit=6&count=true")
+        response_json = json.loads(response.content)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, response_json["num_pages"])
+        self.assertListEqual(self.expected_recent_data, response_json["reviews"])
+
+    def test_get_ndjson(self):
+        response = self.client.get(f"{self.all_url}?format=ndjson")
+        lines = b"".join(response.streaming_content).decode().split("\n")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("application/x-ndjson", response["Content-Type"])
+        # one object per line, newline terminated
+        self.assertEqual("", lines.pop())
+        self.assertListEqual(
+            self.expected_review_data, [json.loads(line) for line in lines]
+        )
+
+    def test_get_ndjson_accept(self):
+        response = self.client.get(
+            f"{self.all_url}?drink=0", HTTP_ACCEPT="application/x-ndjson"
+        )
+
+        # errors are still one JSON object
+        self.assertEqual(404, response.status_code)
+        self.assertEqual("Drink not found", json.loads(response.content)["detail"])
+
+        response = self.client.get(self.recent_url, HTTP_ACCEPT="application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(200, response.status_code)
+        self.assertListEqual(
+            self.expected_recent_data, [json.loads(line) for line in lines]
+        )
+
+    @override_settings(LIST_MAX_ROWS=10)
+    def test_get_over_maximum(self):
+        response = self.client.get(self.all_url)
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn("format=ndjson", json.loads(response.content)["detail"])
+
+        # streams and pages are not limited
+        response = self.client.get(f"{self.all_url}?format=ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(len(self.expected_review_data), len(lines))
+
+        response = self.client.get(f"{self.all_url}?page=1")
+
+        self.assertEqual(200, response.status_code)
+
 
 class TestImageListGET(APITestCase):
     def test_get_review(self):
@@ -360,6 +545,7 @@ class TestCommentListGET(APITestCase):
                 "profile_id": profile_id,
                 "comment_text": comment_text,
                 "date_created": format_date(date_created),
+                "like_count": 0,
             }
 
             if review == 0:
@@ -367,6 +553,8 @@ class TestCommentListGET(APITestCase):
 
             self.expected_comments.append(comment_data)
 
+        self.profile_objs = profile_objs
+
         # urls
         self.review_url = f"/reviews/comments/?review={review_objs[0].pk}"
         self.all_url = "/reviews/comments/"
@@ -387,6 +575,112 @@ class TestCommentListGET(APITestCase):
         self.assertEqual(200, response.status_code)
         self.assertEqual(self.expected_comments, comment_list)
 
+    def walk(self, url):
+        comments = []
+        cursor = ""
+
+        while cursor is not None:
+            response = self.client.get(f"{url}&limit=2&cursor={cursor}")
+            response_json = json.loads(response.content)
+
+            self.assertEqual(200, response.status_code)
+
+            comments += response_json["comments"]
+            cursor = response_json["next_cursor"]
+
+        return comments
+
+    def test_get_cursor_orders(self):
+        oldest = self.walk(f"{self.all_url}?order=oldest")
+        newest = self.walk(f"{self.all_url}?order=newest")
+
+        self.assertListEqual(self.expected_comments[::-1], oldest)
+        self.assertListEqual(self.expected_comments, newest)
+
+        # most liked first, id breaks ties
+        top_id = self.expected_comments[3]["id"]
+        Comment.objects.filter(pk=top_id).update(like_count=3)
+
+        top = [comment["id"] for comment in self.walk(f"{self.all_url}?order=top")]
+        others = sorted(
+            [
+                comment["id"]
+                for comment in self.expected_comments
+                if comment["id"] != top_id
+            ],
+            reverse=True,
+        )
+
+        self.assertListEqual([top_id] + others, top)
+
+    def test_get_include(self):
+        # the viewer liked the newest comment
+        viewer = User(username="viewer")
+        viewer.set_password("viewerpass123")
+        viewer.save()
+        viewer_profile = Profile.objects.create(user=viewer)
+        CommentLike.objects.create(
+            comment_id=self.expected_comments[0]["id"], profile=viewer_profile
+        )
+
+        self.client.login(username="viewer", password="viewerpass123")
+        url = f"{self.all_url}?order=newest&limit=10&include=author,viewer_liked"
+
+        # the same queries for any number of comments
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.get(url.replace("limit=10", "limit=1"))
+
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+
+        comments = json.loads(response.content)["comments"]
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(5, len(comments))
+        self.assertListEqual(
+            [True, False, False, False, False],
+            [comment["viewer_liked"] for comment in comments],
+        )
+        self.assertDictEqual(
+            {
+                "profile": {
+                    "id": self.profile_objs[0].pk,
+                    "user_id": self.profile_objs[0].user_id,
+                    "profile_img": None,
+                    "profile_img_srcset": {},
+                },
+                "user": {"username": "user0"},
+            },
+            comments[0]["author"],
+        )
+
+        # anonymous viewers liked nothing, unpaginated lists include too
+        self.client.logout()
+        response = self.client.get(f"{self.all_url}?include=viewer_liked,like_count")
+        comments = json.loads(response.content)["comments"]
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(5, len(comments))
+        self.assertFalse(any(comment["viewer_liked"] for comment in comments))
+
+    def test_reject_bad_params(self):
+        response = self.client.get(f"{self.all_url}?order=best")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(
+            "order must be one of oldest, newest, top",
+            json.loads(response.content)["detail"],
+        )
+
+        response = self.client.get(f"{self.all_url}?include=author,replies")
+
+        self.assertEqual(400, response.status_code)
+
+        response = self.client.get(f"{self.all_url}?include=author&format=ndjson")
+
+        self.assertEqual(400, response.status_code)
+
 
 class TestCommentLikeListGET(APITestCase):
     def setUp(self):
@@ -540,6 +834,8 @@ class TestReviewDetailGET(APITestCase):
             "review_text": review_text,
             "date_created": format_date(date_created),
             "rating": rating,
+            "like_count": 0,
+            "comment_count": 0,
         }
 
         # urls
@@ -585,6 +881,25 @@ class TestReviewDetailPOST(APITestCase):
         # url
         self.url = "/reviews/review/"
 
+    def test_strip_control_characters(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        # search headlines mark matches with \x02 and \x03
+        data = {
+            **self.review_data,
+            "review_text": "\x02Fizzy\x03 and\x00 sweet\n\tsoda",
+        }
+        response = self.client.post(self.url, data, format="multipart")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("Fizzy and sweet\n\tsoda", Review.objects.get().review_text)
+
+        response = self.client.get("/reviews/?search=sweet")
+        [review] = json.loads(response.content)["reviews"]
+
+        self.assertEqual("Fizzy and <b>sweet</b> soda", review["headline"])
+
     def test_reject_no_user(self):
         response = self.client.post(self.url, self.review_data, format="multipart")
 
@@ -709,7 +1024,19 @@ class TestReviewDetailPOST(APITestCase):
         self.assertEqual(0, len(Review.objects.all()))
 
     def test_reject_non_image(self):
-        pass
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        # request with a text file named like an image
+        body = {
+            **self.review_data,
+            "image": SimpleUploadedFile("image.jpg", b"not an image" * 100),
+        }
+
+        response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(0, len(Review.objects.all()))
 
     def test_post_review(self):
         # login
@@ -739,10 +1066,45 @@ class TestReviewDetailPOST(APITestCase):
             "review_text": review.review_text,
             "rating": review.rating,
             "date_created": format_date(review.date_created),
+            "like_count": 0,
+            "comment_count": 0,
         }
 
         self.assertDictEqual(expected_data, response_json)
 
+    def test_post_review_updates_stats(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        # request
+        response = self.client.post(self.url, self.review_data, format="multipart")
+
+        self.assertEqual(200, response.status_code)
+
+        stats = DrinkStats.objects.get(drink_id=self.review_data["drink_id"])
+
+        self.assertEqual(1, stats.review_count)
+        self.assertEqual(3, stats.rating_sum)
+        self.assertEqual(3.0, stats.rating_avg)
+        self.assertEqual(1, stats.rating_3)
+        self.assertIsNotNone(stats.last_reviewed_at)
+
+        # second review on existing stats
+        other_user = User.objects.create(username="other")
+        Profile.objects.create(user=other_user)
+        self.client.force_authenticate(other_user)
+
+        body = {**self.review_data, "rating": 4}
+        response = self.client.post(self.url, body, format="multipart")
+
+        self.assertEqual(200, response.status_code)
+
+        stats.refresh_from_db()
+
+        self.assertEqual(2, stats.review_count)
+        self.assertEqual(3.5, stats.rating_avg)
+        self.assertEqual(1, stats.rating_4)
+
 
 class TestReviewDetailDELETE(APITestCase):
     def setUp(self):
@@ -784,6 +1146,8 @@ class TestReviewDetailDELETE(APITestCase):
             "review_text": review.review_text,
             "rating": review.rating,
             "date_created": format_date(review.date_created),
+            "like_count": 0,
+            "comment_count": 0,
         }
 
         # url
@@ -828,6 +1192,32 @@ class TestReviewDetailDELETE(APITestCase):
         self.assertEqual(0, len(Review.objects.all()))
         self.assertDictEqual(self.review_data, response_json)
 
+    def test_delete_review_updates_stats(self):
+        # login
+        self.client.login(username=self.username, password=self.password)
+
+        stats = DrinkStats.objects.create(
+            drink_id=self.review_data["drink_id"],
+            review_count=1,
+            rating_sum=4,
+            rating_avg=4.0,
+            rating_4=1,
+            last_reviewed_at=timezone.now(),
+        )
+
+        # request
+        response = self.client.delete(self.url)
+
+        self.assertEqual(200, response.status_code)
+
+        stats.refresh_from_db()
+
+        self.assertEqual(0, stats.review_count)
+        self.assertEqual(0, stats.rating_sum)
+        self.assertEqual(0.0, stats.rating_avg)
+        self.assertEqual(0, stats.rating_4)
+        self.assertIsNone(stats.last_reviewed_at)
+
 
 class TestCommentDetailGET(APITestCase):
     def setUp(self):
@@ -869,6 +1259,7 @@ class TestCommentDetailGET(APITestCase):
             "review_id": review_id,
             "comment_text": comment_text,
             "date_created": format_date(date_created),
+            "like_count": 0,
         }
 
         # urls
@@ -1051,6 +1442,7 @@ class TestCommentDetailPOST(APITestCase):
             "review_id": str(comment.review.pk),
             "comment_text": comment.comment_text,
             "date_created": format_date(comment.date_created),
+            "like_count": 0,
         }
 
         self.assertDictEqual(expected_data, response_json)
@@ -1104,6 +1496,7 @@ class TestCommentDetailDELETE(APITestCase):
             "profile_id": comment.profile.pk,
             "comment_text": comment.comment_text,
             "date_created": format_date(comment.date_created),
+            "like_count": 0,
         }
 
         # urls
@@ -1497,3 +1890,444 @@ class TestReviewLikeDetailDELETE(APITestCase):
         self.assertEqual(200, response.status_code)
         self.assertEqual(0, len(ReviewLike.objects.all()))
         self.assertEqual(self.like_data, response_json)
+
+
+class TestTimelineGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        # reader and the profiles they follow
+        self.password = "userpass123"
+        self.profiles = []
+
+        for username in ["reader", "author", "other"]:
+            user = User(username=username)
+            user.set_password(self.password)
+            user.save()
+            self.profiles.append(Profile.objects.create(user=user))
+
+        self.reader, self.author, self.other = self.profiles
+
+        self.drink = Drink.objects.create(product_name="Product", brand_name="Brand")
+
+        self.url = "/reviews/timeline/"
+
+    def login(self, profile):
+        self.client.login(username=profile.user.username, password=self.password)
+
+    def follow(self, follower, following):
+        self.login(follower)
+        response = self.client.post(f"/profiles/profile/{following.pk}/follow/")
+
+        self.assertEqual(200, response.status_code)
+
+    def post_review(self, profile, text="Review text for the timeline"):
+        self.login(profile)
+        response = self.client.post(
+            "/reviews/review/",
+            {"drink_id": self.drink.pk, "review_text": text, "rating": 4},
+            format="multipart",
+        )
+
+        self.assertEqual(200, response.status_code)
+
+        return json.loads(response.content)["id"]
+
+    def timeline(self, **params):
+        self.login(self.reader)
+        response = self.client.get(self.url, params)
+
+        self.assertEqual(200, response.status_code)
+
+        return json.loads(response.content)
+
+    def timeline_ids(self, **params):
+        return [review["id"] for review in self.timeline(**params)["reviews"]]
+
+    def test_reject_no_user(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(403, response.status_code)
+
+    def test_reject_no_profile(self):
+        User.objects.create_user(username="no_profile", password=self.password)
+        self.client.login(username="no_profile", password=self.password)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(403, response.status_code)
+
+    def test_fan_out(self):
+        self.follow(self.reader, self.author)
+
+        first = self.post_review(self.author)
+        self.post_review(self.other)
+        second = self.post_review(self.author)
+
+        # newest first, unfollowed profiles left out
+        self.assertListEqual([second, first], self.timeline_ids())
+        self.assertEqual(2, TimelineEntry.objects.count())
+
+    def test_backfill_and_unfollow(self):
+        first = self.post_review(self.author)
+        second = self.post_review(self.author)
+
+        self.follow(self.reader, self.author)
+
+        self.assertListEqual([second, first], self.timeline_ids())
+
+        self.client.delete(f"/profiles/profile/{self.author.pk}/follow/")
+
+        self.assertListEqual([], self.timeline_ids())
+
+    def test_deleted_review(self):
+        self.follow(self.reader, self.author)
+        review_id = self.post_review(self.author)
+
+        self.client.delete(f"/reviews/review/{review_id}/")
+
+        self.assertListEqual([], self.timeline_ids())
+
+    def test_cursor(self):
+        self.follow(self.reader, self.author)
+        review_ids = [self.post_review(self.author) for _ in range(5)][::-1]
+
+        data = self.timeline(limit=2)
+        self.assertListEqual(review_ids[:2], [r["id"] for r in data["reviews"]])
+
+        data = self.timeline(limit=2, cursor=data["next_cursor"])
+        self.assertListEqual(review_ids[2:4], [r["id"] for r in data["reviews"]])
+
+        data = self.timeline(limit=2, cursor=data["next_cursor"])
+        self.assertListEqual(review_ids[4:], [r["id"] for r in data["reviews"]])
+        self.assertIsNone(data["next_cursor"])
+
+        data = self.timeline(limit=2, cursor=data["prev_cursor"])
+        self.assertListEqual(review_ids[2:4], [r["id"] for r in data["reviews"]])
+
+    def test_reject_bad_cursor(self):
+        self.login(self.reader)
+        response = self.client.get(self.url, {"cursor": "bad"})
+
+        self.assertEqual(400, response.status_code)
+
+    @override_settings(TIMELINE_FAN_OUT_MAX_FOLLOWERS=1)
+    def test_fan_out_on_read(self):
+        self.follow(self.reader, self.author)
+        self.follow(self.other, self.author)
+        self.follow(self.reader, self.other)
+
+        first = self.post_review(self.author)
+
+        # as if copied before the author had too many followers
+        TimelineEntry.objects.create(
+            profile=self.reader,
+            review_id=first,
+            author=self.author,
+            date_created=Review.objects.get(pk=first).date_created,
+        )
+
+        second = self.post_review(self.author)
+        third = self.post_review(self.other)
+        fourth = self.post_review(self.author)
+
+        self.author.refresh_from_db()
+
+        self.assertTrue(self.author.timeline_on_read)
+        self.assertFalse(TimelineEntry.objects.filter(review_id=fourth).exists())
+
+        # read and copied reviews merged, without duplicates
+        self.assertListEqual([fourth, third, second, first], self.timeline_ids())
+
+        data = self.timeline(limit=3)
+        self.assertListEqual(
+            [fourth, third, second], [r["id"] for r in data["reviews"]]
+        )
+
+        data = self.timeline(limit=3, cursor=data["next_cursor"])
+        self.assertListEqual([first], [r["id"] for r in data["reviews"]])
+
+
+class TestCounters(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        # profile
+        self.username = "user"
+        self.password = "userpass123"
+        user = User(username=self.username)
+        user.set_password(self.password)
+        user.save()
+        self.profile = Profile.objects.create(user=user)
+
+        # drink and review
+        drink = Drink.objects.create(product_name="Product", brand_name="Brand")
+        self.review = Review.objects.create(
+            profile_id=self.profile.pk,
+            drink_id=drink.pk,
+            review_text="Review text",
+            date_created=timezone.now(),
+            rating=4,
+        )
+
+        self.client.login(username=self.username, password=self.password)
+
+    def get_review(self):
+        response = self.client.get(f"/reviews/review/{self.review.pk}/")
+
+        return json.loads(response.content)
+
+    def test_review_likes(self):
+        self.client.post(f"/reviews/review/{self.review.pk}/like/")
+        self.assertEqual(1, self.get_review()["like_count"])
+
+        # duplicates are not counted
+        response = self.client.post(f"/reviews/review/{self.review.pk}/like/")
+        self.assertEqual(409, response.status_code)
+        self.assertEqual(1, self.get_review()["like_count"])
+
+        self.client.delete(f"/reviews/review/{self.review.pk}/like/")
+        self.assertEqual(0, self.get_review()["like_count"])
+
+    def test_comments_and_comment_likes(self):
+        response = self.client.post(
+            "/reviews/comment/",
+            {"review_id": self.review.pk, "comment_text": "Comment text"},
+            format="multipart",
+        )
+        comment_id = json.loads(response.content)["id"]
+
+        self.assertEqual(1, self.get_review()["comment_count"])
+
+        self.client.post(f"/reviews/comment/{comment_id}/like/")
+        response = self.client.get(f"/reviews/comment/{comment_id}/")
+        self.assertEqual(1, json.loads(response.content)["like_count"])
+
+        self.client.delete(f"/reviews/comment/{comment_id}/like/")
+        response = self.client.get(f"/reviews/comment/{comment_id}/")
+        self.assertEqual(0, json.loads(response.content)["like_count"])
+
+        self.client.delete(f"/reviews/comment/{comment_id}/")
+        self.assertEqual(0, self.get_review()["comment_count"])
+
+    def test_reconcile(self):
+        comment = Comment.objects.create(
+            review=self.review,
+            profile=self.profile,
+            comment_text="Comment text",
+            date_created=timezone.now(),
+        )
+        ReviewLike.objects.create(review=self.review, profile=self.profile)
+        CommentLike.objects.create(comment=comment, profile=self.profile)
+
+        # drift both ways
+        Review.objects.update(comment_count=5)
+        out = StringIO()
+
+        call_command("reconcile_counters", "--batch-size=1", stdout=out)
+
+        self.review.refresh_from_db()
+        comment.refresh_from_db()
+        self.assertEqual(1, self.review.like_count)
+        self.assertEqual(1, self.review.comment_count)
+        self.assertEqual(1, comment.like_count)
+        self.assertIn("Review.comment_count: fixed 1 rows", out.getvalue())
+
+        # nothing left to fix
+        out = StringIO()
+        call_command("reconcile_counters", stdout=out)
+
+        self.assertNotIn("fixed 1", out.getvalue())
+
+
+class TestRecentWindow(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        # profile
+        self.username = "user"
+        self.password = "userpass123"
+        user = User(username=self.username)
+        user.set_password(self.password)
+        user.save()
+        profile = Profile.objects.create(user=user)
+
+        self.drink = Drink.objects.create(product_name="Product", brand_name="Brand")
+        DrinkStats.objects.create(drink=self.drink)
+
+        # one review a day (two on the first), the last ones older than a week
+        now = timezone.now()
+        self.recent_ids = []
+
+        for i in range(10):
+            review = Review.objects.create(
+                profile=profile,
+                drink=self.drink,
+                review_text="Review text",
+                rating=3,
+                date_created=now - timezone.timedelta(days=max(i - 1, 0), hours=1),
+            )
+
+            if i < 8:
+                self.recent_ids.append(review.pk)
+
+        # newest first, the two equal dates by id
+        self.recent_ids = [self.recent_ids[1], self.recent_ids[0]] + self.recent_ids[2:]
+
+        forget_window()
+
+    def walk(self, limit):
+        ids = []
+        cursor = ""
+
+        while cursor is not None:
+            response = self.client.get(
+                f"/reviews/?recent=true&limit={limit}&cursor={cursor}"
+            )
+            response_json = json.loads(response.content)
+
+            self.assertEqual(200, response.status_code)
+
+            ids += [review["id"] for review in response_json["reviews"]]
+            cursor = response_json["next_cursor"]
+
+        return ids, response_json["prev_cursor"]
+
+    def test_served_from_window(self):
+        # builds the window
+        self.client.get("/reviews/?recent=true&limit=3")
+
+        with self.assertNumQueries(0):
+            ids, prev_cursor = self.walk(3)
+            response = self.client.get("/reviews/?recent=true&page=1")
+
+        self.assertListEqual(self.recent_ids, ids)
+
+        # orphans keep the 8 reviews on one page
+        response_json = json.loads(response.content)
+        self.assertEqual(1, response_json["num_pages"])
+        self.assertListEqual(
+            self.recent_ids, [review["id"] for review in response_json["reviews"]]
+        )
+
+        # the last page leads back to the one before it
+        response = self.client.get(
+            f"/reviews/?recent=true&limit=3&cursor={prev_cursor}"
+        )
+        response_json = json.loads(response.content)
+
+        self.assertListEqual(
+            self.recent_ids[3:6], [review["id"] for review in response_json["reviews"]]
+        )
+
+    def test_cursor_keys(self):
+        # built window
+        self.client.get("/reviews/?recent=true&limit=3")
+
+        response = self.client.get(
+            f"/reviews/?recent=true&cursor={encode_cursor([None, None])}"
+        )
+
+        self.assertEqual(400, response.status_code)
+
+        # naive dates are read in the current time zone, like the database does
+        review = Review.objects.get(pk=self.recent_ids[2])
+        aware = [review.date_created, review.pk]
+        naive = [timezone.make_naive(review.date_created), review.pk]
+
+        responses = [
+            self.client.get(
+                f"/reviews/?recent=true&limit=3&cursor={encode_cursor(key)}"
+            )
+            for key in [aware, naive]
+        ]
+
+        self.assertEqual(200, responses[1].status_code)
+        self.assertEqual(
+            json.loads(responses[0].content)["reviews"],
+            json.loads(responses[1].content)["reviews"],
+        )
+
+    @override_settings(RECENT_REVIEWS_WINDOW=4)
+    def test_past_window(self):
+        # pages past the window are read from the database with the same cursors
+        ids, _ = self.walk(3)
+
+        self.assertListEqual(self.recent_ids, ids)
+
+        # counts and page numbers need the whole period
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/reviews/?recent=true&page=1")
+
+        self.assertEqual(1, json.loads(response.content)["num_pages"])
+        self.assertTrue(queries)
+
+    def get_feed_ids(self):
+        # served from the window, so no queries (besides a signed in user's session)
+        with self.assertNumQueries(0):
+            response = APIClient().get("/reviews/?recent=true")
+
+        return [review["id"] for review in json.loads(response.content)["reviews"]]
+
+    def test_updated_on_write(self):
+        self.client.get("/reviews/?recent=true")
+        self.client.login(username=self.username, password=self.password)
+
+        # created and deleted reviews are applied to the window in place
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/reviews/review/",
+                {
+                    "drink_id": self.drink.pk,
+                    "review_text": "New review text",
+                    "rating": 5,
+                },
+                format="multipart",
+            )
+
+        review_id = json.loads(response.content)["id"]
+
+        self.assertListEqual([review_id] + self.recent_ids, self.get_feed_ids())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/reviews/review/{self.recent_ids[0]}/")
+
+        self.assertListEqual([review_id] + self.recent_ids[1:], self.get_feed_ids())
+
+        # counters are refreshed when the window expires, not on every like
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/reviews/review/{review_id}/like/")
+
+        response = self.client.get("/reviews/?recent=true")
+        self.assertEqual(0, json.loads(response.content)["reviews"][0]["like_count"])
+
+        forget_window()
+
+        response = self.client.get("/reviews/?recent=true")
+        self.assertEqual(1, json.loads(response.content)["reviews"][0]["like_count"])
+
+    @override_settings(RECENT_REVIEWS_WINDOW=8)
+    def test_updated_full_window(self):
+        self.client.get("/reviews/?recent=true")
+        self.client.login(username=self.username, password=self.password)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/reviews/review/",
+                {
+                    "drink_id": self.drink.pk,
+                    "review_text": "New review text",
+                    "rating": 5,
+                },
+                format="multipart",
+            )
+
+        review_id = json.loads(response.content)["id"]
+
+        # the oldest review is pushed out of the window, pages reaching it are queried
+        ids, _ = self.walk(3)
+
+        self.assertListEqual([review_id] + self.recent_ids, ids)
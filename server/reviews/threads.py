@@ -0,0 +1,69 @@
+from django.db.models import Exists, OuterRef, Value
+from profiles.serializers import ProfileSerializer, UserLimitedSerializer
+from .models import CommentLike
+from .serializers import CommentSerializer
+
+# order query param for comment threads, each ordering ends with id so it is unique for
+# cursors, top follows the live like_count so its pages can shift while being read
+COMMENT_ORDERINGS = {
+    "oldest": ["date_created", "id"],
+    "newest": ["-date_created", "-id"],
+    "top": ["-like_count", "-id"],
+}
+
+# include query param, like_count is always embedded in comments (see reviews.counters)
+COMMENT_INCLUDES = ["author", "like_count", "viewer_liked"]
+
+
+def parse_include(value):
+    """
+    Parse comma separated include query param, raises ValueError for unknown names
+    """
+    if not value:
+        return set()
+
+    include = set(value.split(","))
+
+    if not include.issubset(COMMENT_INCLUDES):
+        raise ValueError(f"include must be made up of {', '.join(COMMENT_INCLUDES)}")
+
+    return include
+
+
+def with_includes(comments, include, user):
+    """
+    Prepare comments for serialize_comments without extra queries, authors are joined
+    and viewer_liked is an EXISTS annotation (always false for anonymous users)
+    """
+    if "author" in include:
+        comments = comments.select_related("profile__user")
+
+    if "viewer_liked" in include:
+        if user.is_authenticated:
+            likes = CommentLike.objects.filter(
+                comment_id=OuterRef("pk"), profile__user_id=user.pk
+            )
+            comments = comments.annotate(viewer_liked=Exists(likes))
+        else:
+            comments = comments.annotate(viewer_liked=Value(False))
+
+    return comments
+
+
+def serialize_comments(comments, include):
+    """
+    CommentSerializer output with the included fields of comments from with_includes
+    """
+    data = CommentSerializer(comments, many=True).data
+
+    for comment, item in zip(comments, data):
+        if "author" in include:
+            item["author"] = {
+                "profile": ProfileSerializer(comment.profile).data,
+                "user": UserLimitedSerializer(comment.profile.user).data,
+            }
+
+        if "viewer_liked" in include:
+            item["viewer_liked"] = comment.viewer_liked
+
+    return data
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from profiles.models import Follow, Profile
+from .models import Review, TimelineEntry
+
+# timeline pages, newest first, the review id breaks ties between equal dates
+TIMELINE_ORDERING = ["-date_created", "-review_id"]
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def fan_out(review):
+    """
+    Copy a new review into its author's followers' timelines with one INSERT ... SELECT,
+    call in the transaction that creates it
+    Authors with more than TIMELINE_FAN_OUT_MAX_FOLLOWERS followers are switched to
+    timeline_on_read instead, for good, followers then read all their reviews at read
+    time
+    """
+    author = Profile.objects.only("timeline_on_read").get(pk=review.profile_id)
+
+    if author.timeline_on_read:
+        return
+
+    maximum = settings.TIMELINE_FAN_OUT_MAX_FOLLOWERS
+
+    if Follow.objects.filter(following_id=author.pk)[: maximum + 1].count() > maximum:
+        Profile.objects.filter(pk=author.pk).update(timeline_on_read=True)
+        return
+
+    entry = TimelineEntry._meta
+    follow = Follow._meta
+
+    sql = (
+        f"INSERT INTO {_quote(entry.db_table)} "
+        f"({_quote('profile_id')}, {_quote('review_id')}, {_quote('author_id')}, "
+        f"{_quote('date_created')}) "
+        f"SELECT {_quote('follower_id')}, %s, %s, %s FROM {_quote(follow.db_table)} "
+        f"WHERE {_quote('following_id')} = %s ON CONFLICT DO NOTHING"
+    )
+    date_created = entry.get_field("date_created").get_db_prep_save(
+        review.date_created, connection
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [review.pk, author.pk, date_created, author.pk])
+
+
+def backfill(profile_id, author_id):
+    """
+    Copy author's latest TIMELINE_BACKFILL_REVIEWS reviews into profile's timeline, for
+    a new follow, nothing to copy for timeline_on_read authors
+    """
+    if Profile.objects.filter(pk=author_id, timeline_on_read=True).exists():
+        return
+
+    reviews = Review.objects.filter(profile_id=author_id).order_by(
+        "-date_created", "-id"
+    )[: settings.TIMELINE_BACKFILL_REVIEWS]
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                profile_id=profile_id,
+                review_id=review_id,
+                author_id=author_id,
+                date_created=date_created,
+            )
+            for review_id, date_created in reviews.values_list("pk", "date_created")
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def forget(profile_id, author_id):
+    """
+    Remove author's reviews from profile's timeline, for an unfollow
+    """
+    TimelineEntry.objects.filter(profile_id=profile_id, author_id=author_id).delete()
+
+
+def timeline_querysets(profile_id):
+    """
+    Querysets paginated together (see fizzgrid.pagination.paginate_merged) into
+    profile's timeline: copied entries, and reviews of followed timeline_on_read authors
+    read directly
+    """
+    on_read = list(
+        Follow.objects.filter(
+            follower_id=profile_id, following__timeline_on_read=True
+        ).values_list("following_id", flat=True)
+    )
+
+    entries = TimelineEntry.objects.filter(profile_id=profile_id).select_related(
+        "review"
+    )
+
+    if not on_read:
+        return [entries]
+
+    # entries copied before the author switched are read with the rest of their reviews
+    return [
+        entries.exclude(author_id__in=on_read),
+        Review.objects.filter(profile_id__in=on_read).annotate(review_id=F("id")),
+    ]
+
+
+def timeline_reviews(objects):
+    """
+    Reviews of a merged timeline page
+    """
+    return [obj.review if isinstance(obj, TimelineEntry) else obj for obj in objects]
@@ -29,6 +29,11 @@ urlpatterns = [
         views.ReviewLikeDetail.as_view(),
         name="review_like_detail",
     ),
+    path(
+        "timeline/",
+        views.Timeline.as_view(),
+        name="timeline",
+    ),
     path(
         "images/",
         views.ImageList.as_view(),
@@ -1,18 +1,67 @@
 from django.http import JsonResponse
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
-from profiles.models import Profile
-from drinks.serializers import DrinkImageSerializer
+from django.contrib.auth.models import User
+from profiles.models import Follow, Profile
+from drinks.serializers import (
+    DRINK_IMAGE_FIELDS,
+    DrinkImageSerializer,
+    drink_image_row,
+)
 from .serializers import (
     CommentLikeSerializer,
     CommentSerializer,
     ReviewLikeSerializer,
     ReviewSerializer,
 )
-from .models import Review, ReviewImage, ReviewLike, Comment, CommentLike
+from .models import (
+    Review,
+    ReviewImage,
+    ReviewLike,
+    Comment,
+    CommentLike,
+    TimelineEntry,
+)
+from .counters import change_count
+from .recent import (
+    add_to_window,
+    is_feed_request,
+    remove_from_window,
+    window_response,
+)
+from .search import (
+    RESULT_FIELDS,
+    SEARCH_ORDERING,
+    result_row,
+    search_reviews,
+    serialize_results,
+)
+from .threads import (
+    COMMENT_ORDERINGS,
+    parse_include,
+    serialize_comments,
+    with_includes,
+)
+from .timeline import (
+    TIMELINE_ORDERING,
+    fan_out,
+    timeline_querysets,
+    timeline_reviews,
+)
 from drinks.models import Drink, DrinkImage
+from drinks.recommendations import forget_recommendation
+from drinks.stats import record_activity, record_review, remove_review
+from drinks.uploads import queue_drink_images
 import json
 from django.core.paginator import Paginator
+from django.db import transaction
+from fizzgrid.db import delete_returning, insert_unique
+from fizzgrid.deletion import fast_delete
+from fizzgrid.pagination import is_cursor_request, paginate_request
+from fizzgrid.streaming import list_response, wants_ndjson
+from fizzgrid.text import strip_control
+from fizzgrid.uploads import ImageUploadMixin
+from versions.conditional import conditional
 from django.db.models import F
 from rest_framework.decorators import api_view
 from rest_framework.views import APIView
@@ -20,16 +69,34 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticate
 from rest_framework.parsers import MultiPartParser
 
 
+def not_recent(request):
+    """
+    recent=true lists change as reviews age out of the week, without any write
+    """
+    return request.query_params.get("recent", "").lower() != "true"
+
+
 class ReviewList(APIView):
     """
     List reviews
     """
 
+    @conditional(Review, Profile, Drink, when=not_recent)
     def get(self, request):
         """
         Get reviews
         Optional query params - profile: int, drink: int, search: string, page: int, recent: boolean
+        Searches are ranked and each review gets a headline with the matches in <b></b>
+        Cursor mode query params - cursor: string, limit: int, count: boolean
+        Unpaginated lists can be streamed with format: ndjson
         """
+        # the global recent feed is served from a cached window of the latest reviews
+        if is_feed_request(request) and not wants_ndjson(request):
+            response = window_response(request)
+
+            if response is not None:
+                return response
+
         reviews = Review.objects.all()
 
         # check recent
@@ -59,13 +126,32 @@ class ReviewList(APIView):
             else:
                 return JsonResponse({"detail": "Drink not found"}, status=404)
 
-        # check search
+        # most recent first, id breaks ties between equal dates
+        ordering = ["-date_created", "-id"]
+
+        # check search, ranked full text search with headlines
         search = request.query_params.get("search")
         if search:
-            reviews = reviews.filter(review_text__icontains=search)
+            reviews = search_reviews(reviews, search)
+            ordering = SEARCH_ORDERING
 
-        # order by most recent first
-        reviews = reviews.order_by("-date_created")
+        # cursor pagination
+        if is_cursor_request(request):
+            try:
+                page_reviews, pagination = paginate_request(
+                    request, reviews, ordering, 6
+                )
+            except ValueError as e:
+                return JsonResponse({"detail": str(e)}, status=400)
+
+            return JsonResponse(
+                {
+                    "reviews": self.serialize(page_reviews, search),
+                    **pagination,
+                }
+            )
+
+        reviews = reviews.order_by(*ordering)
 
         # check page, only paginate if explicitly said so
         page = request.query_params.get("page")
@@ -80,16 +166,74 @@ class ReviewList(APIView):
 
             return JsonResponse(
                 {
-                    "reviews": ReviewSerializer(page_obj.object_list, many=True).data,
+                    "reviews": self.serialize(page_obj.object_list, search),
                     "num_pages": paginator.num_pages,
                 }
             )
 
         # if not paginated, num_pages = 1
+        if search:
+            return list_response(
+                request,
+                "reviews",
+                reviews,
+                ReviewSerializer,
+                row=result_row(search),
+                fields=RESULT_FIELDS,
+                extra={"num_pages": 1},
+                serialize=lambda objects: serialize_results(objects, search),
+            )
+
+        return list_response(
+            request, "reviews", reviews, ReviewSerializer, extra={"num_pages": 1}
+        )
+
+    def serialize(self, reviews, search):
+        """
+        Serialize reviews, with headlines if they are search results
+        """
+        if search:
+            return serialize_results(reviews, search)
+
+        return ReviewSerializer(reviews, many=True).data
+
+
+class Timeline(APIView):
+    """
+    Home timeline, reviews by followed profiles
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @conditional(TimelineEntry, Review, Follow, Profile)
+    def get(self, request):
+        """
+        Get reviews by profiles the authenticated profile follows, newest first
+        Query params - cursor: string, limit: int
+        """
+        user = request.user
+
+        # check user has profile
+        profile = None
+
+        try:
+            profile = Profile.objects.get(user_id=user.pk)
+        except ObjectDoesNotExist:
+            return JsonResponse(
+                {"detail": "User does not have connected profile"}, status=403
+            )
+
+        try:
+            objects, pagination = paginate_request(
+                request, timeline_querysets(profile.pk), TIMELINE_ORDERING, 10
+            )
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+
         return JsonResponse(
             {
-                "reviews": ReviewSerializer(reviews, many=True).data,
-                "num_pages": 1,
+                "reviews": ReviewSerializer(timeline_reviews(objects), many=True).data,
+                **pagination,
             }
         )
 
@@ -99,10 +243,11 @@ class ImageList(APIView):
     List review images
     """
 
+    @conditional(ReviewImage, Review, DrinkImage)
     def get(self, request):
         """
         Get review images
-        Optional query param review: int
+        Optional query param review: int, format: ndjson
         """
         review_images = ReviewImage.objects.all()
 
@@ -119,8 +264,13 @@ class ImageList(APIView):
             pk__in=review_images.values("image_id")
         )
 
-        return JsonResponse(
-            {"images": DrinkImageSerializer(drink_images, many=True).data}
+        return list_response(
+            request,
+            "images",
+            drink_images,
+            DrinkImageSerializer,
+            row=drink_image_row,
+            fields=DRINK_IMAGE_FIELDS,
         )
 
 
@@ -129,10 +279,11 @@ class ReviewLikeList(APIView):
     List review likes
     """
 
+    @conditional(ReviewLike, Review, Profile)
     def get(self, request):
         """
         Get review likes
-        Optional query param - review: int, profile: int
+        Optional query param - review: int, profile: int, format: ndjson
         """
         likes = ReviewLike.objects.all()
 
@@ -156,7 +307,7 @@ class ReviewLikeList(APIView):
             else:
                 return JsonResponse({"detail": "Profile not found"}, status=404)
 
-        return JsonResponse({"likes": ReviewLikeSerializer(likes, many=True).data})
+        return list_response(request, "likes", likes, ReviewLikeSerializer)
 
 
 class CommentList(APIView):
@@ -164,10 +315,13 @@ class CommentList(APIView):
     List comments
     """
 
+    @conditional(Comment, Review, CommentLike, Profile, User)
     def get(self, request):
         """
         Get comments
-        Optional query param - review: int
+        Optional query params - review: int, order: oldest|newest|top,
+        include: author,like_count,viewer_liked (comma separated), format: ndjson
+        Cursor mode query params - cursor: string, limit: int, count: boolean
         """
         comments = Comment.objects.all()
 
@@ -179,7 +333,56 @@ class CommentList(APIView):
             else:
                 return JsonResponse({"detail": "Review not found"}, status=404)
 
-        return JsonResponse({"comments": CommentSerializer(comments, many=True).data})
+        # check order, oldest first by default in cursor mode
+        order = request.query_params.get("order")
+        if order and order not in COMMENT_ORDERINGS:
+            return JsonResponse(
+                {"detail": f"order must be one of {', '.join(COMMENT_ORDERINGS)}"},
+                status=400,
+            )
+
+        ordering = COMMENT_ORDERINGS[order or "oldest"]
+
+        # check include
+        try:
+            include = parse_include(request.query_params.get("include"))
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+
+        comments = with_includes(comments, include, request.user)
+
+        if is_cursor_request(request):
+            try:
+                page_comments, pagination = paginate_request(
+                    request, comments, ordering, 20
+                )
+            except ValueError as e:
+                return JsonResponse({"detail": str(e)}, status=400)
+
+            return JsonResponse(
+                {
+                    "comments": serialize_comments(page_comments, include),
+                    **pagination,
+                }
+            )
+
+        if order:
+            comments = comments.order_by(*ordering)
+
+        # streamed rows are plain comments
+        if include - {"like_count"} and wants_ndjson(request):
+            return JsonResponse(
+                {"detail": "include is not supported with format=ndjson"},
+                status=400,
+            )
+
+        return list_response(
+            request,
+            "comments",
+            comments,
+            CommentSerializer,
+            serialize=lambda objects: serialize_comments(objects, include),
+        )
 
 
 class CommentLikeList(APIView):
@@ -187,10 +390,11 @@ class CommentLikeList(APIView):
     List comment likes
     """
 
+    @conditional(CommentLike, Comment, Profile)
     def get(self, request):
         """
         Get comment likes
-        Optional query param - comment: int, profile: int
+        Optional query param - comment: int, profile: int, format: ndjson
         """
         likes = CommentLike.objects.all()
 
@@ -213,10 +417,10 @@ class CommentLikeList(APIView):
             else:
                 return JsonResponse({"detail": "Profile not found"}, status=404)
 
-        return JsonResponse({"likes": CommentLikeSerializer(likes, many=True).data})
+        return list_response(request, "likes", likes, CommentLikeSerializer)
 
 
-class ReviewDetail(APIView):
+class ReviewDetail(ImageUploadMixin, APIView):
     """
     Detail review
     """
@@ -224,6 +428,7 @@ class ReviewDetail(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     parser_classes = [MultiPartParser]
 
+    @conditional(Review)
     def get(self, request, review_id):
         """
         Get review with id review_id
@@ -257,9 +462,15 @@ class ReviewDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=401
             )
 
+        # image is validated while the body streams in
+        error = self.check_uploads(request)
+
+        if error:
+            return error
+
         # get request data
         rating = request.data.get("rating")
-        review_text = request.data.get("review_text")
+        review_text = strip_control(request.data.get("review_text") or "")
         drink_id = request.data.get("drink_id")
         image = request.FILES.get("image")
 
@@ -295,17 +506,29 @@ class ReviewDetail(APIView):
             profile=profile,
         )
 
-        review.save()
+        with transaction.atomic():
+            review.save()
 
-        # add image
-        if image:
-            drink_image = DrinkImage(
-                label=f"{drink.product_name}", image=image, drink=drink
-            )
-            drink_image.save()
+            # update drink rating stats
+            record_review(review)
+
+            # reviewed drinks are no longer recommended
+            forget_recommendation(profile.pk, drink.pk)
 
-            review_image = ReviewImage(review=review, image=drink_image)
-            review_image.save()
+            # followers' home timelines
+            fan_out(review)
+
+            # global recent feed
+            add_to_window(review)
+
+            # add image, pending until the storage writer uploads it
+            if image:
+                [drink_image] = queue_drink_images(
+                    drink, [image], f"{drink.product_name}"
+                )
+
+                review_image = ReviewImage(review=review, image=drink_image)
+                review_image.save()
 
         return JsonResponse(ReviewSerializer(review).data)
 
@@ -346,8 +569,17 @@ class ReviewDetail(APIView):
         # get data
         data = ReviewSerializer(review).data
 
-        # delete review
-        review.delete()
+        # delete review and update drink rating stats, its likes are deleted with it
+        with transaction.atomic():
+            liked_at = list(
+                ReviewLike.objects.filter(review_id=review.pk).values_list(
+                    "date_created", flat=True
+                )
+            )
+
+            fast_delete(Review.objects.filter(pk=review.pk))
+            remove_review(review, liked_at)
+            remove_from_window(review.pk)
 
         return JsonResponse(data)
 
@@ -360,6 +592,7 @@ class CommentDetail(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     parser_classes = [MultiPartParser]
 
+    @conditional(Comment)
     def get(self, request, comment_id):
         """
         Get comment with id comment_id
@@ -435,7 +668,9 @@ class CommentDetail(APIView):
         comment.review_id = review_id
         comment.profile_id = profile.pk
 
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            change_count(Review, review_id, "comment_count", 1)
 
         return JsonResponse(CommentSerializer(comment).data)
 
@@ -477,8 +712,10 @@ class CommentDetail(APIView):
         # serialize
         data = CommentSerializer(comment).data
 
-        # delete
-        comment.delete()
+        # delete, its likes are deleted with it
+        with transaction.atomic():
+            comment.delete()
+            change_count(Review, comment.review_id, "comment_count", -1)
 
         return JsonResponse(data)
 
@@ -506,18 +743,21 @@ class CommentLikeDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=401
             )
 
-        if not Comment.objects.filter(pk=comment_id):
-            return JsonResponse({"detail": "Comment not found"}, status=404)
+        with transaction.atomic():
+            # create like if comment exists and it is not liked yet
+            like = insert_unique(
+                CommentLike,
+                {"comment_id": comment_id, "profile_id": profile.pk},
+                exists=(Comment, comment_id),
+            )
 
-        try:
-            Comment.objects.get(pk=comment_id)
-        except ObjectDoesNotExist:
-            return JsonResponse({"detail": "Comment not found"}, status=404)
+            if like:
+                change_count(Comment, comment_id, "like_count", 1)
+
+        if like is None:
+            if not Comment.objects.filter(pk=comment_id).exists():
+                return JsonResponse({"detail": "Comment not found"}, status=404)
 
-        # check if like exists
-        if CommentLike.objects.filter(
-            comment_id=comment_id, profile_id=profile.pk
-        ).exists():
             return JsonResponse(
                 {
                     "detail": f"Profile {profile.pk} has already liked comment {comment_id}"
@@ -525,13 +765,6 @@ class CommentLikeDetail(APIView):
                 status=409,
             )
 
-        # create like
-        like = CommentLike()
-        like.comment_id = comment_id
-        like.profile_id = profile.pk
-
-        like.save()
-
         return JsonResponse(CommentLikeSerializer(like).data)
 
     def delete(self, request, comment_id):
@@ -550,29 +783,25 @@ class CommentLikeDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=401
             )
 
-        try:
-            Comment.objects.get(pk=comment_id)
-        except ObjectDoesNotExist:
-            return JsonResponse({"detail": "Comment not found"}, status=404)
+        # delete
+        with transaction.atomic():
+            likes = delete_returning(
+                CommentLike, comment_id=comment_id, profile_id=profile.pk
+            )
 
-        # check if like exists
-        like = None
+            if likes:
+                change_count(Comment, comment_id, "like_count", -1)
+
+        if not likes:
+            if not Comment.objects.filter(pk=comment_id).exists():
+                return JsonResponse({"detail": "Comment not found"}, status=404)
 
-        try:
-            like = CommentLike.objects.get(comment_id=comment_id, profile_id=profile.pk)
-        except ObjectDoesNotExist:
             return JsonResponse(
                 {"detail": f"Profile {profile.pk} has not liked comment {comment_id}"},
                 status=404,
             )
 
-        # serialize
-        data = CommentLikeSerializer(like).data
-
-        # delete
-        like.delete()
-
-        return JsonResponse(data)
+        return JsonResponse(CommentLikeSerializer(likes[0]).data)
 
 
 class ReviewLikeDetail(APIView):
@@ -598,14 +827,34 @@ class ReviewLikeDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=401
             )
 
-        # check if review exists
-        if not Review.objects.filter(pk=review_id):
-            return JsonResponse({"detail": "Review not found"}, status=404)
+        date = timezone.now()
+
+        with transaction.atomic():
+            # create like if review exists and it is not liked yet
+            like = insert_unique(
+                ReviewLike,
+                {
+                    "review_id": review_id,
+                    "profile_id": profile.pk,
+                    "date_created": date,
+                },
+                exists=(Review, review_id),
+            )
+
+            # likes count towards the reviewed drink
+            if like:
+                change_count(Review, review_id, "like_count", 1)
+
+                drink_id = Review.objects.values_list("drink_id", flat=True).get(
+                    pk=review_id
+                )
+                record_activity(drink_id, "like", date)
+
+        if like is None:
+            # check if review exists
+            if not Review.objects.filter(pk=review_id).exists():
+                return JsonResponse({"detail": "Review not found"}, status=404)
 
-        # check if like exists
-        if ReviewLike.objects.filter(
-            review_id=review_id, profile_id=profile.pk
-        ).exists():
             return JsonResponse(
                 {
                     "detail": f"Profile {profile.pk} has already liked review {review_id}"
@@ -613,13 +862,6 @@ class ReviewLikeDetail(APIView):
                 status=409,
             )
 
-        # create like
-        like = ReviewLike()
-        like.review_id = review_id
-        like.profile_id = profile.pk
-
-        like.save()
-
         return JsonResponse(ReviewLikeSerializer(like).data)
 
     def delete(self, request, review_id):
@@ -638,25 +880,31 @@ class ReviewLikeDetail(APIView):
                 {"detail": "User does not have connected profile"}, status=401
             )
 
-        # check if review exists
-        if not Review.objects.filter(pk=review_id):
-            return JsonResponse({"detail": "Review not found"}, status=404)
+        # delete
+        with transaction.atomic():
+            likes = delete_returning(
+                ReviewLike,
+                review_id=review_id,
+                profile_id=profile.pk,
+                returning=["date_created"],
+            )
 
-        # check if like exists
-        like = None
+            if likes:
+                change_count(Review, review_id, "like_count", -1)
+
+                drink_id = Review.objects.values_list("drink_id", flat=True).get(
+                    pk=review_id
+                )
+                record_activity(drink_id, "like", likes[0].date_created, sign=-1)
+
+        if not likes:
+            # check if review exists
+            if not Review.objects.filter(pk=review_id).exists():
+                return JsonResponse({"detail": "Review not found"}, status=404)
 
-        try:
-            like = ReviewLike.objects.get(review_id=review_id, profile_id=profile.pk)
-        except ObjectDoesNotExist:
             return JsonResponse(
                 {"detail": f"Profile {profile.pk} has not liked review {review_id}"},
                 status=409,
             )
 
-        # serialize
-        data = ReviewLikeSerializer(like).data
-
-        # delete
-        like.delete()
-
-        return JsonResponse(data)
+        return JsonResponse(ReviewLikeSerializer(likes[0]).data)
@@ -0,0 +1,257 @@
+import bisect
+import threading
+import time
+from django.conf import settings
+from django.db.models import Max
+from fizzgrid.text import normalize
+from .models import SuggestChange
+
+KINDS = ("drink", "profile")
+
+# changes read again on every check, so changes that commit out of id order are not
+# missed, applying a change twice is a no-op
+LOOKBACK = 100
+
+# more pending changes than this rebuild the index instead (e.g. after an import)
+REBUILD_THRESHOLD = 10_000
+
+# keys scanned per search at most, bounds the time of very short prefixes
+SCAN_LIMIT = 2000
+
+SEPARATOR = "\x00"
+
+
+def terms(text):
+    """
+    Searchable terms of text, the whole name and the rest of it from every later word
+    So "cherry cola" is found by "che" and by "col"
+    """
+    words = normalize(text).split(" ")
+
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def index_keys(object_id, name, detail):
+    """
+    Sorted index keys of an entry, each term followed by the id it belongs to
+    """
+    suffix = f"{SEPARATOR}{object_id}"
+
+    return sorted(
+        {f"{term}{suffix}" for text in (name, detail) for term in terms(text)}
+    )
+
+
+def record_change(kind, object_id, name="", detail="", removed=False):
+    """
+    Log a change for every worker's index, call in the transaction that makes it
+    """
+    SuggestChange.objects.create(
+        kind=kind, object_id=object_id, name=name, detail=detail, removed=removed
+    )
+
+
+def record_removed(kind, object_ids):
+    """
+    Log many removals at once, for bulk deletes that skip signals
+    """
+    SuggestChange.objects.bulk_create(
+        [
+            SuggestChange(kind=kind, object_id=object_id, removed=True)
+            for object_id in object_ids
+        ],
+        batch_size=1000,
+    )
+
+
+def record_drinks(drinks):
+    """
+    Log many created or changed drinks at once, for bulk writes that skip signals
+    """
+    SuggestChange.objects.bulk_create(
+        [
+            SuggestChange(
+                kind="drink",
+                object_id=drink.pk,
+                name=drink.product_name,
+                detail=drink.brand_name,
+            )
+            for drink in drinks
+        ],
+        batch_size=1000,
+    )
+
+
+class SuggestIndex:
+    """
+    In-process prefix index over drink names and profile usernames
+    Keys are kept in one sorted list per kind, a prefix search is a bisect and a short
+    scan
+    Built from the database on first use, then kept fresh from SuggestChange
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+        self.keys = {kind: [] for kind in KINDS}
+        self.entries = {}
+
+        # change id each entry was last updated by, for entries changed since the build
+        self.applied = {}
+
+        # last change id seen, None until built
+        self.version = None
+        self.checked = 0.0
+
+    def load(self, entries, version=0):
+        """
+        Replace the index with entries, an iterable of (kind, id, name, detail)
+        """
+        loaded = {}
+        keys = {kind: [] for kind in KINDS}
+
+        for kind, object_id, name, detail in entries:
+            loaded[(kind, object_id)] = (name, detail)
+            keys[kind].extend(index_keys(object_id, name, detail))
+
+        for kind_keys in keys.values():
+            kind_keys.sort()
+
+        with self.lock:
+            self.keys = keys
+            self.entries = loaded
+            self.applied = {}
+            self.version = version
+            self.checked = time.monotonic()
+
+    def build(self):
+        """
+        Load every drink and profile from the database
+        """
+        from drinks.models import Drink
+        from profiles.models import Profile
+
+        # read the version first, changes made while loading are applied again later
+        version = SuggestChange.objects.aggregate(version=Max("id"))["version"] or 0
+
+        drinks = Drink.objects.values_list("id", "product_name", "brand_name")
+        profiles = Profile.objects.values_list("id", "user__username")
+
+        def entries():
+            for drink_id, product_name, brand_name in drinks.iterator(
+                chunk_size=10_000
+            ):
+                yield "drink", drink_id, product_name, brand_name
+
+            for profile_id, username in profiles.iterator(chunk_size=10_000):
+                yield "profile", profile_id, username, ""
+
+        self.load(entries(), version)
+
+    def refresh(self):
+        """
+        Apply changes logged by any worker since the last check, at most once per
+        SEARCH_SUGGEST_REFRESH_INTERVAL seconds
+        Rebuilds when never built, when too many changes are pending, or when the last
+        check is older than SEARCH_SUGGEST_RETENTION (changes may have been pruned)
+        """
+        now = time.monotonic()
+
+        if (
+            self.version is None
+            or now - self.checked > settings.SEARCH_SUGGEST_RETENTION
+        ):
+            self.build()
+            return
+
+        if now - self.checked < settings.SEARCH_SUGGEST_REFRESH_INTERVAL:
+            return
+
+        changes = list(
+            SuggestChange.objects.filter(id__gt=self.version - LOOKBACK)
+            .order_by("id")
+            .values_list("id", "kind", "object_id", "name", "detail", "removed")[
+                : LOOKBACK + REBUILD_THRESHOLD
+            ]
+        )
+
+        if len(changes) >= LOOKBACK + REBUILD_THRESHOLD:
+            self.build()
+            return
+
+        with self.lock:
+            for change in changes:
+                self.apply(*change)
+
+            self.checked = now
+
+    def apply(self, change_id, kind, object_id, name, detail, removed):
+        """
+        Update one entry from a change, older changes than the last applied are skipped
+        Call with the lock held
+        """
+        self.version = max(self.version, change_id)
+
+        entry = (kind, object_id)
+
+        if change_id <= self.applied.get(entry, 0):
+            return
+
+        self.applied[entry] = change_id
+
+        keys = self.keys[kind]
+
+        # drop the old keys
+        if entry in self.entries:
+            for key in index_keys(object_id, *self.entries.pop(entry)):
+                i = bisect.bisect_left(keys, key)
+
+                if i < len(keys) and keys[i] == key:
+                    del keys[i]
+
+        if not removed:
+            self.entries[entry] = (name, detail)
+
+            for key in index_keys(object_id, name, detail):
+                bisect.insort(keys, key)
+
+    def search(self, query, limit=5):
+        """
+        Entries with a term starting with query, up to limit per kind
+        Returns {kind: [(id, name, detail)]} in term order
+        """
+        prefix = normalize(query)
+        results = {kind: [] for kind in KINDS}
+
+        if not prefix:
+            return results
+
+        with self.lock:
+            for kind, keys in self.keys.items():
+                found = results[kind]
+                seen = set()
+                start = bisect.bisect_left(keys, prefix)
+
+                for i in range(start, min(start + SCAN_LIMIT, len(keys))):
+                    key = keys[i]
+
+                    if not key.startswith(prefix):
+                        break
+
+                    # an entry matches once per term starting with prefix
+                    object_id = int(key[key.rindex(SEPARATOR) + 1 :])
+
+                    if object_id in seen:
+                        continue
+
+                    seen.add(object_id)
+                    found.append((object_id, *self.entries[(kind, object_id)]))
+
+                    if len(found) >= limit:
+                        break
+
+        return results
+
+
+# one index per worker process
+suggest_index = SuggestIndex()
@@ -0,0 +1,88 @@
+import random
+import resource
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from search.index import SuggestIndex
+
+FLAVORS = ["cherry", "lime", "vanilla", "orange", "grape", "root", "ginger", "cream"]
+STYLES = ["cola", "soda", "beer", "ale", "fizz", "pop", "tonic", "spritz"]
+BRANDS = ["coca-cola", "pepsi", "dr pepper", "fanta", "jarritos", "olipop", "sprite"]
+
+# every prefix typed on the way to these
+TYPED = ["cherry cola", "ginger ale 12", "pepsi", "jarritos", "user12345"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark search suggestions on a synthetic in-memory index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=1_000_000)
+        parser.add_argument(
+            "--profiles",
+            type=float,
+            default=0.2,
+            help="share of entries that are users",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        index = SuggestIndex()
+
+        start = time.perf_counter()
+        index.load(self.create_entries(options["entries"], options["profiles"]))
+
+        # kilobytes on linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        self.stdout.write(
+            f"{len(index.entries)} entries, "
+            f"{sum(len(keys) for keys in index.keys.values())} keys built in "
+            f"{time.perf_counter() - start:.2f}s, peak memory {peak:.0f} MB"
+        )
+
+        queries = [text[:i] for text in TYPED for i in range(1, len(text) + 1)]
+        timings = []
+
+        for _ in range(options["repeat"]):
+            for query in queries:
+                start = time.perf_counter()
+                index.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+
+        self.stdout.write(
+            f"search: median {statistics.median(timings):.3f} ms, "
+            f"p99 {timings[int(len(timings) * 0.99) - 1]:.3f} ms, "
+            f"max {timings[-1]:.3f} ms over {len(timings)} keystrokes"
+        )
+
+        # a name change as applied from SuggestChange
+        timings = []
+
+        for i in range(1000):
+            start = time.perf_counter()
+            with index.lock:
+                index.apply(i + 1, "drink", i, f"renamed soda {i}", "fizz co", False)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(
+            f"apply: median {statistics.median(timings):.3f} ms over "
+            f"{len(timings)} changes"
+        )
+
+    def create_entries(self, count, profile_share):
+        rng = random.Random(0)
+        profiles = int(count * profile_share)
+
+        for i in range(count - profiles):
+            yield (
+                "drink",
+                i,
+                f"{rng.choice(FLAVORS)} {rng.choice(STYLES)} {i}",
+                rng.choice(BRANDS),
+            )
+
+        for i in range(profiles):
+            yield "profile", i, f"user{i}", ""
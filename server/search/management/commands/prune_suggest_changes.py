@@ -0,0 +1,26 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from search.models import SuggestChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete search suggestion changes older than SEARCH_SUGGEST_RETENTION, run "
+        "periodically (e.g. hourly)"
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=settings.SEARCH_SUGGEST_RETENTION)
+
+        # keep the newest change, sqlite reuses the largest id once it is deleted
+        latest = SuggestChange.objects.order_by("-id").values_list("id", flat=True)[:1]
+
+        deleted, _ = (
+            SuggestChange.objects.filter(date_created__lt=cutoff)
+            .exclude(id__in=list(latest))
+            .delete()
+        )
+
+        self.stdout.write(f"Deleted {deleted} suggest changes")
@@ -0,0 +1,24 @@
+from django.db import models
+from django.utils import timezone
+
+
+# change to a suggestable name, read by every worker's suggest index, see search.index
+# the id is the version, workers apply changes newer than the last one they saw
+class SuggestChange(models.Model):
+    KIND_CHOICES = [
+        ("drink", "Drink"),
+        ("profile", "Profile"),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+
+    # drink product and brand name, profile username
+    name = models.CharField(max_length=300, blank=True)
+    detail = models.CharField(max_length=300, blank=True)
+
+    removed = models.BooleanField(default=False)
+    date_created = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.pk}: {self.kind} {self.object_id}"
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from drinks.models import Drink
+from fizzgrid.deletion import bulk_delete
+from profiles.models import Profile
+from .index import record_change, record_removed
+
+
+@receiver(post_save, sender=Drink)
+def record_drink_saved(sender, instance, **kwargs):
+    """
+    Index the drink's current names
+    """
+    record_change("drink", instance.pk, instance.product_name, instance.brand_name)
+
+
+@receiver(post_delete, sender=Drink)
+def record_drink_deleted(sender, instance, **kwargs):
+    """
+    Remove the drink from the index
+    """
+    record_change("drink", instance.pk, removed=True)
+
+
+@receiver(bulk_delete, sender=Drink)
+def record_drinks_deleted(sender, queryset, **kwargs):
+    """
+    Remove fast deleted drinks from the index
+    """
+    record_removed("drink", queryset.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Profile)
+def record_profile_saved(sender, instance, created, **kwargs):
+    """
+    Index new profiles by username, later profile saves do not change it
+    """
+    if created:
+        record_change("profile", instance.pk, instance.user.username)
+
+
+@receiver(post_delete, sender=Profile)
+def record_profile_deleted(sender, instance, **kwargs):
+    """
+    Remove the profile from the index
+    """
+    record_change("profile", instance.pk, removed=True)
+
+
+@receiver(bulk_delete, sender=Profile)
+def record_profiles_deleted(sender, queryset, **kwargs):
+    """
+    Remove fast deleted profiles from the index
+    """
+    record_removed("profile", queryset.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=User)
+def record_username_saved(sender, instance, created, update_fields, **kwargs):
+    """
+    Index the new username of a user's profile, skips saves that cannot change it
+    (e.g. last_login on every login)
+    """
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+
+    for profile_id in Profile.objects.filter(user=instance).values_list(
+        "pk", flat=True
+    ):
+        record_change("profile", profile_id, instance.username)
@@ -0,0 +1,148 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from drinks.models import Drink
+from profiles.models import Profile
+from rest_framework.test import APITestCase, APIClient
+from .index import SuggestIndex, suggest_index
+from .models import SuggestChange
+
+
+@override_settings(SEARCH_SUGGEST_REFRESH_INTERVAL=0)
+class TestSuggestGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        # rebuild from this test's data
+        suggest_index.version = None
+
+        self.drinks = [
+            Drink.objects.create(product_name="Cherry Cola", brand_name="Fizz Co"),
+            Drink.objects.create(product_name="Ginger Ale", brand_name="Canada Dry"),
+            Drink.objects.create(product_name="Crème Soda", brand_name="Olipop"),
+        ]
+
+        self.user = User.objects.create(username="ColaFan")
+        self.profile = Profile.objects.create(user=self.user)
+
+    def suggest(self, query):
+        response = self.client.get("/search/suggest/", {"q": query})
+
+        self.assertEqual(200, response.status_code)
+
+        return json.loads(response.content)
+
+    def suggested_drinks(self, query):
+        return [drink["id"] for drink in self.suggest(query)["drinks"]]
+
+    def test_suggest_prefix(self):
+        data = self.suggest("c")
+
+        self.assertListEqual(
+            [self.drinks[1].pk, self.drinks[0].pk, self.drinks[2].pk],
+            [drink["id"] for drink in data["drinks"]],
+        )
+        self.assertListEqual(
+            [{"id": self.profile.pk, "username": "ColaFan"}], data["profiles"]
+        )
+        self.assertDictEqual(
+            {
+                "id": self.drinks[0].pk,
+                "product_name": "Cherry Cola",
+                "brand_name": "Fizz Co",
+            },
+            data["drinks"][1],
+        )
+
+    def test_suggest_later_word(self):
+        self.assertListEqual([self.drinks[0].pk], self.suggested_drinks("cola"))
+        self.assertListEqual([self.drinks[1].pk], self.suggested_drinks("dry"))
+        self.assertListEqual([], self.suggested_drinks("herry"))
+
+    def test_suggest_normalized(self):
+        self.assertListEqual([self.drinks[2].pk], self.suggested_drinks("CREME s"))
+        self.assertListEqual([self.drinks[0].pk], self.suggested_drinks(" cherry  co"))
+
+    def test_suggest_empty(self):
+        self.assertDictEqual({"drinks": [], "profiles": []}, self.suggest(""))
+
+    def test_suggest_limit(self):
+        response = self.client.get("/search/suggest/", {"q": "c", "limit": 1})
+
+        self.assertEqual(1, len(json.loads(response.content)["drinks"]))
+
+    def test_reject_bad_limit(self):
+        response = self.client.get("/search/suggest/", {"q": "c", "limit": 0})
+
+        self.assertEqual(400, response.status_code)
+
+    def test_changes_applied(self):
+        self.suggest("c")
+
+        # rename, delete, create
+        self.drinks[0].product_name = "Black Cherry"
+        self.drinks[0].save()
+        self.drinks[1].delete()
+        drink = Drink.objects.create(product_name="Cola Zero", brand_name="Fizz Co")
+
+        self.user.username = "SodaFan"
+        self.user.save()
+
+        self.assertListEqual(
+            [self.drinks[0].pk, drink.pk, self.drinks[2].pk],
+            self.suggested_drinks("c"),
+        )
+        self.assertListEqual([self.drinks[0].pk], self.suggested_drinks("black"))
+        self.assertListEqual([], self.suggest("cola")["profiles"])
+        self.assertListEqual(
+            [{"id": self.profile.pk, "username": "SodaFan"}],
+            self.suggest("soda")["profiles"],
+        )
+
+    def test_workers_converge(self):
+        # another worker's index, built before the changes
+        worker = SuggestIndex()
+        worker.build()
+
+        self.drinks[1].product_name = "Ginger Beer"
+        self.drinks[1].save()
+        self.profile.delete()
+
+        worker.refresh()
+
+        self.assertEqual(SuggestChange.objects.latest("id").pk, worker.version)
+        self.assertEqual(
+            [(self.drinks[1].pk, "Ginger Beer", "Canada Dry")],
+            worker.search("ginger")["drink"],
+        )
+        self.assertListEqual([], worker.search("colafan")["profile"])
+
+    def test_older_change_skipped(self):
+        self.suggest("c")
+
+        self.drinks[0].product_name = "Black Cherry"
+        self.drinks[0].save()
+        self.suggest("c")
+
+        # an older change committing late does not undo the newer one
+        with suggest_index.lock:
+            suggest_index.apply(
+                1, "drink", self.drinks[0].pk, "Cherry Cola", "Fizz Co", False
+            )
+
+        self.assertListEqual([self.drinks[0].pk], self.suggested_drinks("black"))
+
+    def test_prune_changes(self):
+        SuggestChange.objects.update(date_created=timezone.now() - timedelta(days=2))
+        latest = SuggestChange.objects.latest("id")
+
+        call_command("prune_suggest_changes", stdout=StringIO())
+
+        self.assertListEqual(
+            [latest.pk], [change.pk for change in SuggestChange.objects.all()]
+        )
@@ -0,0 +1,39 @@
+from django.http import JsonResponse
+from fizzgrid.pagination import parse_limit
+from .index import suggest_index
+from rest_framework.views import APIView
+
+
+class Suggest(APIView):
+    """
+    Search as you type suggestions
+    """
+
+    def get(self, request):
+        """
+        Get drinks and profiles with a name starting with a word prefix, served from the
+        worker's in-memory index
+        Query params - q: string, limit: int, per kind
+        """
+        try:
+            limit = parse_limit(request.query_params.get("limit"), 5, maximum=20)
+        except ValueError:
+            return JsonResponse(
+                {"detail": "limit must be a positive integer"}, status=400
+            )
+
+        suggest_index.refresh()
+        results = suggest_index.search(request.query_params.get("q", ""), limit)
+
+        return JsonResponse(
+            {
+                "drinks": [
+                    {"id": drink_id, "product_name": name, "brand_name": detail}
+                    for drink_id, name, detail in results["drink"]
+                ],
+                "profiles": [
+                    {"id": profile_id, "username": name}
+                    for profile_id, name, _ in results["profile"]
+                ],
+            }
+        )
@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from tombstones.reaper import BATCH_SIZE, reap
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete files of deleted images and avatars from storage in batches, run "
+        "periodically (e.g. every minute) or as a worker with --interval"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="keep running, reaping every interval seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+
+            reaped = reap(batch_size=options["batch_size"])
+
+            if reaped or options["interval"] is None:
+                self.stdout.write(
+                    f"Deleted {reaped} files in {time.perf_counter() - start:.2f}s"
+                )
+
+            if options["interval"] is None:
+                return
+
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,12 @@
+from django.db import models
+from django.utils import timezone
+
+
+# stored file to delete, written in the deleting transaction so it only counts if that
+# commits, deleted from storage in batches afterwards, see tombstones.reaper
+class Tombstone(models.Model):
+    name = models.CharField(max_length=1024)
+    date_created = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
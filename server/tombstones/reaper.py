@@ -0,0 +1,125 @@
+import logging
+from django.core.files.storage import default_storage
+from django.db import transaction
+from fizzgrid import storage_writer
+from fizzgrid.images import RENDITION_FORMATS
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+from .models import Tombstone
+
+logger = logging.getLogger(__name__)
+
+# keys per S3 DeleteObjects call, its maximum
+BATCH_SIZE = 1000
+
+
+def image_names(name, renditions):
+    """
+    Stored names of an image and its renditions
+    """
+    names = [name] if name else []
+
+    for files in (renditions or {}).values():
+        names.extend(
+            files[extension] for extension in RENDITION_FORMATS if files.get(extension)
+        )
+
+    return names
+
+
+def bury(names):
+    """
+    Record stored files for deletion in the current transaction
+    Nothing is deleted from storage until the transaction commits and a reaper runs
+    """
+    if names:
+        Tombstone.objects.bulk_create(
+            [Tombstone(name=name) for name in names], batch_size=BATCH_SIZE
+        )
+
+
+def reap_soon():
+    """
+    Reap on the storage worker pool once the current transaction commits, files left
+    behind (e.g. admin deletes, worker restarts) are reaped by reap_tombstones
+    """
+    storage_writer.submit(reap)
+
+
+def reap(storage=None, batch_size=BATCH_SIZE):
+    """
+    Delete buried files from storage batch_size at a time until none are left
+    Batches are locked with SKIP LOCKED so concurrent reapers split the work, files that
+    could not be deleted keep their tombstones for the next run
+    Returns the number of files deleted
+    """
+    storage = storage or default_storage
+    reaped = 0
+
+    while True:
+        with transaction.atomic():
+            tombstones = list(
+                Tombstone.objects.select_for_update(skip_locked=True).order_by("id")[
+                    :batch_size
+                ]
+            )
+
+            if not tombstones:
+                return reaped
+
+            failed = delete_files({tombstone.name for tombstone in tombstones}, storage)
+
+            Tombstone.objects.filter(
+                pk__in=[
+                    tombstone.pk
+                    for tombstone in tombstones
+                    if tombstone.name not in failed
+                ]
+            ).delete()
+
+        reaped += len(tombstones) - len(failed)
+
+        # retried next run instead of spinning on them
+        if failed:
+            return reaped
+
+
+def delete_files(names, storage):
+    """
+    Delete names from storage, one request per 1000 names on S3
+    Returns the names that could not be deleted
+    """
+    if isinstance(storage, S3Storage):
+        return delete_objects(names, storage)
+
+    failed = set()
+
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.exception("Could not delete %s", name)
+            failed.add(name)
+
+    return failed
+
+
+def delete_objects(names, storage):
+    """
+    Delete up to BATCH_SIZE names with one S3 DeleteObjects call
+    Missing keys count as deleted, like storage.delete
+    """
+    keys = {storage._normalize_name(clean_name(name)): name for name in names}
+
+    response = storage.bucket.meta.client.delete_objects(
+        Bucket=storage.bucket.name,
+        Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+    )
+
+    failed = set()
+
+    for error in response.get("Errors", []):
+        logger.warning("Could not delete %s: %s", error["Key"], error.get("Message"))
+        failed.add(keys[error["Key"]])
+
+    return failed
@@ -0,0 +1,139 @@
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from drinks.models import Drink, DrinkImage
+from fizzgrid.testing import TemporaryStorageMixin
+from profiles.models import Profile
+from rest_framework.test import APITestCase, APIClient
+from .models import Tombstone
+from .reaper import bury, reap
+
+
+class FailingStorage:
+    """
+    Storage that cannot delete one name
+    """
+
+    def __init__(self, failing):
+        self.failing = failing
+        self.deleted = []
+
+    def delete(self, name):
+        if name == self.failing:
+            raise OSError("delete failed")
+
+        self.deleted.append(name)
+
+
+class TestTombstones(TemporaryStorageMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+
+        # client
+        self.client = APIClient()
+
+        self.password = "password"
+        self.user = User.objects.create_user(
+            username="user", password=self.password, is_staff=True
+        )
+
+        self.drink = Drink.objects.create(product_name="Cola", brand_name="Brand")
+
+    def store(self, name):
+        return default_storage.save(name, ContentFile(b"image"))
+
+    def create_drink_image(self):
+        name = self.store("drink_imgs/image.jpg")
+        renditions = {
+            "thumb": {
+                "width": 160,
+                "height": 120,
+                "webp": self.store("drink_imgs/renditions/image_thumb.webp"),
+                "jpeg": self.store("drink_imgs/renditions/image_thumb.jpeg"),
+            }
+        }
+
+        DrinkImage.objects.create(
+            drink=self.drink,
+            label="Cola - Brand",
+            image=name,
+            renditions=renditions,
+            status=DrinkImage.Status.READY,
+        )
+
+        return [name, renditions["thumb"]["webp"], renditions["thumb"]["jpeg"]]
+
+    def test_drink_delete(self):
+        names = self.create_drink_image() + self.create_drink_image()
+
+        # login
+        self.client.login(username="user", password=self.password)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(f"/drinks/drink/{self.drink.pk}/")
+
+            # recorded in the transaction, nothing deleted yet
+            self.assertEqual(6, Tombstone.objects.count())
+            self.assertTrue(all(default_storage.exists(name) for name in names))
+
+        self.assertEqual(200, response.status_code)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_rollback_keeps_files(self):
+        names = self.create_drink_image()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.drink.delete()
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_account_delete(self):
+        name = self.store("profile_imgs/avatar.jpg")
+        Profile.objects.create(user=self.user, profile_img=name)
+
+        # login
+        self.client.login(username="user", password=self.password)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                "/profiles/profile/", {"password": self.password}
+            )
+
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_reap_batches(self):
+        names = [self.store(f"drink_imgs/image{i}.jpg") for i in range(5)]
+        bury(names)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(5, reap(batch_size=2))
+
+        # one tombstone delete per batch of 2
+        self.assertEqual(3, sum(query["sql"].startswith("DELETE") for query in queries))
+
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_reap_failure_kept(self):
+        bury(["a.jpg", "b.jpg", "c.jpg"])
+        storage = FailingStorage("b.jpg")
+
+        self.assertEqual(2, reap(storage))
+        self.assertListEqual(["a.jpg", "c.jpg"], sorted(storage.deleted))
+        self.assertListEqual(
+            ["b.jpg"], list(Tombstone.objects.values_list("name", flat=True))
+        )
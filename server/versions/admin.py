@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from .models import TableVersion
+
+admin.site.register(TableVersion)
@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class VersionsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "versions"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate, pre_migrate
+        from .tracking import (
+            install_write_tracking,
+            pause_write_tracking,
+            resume_write_tracking,
+        )
+
+        connection_created.connect(install_write_tracking)
+        pre_migrate.connect(pause_write_tracking, sender=self)
+        post_migrate.connect(resume_write_tracking, sender=self)
@@ -0,0 +1,127 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.utils import timezone
+from drinks.models import Drink, DrinkStats
+from profiles.models import Profile
+from reviews.models import Review
+
+BRAND = "Bench Conditional"
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a polling client session with and without conditional GETs, "
+        "report bytes served and server CPU time. Writes to the configured database, "
+        "the synthetic data is removed afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drinks", type=int, default=200)
+        parser.add_argument("--reviews", type=int, default=2000)
+        parser.add_argument("--rounds", type=int, default=50)
+        parser.add_argument(
+            "--write-every",
+            type=int,
+            default=10,
+            help="post a review every n rounds",
+        )
+
+    def handle(self, *args, **options):
+        drinks, profiles = self.create_data(options["drinks"], options["reviews"])
+
+        try:
+            # what a client polls: feed, a drink page and its reviews, a profile
+            urls = [
+                "/drinks/",
+                "/reviews/",
+                f"/drinks/drink/{drinks[0].pk}/page/",
+                f"/reviews/?drink={drinks[0].pk}",
+                f"/profiles/profile/{profiles[0].pk}/",
+            ]
+
+            for conditional in (False, True):
+                requests, not_modified, size, cpu = self.replay(
+                    urls, drinks, profiles[1], options, conditional
+                )
+
+                self.stdout.write(
+                    f"{'conditional' if conditional else 'plain'}: {requests} requests, "
+                    f"{not_modified} not modified, {size / 1024:.1f} KiB, "
+                    f"{cpu * 1000:.0f} ms cpu ({cpu * 1e6 / requests:.0f} us/request)"
+                )
+        finally:
+            Drink.objects.filter(brand_name=BRAND).delete()
+            User.objects.filter(username__startswith="bench-conditional-").delete()
+
+    def replay(self, urls, drinks, writer, options, conditional):
+        client = Client()
+        etags = {}
+        requests = not_modified = size = 0
+        cpu = 0.0
+
+        # someone else posting reviews between polls
+        writer_client = Client()
+        writer_client.force_login(writer.user)
+
+        for i in range(options["rounds"]):
+            if i and i % options["write_every"] == 0:
+                writer_client.post(
+                    "/reviews/review/",
+                    {
+                        "rating": 4,
+                        "review_text": "Bench review",
+                        "drink_id": drinks[0].pk,
+                    },
+                )
+
+            for url in urls:
+                headers = {}
+
+                if conditional and url in etags:
+                    headers["HTTP_IF_NONE_MATCH"] = etags[url]
+
+                start = time.process_time()
+                response = client.get(url, **headers)
+                cpu += time.process_time() - start
+
+                requests += 1
+                size += len(response.content)
+
+                if response.status_code == 304:
+                    not_modified += 1
+
+                if response.has_header("ETag"):
+                    etags[url] = response["ETag"]
+
+        return requests, not_modified, size, cpu
+
+    def create_data(self, drink_count, review_count):
+        drinks = [
+            Drink.objects.create(product_name=f"Drink {i}", brand_name=BRAND)
+            for i in range(drink_count)
+        ]
+        DrinkStats.objects.bulk_create([DrinkStats(drink=drink) for drink in drinks])
+
+        profiles = []
+
+        for i in range(20):
+            user = User.objects.create(username=f"bench-conditional-{i}")
+            profiles.append(Profile.objects.create(user=user))
+
+        now = timezone.now()
+        Review.objects.bulk_create(
+            [
+                Review(
+                    profile=profiles[i % len(profiles)],
+                    drink=drinks[i % len(drinks)],
+                    review_text="Review text " * 20,
+                    rating=i % 5 + 1,
+                    date_created=now,
+                )
+                for i in range(review_count)
+            ]
+        )
+
+        return drinks, profiles
@@ -0,0 +1,13 @@
+from django.db import models
+from django.utils import timezone
+
+
+# write counter per database table, bumped after every committed write to it, see
+# versions.tracking, conditional GETs derive their ETag and Last-Modified from these
+class TableVersion(models.Model):
+    table = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.table}: {self.version}"
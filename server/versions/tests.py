@@ -0,0 +1,161 @@
+import json
+from django.contrib.auth.models import User
+from django.db import transaction
+from drinks.models import Drink, DrinkStats
+from profiles.models import Profile
+from reviews.models import Review
+from rest_framework.test import APITestCase, APIClient
+from django.utils import timezone
+from .models import TableVersion
+
+
+class TestConditionalGET(APITestCase):
+    def setUp(self):
+        # client
+        self.client = APIClient()
+
+        # commit the setup so the tables have versions
+        with self.captureOnCommitCallbacks(execute=True):
+            self.drink = Drink.objects.create(product_name="Cola", brand_name="Brand")
+            DrinkStats.objects.create(drink=self.drink)
+
+            self.user = User.objects.create(username="user")
+            self.profile = Profile.objects.create(user=self.user)
+
+    def get(self, url, etag=None):
+        if etag:
+            return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        return self.client.get(url)
+
+    def test_etag_headers(self):
+        response = self.get("/drinks/")
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_not_modified(self):
+        etag = self.get("/drinks/")["ETag"]
+
+        # only the table versions are read
+        with self.assertNumQueries(1):
+            response = self.get("/drinks/", etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b"", response.content)
+        self.assertEqual(etag, response["ETag"])
+
+    def test_modified_after_write(self):
+        etag = self.get("/drinks/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Drink.objects.create(product_name="Root Beer", brand_name="Brand")
+
+        response = self.get("/drinks/", etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(json.loads(response.content)["drinks"]))
+        self.assertNotEqual(etag, response["ETag"])
+
+    def test_modified_after_queryset_update(self):
+        etag = self.get(f"/drinks/drink/{self.drink.pk}/")["ETag"]
+
+        # F() stat updates skip signals and save()
+        with self.captureOnCommitCallbacks(execute=True):
+            DrinkStats.objects.filter(drink=self.drink).update(review_count=1)
+
+        response = self.get(f"/drinks/drink/{self.drink.pk}/", etag)
+
+        self.assertEqual(200, response.status_code)
+
+    def test_modified_after_post(self):
+        url = f"/drinks/favorites/?drink={self.drink.pk}"
+        etag = self.get(url)["ETag"]
+
+        self.client.force_authenticate(user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/drinks/drink/{self.drink.pk}/favorite/")
+
+        self.client.force_authenticate(user=None)
+        response = self.get(url, etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, len(json.loads(response.content)["favorites"]))
+
+    def test_unrelated_write(self):
+        etag = self.get("/drinks/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(
+                profile=self.profile,
+                drink=self.drink,
+                review_text="Review text",
+                rating=5,
+                date_created=timezone.now(),
+            )
+
+        # drink lists do not read reviews
+        self.assertEqual(304, self.get("/drinks/", etag).status_code)
+
+    def test_rollback_not_counted(self):
+        version = TableVersion.objects.get(table="drinks_drink").version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Drink.objects.create(product_name="Root Beer", brand_name="Brand")
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertEqual(
+            version, TableVersion.objects.get(table="drinks_drink").version
+        )
+
+    def test_write_after_rollback(self):
+        version = TableVersion.objects.get(table="drinks_drink").version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Drink.objects.create(product_name="Root Beer", brand_name="Brand")
+
+            for product_name in ["Ginger Ale", "Cream Soda"]:
+                try:
+                    with transaction.atomic():
+                        Drink.objects.create(
+                            product_name=product_name, brand_name="Brand"
+                        )
+                        raise ValueError
+                except ValueError:
+                    pass
+
+            with transaction.atomic():
+                Drink.objects.create(product_name="Orange", brand_name="Brand")
+
+            Drink.objects.create(product_name="Lemonade", brand_name="Brand")
+
+        # check one bump for the outer writes and one for the committed savepoint
+        self.assertEqual(
+            version + 2, TableVersion.objects.get(table="drinks_drink").version
+        )
+
+    def test_etag_per_user(self):
+        etag = self.get("/drinks/")["ETag"]
+
+        self.client.force_authenticate(user=self.user)
+
+        self.assertEqual(200, self.get("/drinks/", etag).status_code)
+
+    def test_etag_per_query(self):
+        etag = self.get("/drinks/")["ETag"]
+
+        self.assertEqual(200, self.get("/drinks/?page=2", etag).status_code)
+
+    def test_recent_not_conditional(self):
+        response = self.get("/reviews/?recent=true")
+
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(response.has_header("ETag"))
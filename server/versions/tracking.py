@@ -0,0 +1,166 @@
+import re
+import weakref
+from django.apps import apps
+from django.db import connections, transaction
+from django.utils import timezone
+from .models import TableVersion
+
+# apps whose tables are versioned, everything the read endpoints serialize
+VERSIONED_APPS = {"auth", "drinks", "profiles", "reviews"}
+
+# table written by an INSERT, UPDATE or DELETE statement
+WRITE_STATEMENT = re.compile(
+    r'\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+["`]?(\w+)', re.IGNORECASE
+)
+
+_versioned_tables = None
+
+
+def versioned_tables():
+    """
+    Table names of every model in VERSIONED_APPS
+    """
+    global _versioned_tables
+
+    if _versioned_tables is None:
+        _versioned_tables = {
+            model._meta.db_table
+            for model in apps.get_models(include_auto_created=True)
+            if model._meta.app_label in VERSIONED_APPS
+        }
+
+    return _versioned_tables
+
+
+def install_write_tracking(sender, connection, **kwargs):
+    """
+    connection_created receiver, track writes on every connection
+    Writes are seen at the cursor, so ORM saves, queryset updates and deletes, bulk
+    operations, cascades and raw SQL are all counted without signals
+    """
+    if track_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_writes)
+
+
+def pause_write_tracking(sender, using, **kwargs):
+    """
+    pre_migrate receiver, the versions table may not exist yet while migrating
+    """
+    connections[using].pause_table_versions = True
+
+
+def resume_write_tracking(sender, using, **kwargs):
+    """
+    post_migrate receiver, bump every versioned table since migrations may have
+    changed any of them
+    """
+    connection = connections[using]
+    connection.pause_table_versions = False
+
+    bump(sorted(versioned_tables()), connection)
+
+
+def track_writes(execute, sql, params, many, context):
+    """
+    Execute wrapper marking the table of each write statement as changed
+    """
+    result = execute(sql, params, many, context)
+
+    if getattr(context["connection"], "pause_table_versions", False):
+        return result
+
+    match = WRITE_STATEMENT.match(sql)
+
+    if match and match.group(1) in versioned_tables():
+        mark_changed(context["connection"], match.group(1))
+
+    return result
+
+
+def mark_changed(connection, table):
+    """
+    Bump table's version once the current transaction commits (immediately outside of
+    one), one bump per table per transaction (or savepoint)
+    Bumping after commit keeps the version rows out of the writers' locks, a reader can
+    only see new data with the old version (and serve it again once bumped), never
+    the new version with old data
+    """
+    pending_versions = getattr(connection, "pending_table_versions", None)
+
+    # nothing is pending between transactions
+    if pending_versions is None or not connection.in_atomic_block:
+        pending_versions = weakref.WeakValueDictionary()
+        connection.pending_table_versions = pending_versions
+
+    savepoints = tuple(connection.savepoint_ids)
+    pending = pending_versions.get(savepoints)
+
+    # only the on-commit callback keeps the set alive, a rolled back transaction (or
+    # savepoint) drops the callback and the set with it
+    if pending is None:
+        pending = PendingVersions(connection, savepoints)
+        pending_versions[savepoints] = pending
+
+        transaction.on_commit(pending.flush, using=connection.alias, robust=True)
+
+    pending.tables.add(table)
+
+
+class PendingVersions:
+    """
+    Tables written by one transaction (or savepoint)
+    """
+
+    def __init__(self, connection, savepoints):
+        self.connection = connection
+        self.savepoints = savepoints
+        self.tables = set()
+
+    def flush(self):
+        # later writes start a new set (callbacks stay listed when run by tests)
+        pending_versions = getattr(self.connection, "pending_table_versions", {})
+
+        if pending_versions.get(self.savepoints) is self:
+            del pending_versions[self.savepoints]
+
+        bump(sorted(self.tables), self.connection)
+
+
+def bump(tables, connection):
+    """
+    Increment the versions of tables in one statement, creating missing rows
+    Tables are sorted so concurrent bumps lock rows in the same order
+    """
+    if not tables:
+        return
+
+    opts = TableVersion._meta
+    quote = connection.ops.quote_name
+    updated_at = opts.get_field("updated_at").get_db_prep_save(
+        timezone.now(), connection
+    )
+
+    sql = (
+        f"INSERT INTO {quote(opts.db_table)} "
+        f"({quote('table')}, {quote('version')}, {quote('updated_at')}) "
+        f"VALUES {', '.join(['(%s, 1, %s)'] * len(tables))} "
+        f"ON CONFLICT ({quote('table')}) DO UPDATE SET "
+        f"{quote('version')} = {quote(opts.db_table)}.{quote('version')} + 1, "
+        f"{quote('updated_at')} = EXCLUDED.{quote('updated_at')}"
+    )
+    params = [value for table in tables for value in (table, updated_at)]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def current_versions(tables):
+    """
+    {table: (version, updated_at)} for tables that were ever written
+    """
+    return {
+        table: (version, updated_at)
+        for table, version, updated_at in TableVersion.objects.filter(
+            table__in=tables
+        ).values_list("table", "version", "updated_at")
+    }